@@ -60,6 +60,7 @@ from .writer import *
 from .signal import *
 
 from .cerebro import *
+from .walkforward import *
 from .timer import *
 from .flt import *
 
@@ -25,6 +25,7 @@ from __future__ import (absolute_import, division, print_function,
 # or prepend an "_" (underscore) to private classes/variables
 
 from .bbroker import BackBroker, BrokerBack
+from .marketbroker import MarketBroker
 
 try:
     from .ibbroker import IBBroker
@@ -21,8 +21,11 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import bisect
 import collections
 import datetime
+import heapq
+import itertools
 
 import backtrader as bt
 from backtrader.comminfo import CommInfoBase
@@ -33,6 +36,109 @@ from backtrader.utils.py3 import string_types, integer_types
 __all__ = ['BackBroker', 'BrokerBack']
 
 
+class _PriceBook(object):
+    '''Pending orders of a data indexed by the price which triggers them
+
+    Limit and stop orders can only do something in a bar if their price is
+    in the range of the bar (``open`` included). They are kept in sorted
+    lists (buy limits, sell limits, buy stops and sell stops) and only those
+    in the range are visited. Orders which may do something with any bar
+    (market, close, trailing, ...) are visited always and orders with a
+    ``valid`` date are also kept in a heap to be visited once expired
+
+    The orders are identified by their ``ref`` and have a sequence number:
+    the one of the acceptance, which is the order in which they are visited
+    '''
+    def __init__(self):
+        self.buylimit = list()  # sorted (price, seq, ref)
+        self.selllimit = list()
+        self.buystop = list()
+        self.sellstop = list()
+        self.always = dict()  # ref -> seq
+        self.expiries = list()  # heap (valid, seq, ref), removed lazily
+        self.keys = dict()  # ref -> (seq, sorted list or None, entry)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _slot(self, order):
+        # sorted list and price which trigger the order, None if always
+        exectype = order.exectype
+        if exectype == Order.Limit:
+            lst = self.buylimit if order.isbuy() else self.selllimit
+            price = order.created.price
+        elif order.triggered and \
+                exectype in [Order.StopLimit, Order.StopTrailLimit]:
+            lst = self.buylimit if order.isbuy() else self.selllimit
+            price = order.created.pricelimit  # a limit once triggered
+        elif exectype in [Order.Stop, Order.StopLimit]:
+            lst = self.buystop if order.isbuy() else self.sellstop
+            price = order.created.price
+        else:  # market, close, trailing (adjusted each bar), historical
+            return None, None
+
+        if not isinstance(price, (float, integer_types)) or price != price:
+            return None, None  # no usable price, checked on each bar
+
+        return lst, price
+
+    def add(self, order, seq, expiry=True):
+        ref = order.ref
+        lst, price = self._slot(order)
+        if lst is None:
+            entry = None
+            self.always[ref] = seq
+        else:
+            entry = (price, seq, ref)
+            bisect.insort(lst, entry)
+
+        self.keys[ref] = (seq, lst, entry)
+
+        valid = order.valid
+        if expiry and valid and order.exectype != Order.Market:
+            heapq.heappush(self.expiries, (valid, seq, ref))
+
+    def remove(self, ref):
+        '''Removes the order and returns its sequence number'''
+        seq, lst, entry = self.keys.pop(ref)
+        if lst is None:
+            del self.always[ref]
+        else:
+            del lst[bisect.bisect_left(lst, entry)]
+
+        return seq
+
+    def visit(self, dt0, popen, phigh, plow):
+        '''Returns a dict (seq -> ref) of the orders which can be executed
+        by the bar or have expired'''
+        seqref = dict((seq, ref) for ref, seq in self.always.items())
+
+        if popen != popen or phigh != phigh or plow != plow:
+            # no range can be calculated, all orders are checked
+            for ref, (seq, _, _) in self.keys.items():
+                seqref[seq] = ref
+            return seqref
+
+        lo, hi = min(popen, plow), max(popen, phigh)
+        for lst, start, end in [
+                (self.buylimit, (lo,), None),  # price >= lo
+                (self.selllimit, None, (hi, float('inf'))),  # price <= hi
+                (self.buystop, None, (hi, float('inf'))),
+                (self.sellstop, (lo,), None)]:
+            i = 0 if start is None else bisect.bisect_left(lst, start)
+            j = len(lst) if end is None else bisect.bisect_right(lst, end)
+            for _, seq, ref in lst[i:j]:
+                seqref[seq] = ref
+
+        expiries = self.expiries
+        while expiries and expiries[0][0] < dt0:
+            _, seq, ref = heapq.heappop(expiries)
+            if ref in self.keys:
+                seqref[seq] = ref
+
+        return seqref
+
+
 class BackBroker(bt.BrokerBase):
     '''Broker Simulator
 
@@ -261,17 +367,22 @@ class BackBroker(bt.BrokerBase):
         self._unrealized = 0.0  # no open position
 
         self.orders = list()  # will only be appending
-        self.pending = collections.deque()  # popleft and append(right)
+        self.pending = dict()  # ref -> order, see _padd/_premove
+        self._pbooks = collections.defaultdict(_PriceBook)  # per data
+        self._pseq = itertools.count()  # acceptance order
         self._toactivate = collections.deque()  # to activate in next cycle
 
         self.positions = collections.defaultdict(Position)
+        self._posopen = list()  # datas with open positions (positions order)
+        self._posdirty = False  # a position may have been opened/closed
+        self._posvals = dict()  # data -> (inputs, value, unrealized)
         self.d_credit = collections.defaultdict(float)  # credit per data
         self.notifs = collections.deque()
 
         self.submitted = collections.deque()
 
         # to keep dependent orders if needed
-        self._pchildren = collections.defaultdict(collections.deque)
+        self._pchildren = collections.defaultdict(list)  # one per order
 
         self._ocos = dict()
         self._ocol = collections.defaultdict(list)
@@ -388,13 +499,33 @@ class BackBroker(bt.BrokerBase):
 
     fundvalue = property(get_fundvalue)
 
+    def _padd(self, order, seq=None):
+        expiry = seq is None
+        if expiry:
+            seq = next(self._pseq)
+
+        self.pending[order.ref] = order
+        self._pbooks[order.data].add(order, seq, expiry=expiry)
+
+    def _premove(self, order):
+        del self.pending[order.ref]
+        return self._pbooks[order.data].remove(order.ref)
+
+    def _pseqof(self, order):
+        # acceptance sequence number of a pending order
+        return self._pbooks[order.data].keys[order.ref][0]
+
+    def _pordered(self):
+        # pending orders in acceptance order
+        return sorted(self.pending.values(), key=self._pseqof)
+
     def cancel(self, order, bracket=False):
-        try:
-            self.pending.remove(order)
-        except ValueError:
-            # If the list didn't have the element we didn't cancel anything
+        if order.ref not in self.pending:
+            # If the order was not pending we didn't cancel anything
             return False
 
+        self._premove(order)
+
         order.cancel()
         self.notify(order)
         self._ococheck(order)
@@ -419,6 +550,38 @@ class BackBroker(bt.BrokerBase):
     def get_value_lever(self, datas=None, mkt=False):
         return self.get_value(datas=datas, mkt=mkt)
 
+    def _openpositions(self):
+        # flat positions add no value: only the open ones are visited. The
+        # list is only rebuilt after executions
+        if self._posdirty:
+            self._posopen = [data for data, pos in self.positions.items()
+                             if pos]
+            self._posdirty = False
+
+        return self._posopen
+
+    def _posvalue(self, data, comminfo):
+        # value and unrealized pnl of the position in data, only calculated
+        # again if the position, the price or the commission scheme changed
+        position = self.positions[data]
+        pclose = data.close[0]
+        inputs = (position.size, position.price, pclose, comminfo,
+                  self.p.shortcash)
+        memo = self._posvals.get(data)
+        if memo is not None and memo[0] == inputs:
+            return memo[1], memo[2]
+
+        # use valuesize:  returns raw value, rather than negative adj val
+        if not self.p.shortcash:
+            dvalue = comminfo.getvalue(position, pclose)
+        else:
+            dvalue = comminfo.getvaluesize(position.size, pclose)
+
+        dunrealized = comminfo.profitandloss(position.size, position.price,
+                                             pclose)
+        self._posvals[data] = (inputs, dvalue, dunrealized)
+        return dvalue, dunrealized
+
     def _get_value(self, datas=None, lever=False):
         pos_value = 0.0
         pos_value_unlever = 0.0
@@ -429,17 +592,9 @@ class BackBroker(bt.BrokerBase):
             self._fundshares += c / self._fundval
             self.cash += c
 
-        for data in datas or self.positions:
+        for data in datas or self._openpositions():
             comminfo = self.getcommissioninfo(data)
-            position = self.positions[data]
-            # use valuesize:  returns raw value, rather than negative adj val
-            if not self.p.shortcash:
-                dvalue = comminfo.getvalue(position, data.close[0])
-            else:
-                dvalue = comminfo.getvaluesize(position.size, data.close[0])
-
-            dunrealized = comminfo.profitandloss(position.size, position.price,
-                                                 data.close[0])
+            dvalue, dunrealized = self._posvalue(data, comminfo)
             if datas and len(datas) == 1:
                 if lever and dvalue > 0:
                     dvalue -= dunrealized
@@ -498,9 +653,9 @@ class BackBroker(bt.BrokerBase):
         If order manipulation is needed, set the parameter ``safe`` to True
         '''
         if safe:
-            os = [x.clone() for x in self.pending]
+            os = [x.clone() for x in self._pordered()]
         else:
-            os = [x for x in self.pending]
+            os = self._pordered()
 
         return os
 
@@ -586,7 +741,7 @@ class BackBroker(bt.BrokerBase):
         order.pannotated = None
         order.submit()
         order.accept()
-        self.pending.append(order)
+        self._padd(order)
         self.notify(order)
 
     def _bracketize(self, order, cancel=False):
@@ -597,12 +752,12 @@ class BackBroker(bt.BrokerBase):
         pc = self._pchildren[pref]  # defdict - guaranteed
         if cancel or not parent:  # cancel left or child exec -> cancel other
             while pc:
-                self.cancel(pc.popleft(), bracket=True)  # idempotent
+                self.cancel(pc.pop(0), bracket=True)  # idempotent
 
             del self._pchildren[pref]  # defdict guaranteed
 
         else:  # not cancel -> parent exec'd
-            pc.popleft()  # remove parent
+            pc.pop(0)  # remove parent
             for o in pc:  # activate childnre
                 self._toactivate.append(o)
 
@@ -612,12 +767,12 @@ class BackBroker(bt.BrokerBase):
         ocoref = self._ocos.get(parentref, None)
         ocol = self._ocol.pop(ocoref, None)
         if ocol:
-            for i in range(len(self.pending) - 1, -1, -1):
-                o = self.pending[i]
-                if o is not None and o.ref in ocol:
-                    del self.pending[i]
-                    o.cancel()
-                    self.notify(o)
+            pending = self.pending
+            os = [pending[ref] for ref in ocol if ref in pending]
+            for o in sorted(os, key=self._pseqof, reverse=True):
+                self._premove(o)
+                o.cancel()
+                self.notify(o)
 
     def _ocoize(self, order, oco):
         oref = order.ref
@@ -820,6 +975,7 @@ class BackBroker(bt.BrokerBase):
 
             # do a real position update if something was executed
             position.update(execsize, price, data.datetime.datetime())
+            self._posdirty = True
 
             if closed and self.p.int2pnl:  # Assign accumulated interest data
                 closedcomm += self.d_credit.pop(data, 0.0)
@@ -1037,9 +1193,7 @@ class BackBroker(bt.BrokerBase):
 
         return None  # no price can be returned
 
-    def _try_exec(self, order):
-        data = order.data
-
+    def _barprices(self, data):
         popen = getattr(data, 'tick_open', None)
         if popen is None:
             popen = data.open[0]
@@ -1053,6 +1207,11 @@ class BackBroker(bt.BrokerBase):
         if pclose is None:
             pclose = data.close[0]
 
+        return popen, phigh, plow, pclose
+
+    def _try_exec(self, order):
+        popen, phigh, plow, pclose = self._barprices(order.data)
+
         pcreated = order.created.price
         plimit = order.created.pricelimit
 
@@ -1173,62 +1332,72 @@ class BackBroker(bt.BrokerBase):
                 # update to next potential order
                 uhist[0] = uhorder = next(uhorders, None)
 
-    def next(self):
-        while self._toactivate:
-            self._toactivate.popleft().activate()
-
-        if self.p.checksubmit:
-            self.check_submitted()
-
-        # Discount any cash for positions hold
-        credit = 0.0
-        for data, pos in self.positions.items():
-            if pos:
-                comminfo = self.getcommissioninfo(data)
-                dt0 = data.datetime.datetime()
-                dcredit = comminfo.get_credit_interest(data, pos, dt0)
-                self.d_credit[data] += dcredit
-                credit += dcredit
-                pos.datetime = dt0  # mark last credit operation
-
-        self.cash -= credit
-
-        self._process_order_history()
-
-        # Iterate once over all elements of the pending queue
-        self.pending.append(None)
-        while True:
-            order = self.pending.popleft()
+    def _process_pending(self):
+        # Visit (in acceptance order) only the pending orders which can do
+        # something in this bar: the others cannot be executed or expire
+        visit = dict()
+        for data, book in self._pbooks.items():
+            if book:
+                visit.update(book.visit(data.datetime[0],
+                                        *self._barprices(data)[:3]))
+
+        for seq in sorted(visit):
+            order = self.pending.get(visit[seq])
             if order is None:
-                break
+                continue  # cancelled by the execution of a previous order
 
+            self._premove(order)
             if order.expire():
                 self.notify(order)
                 self._ococheck(order)
                 self._bracketize(order, cancel=True)
 
             elif not order.active():
-                self.pending.append(order)  # cannot yet be processed
+                self._padd(order, seq)  # cannot yet be processed
 
             else:
                 self._try_exec(order)
                 if order.alive():
-                    self.pending.append(order)
+                    self._padd(order, seq)  # trigger price may have changed
 
                 elif order.status == Order.Completed:
                     # a bracket parent order may have been executed
                     self._bracketize(order)
 
+    def next(self):
+        while self._toactivate:
+            self._toactivate.popleft().activate()
+
+        if self.p.checksubmit:
+            self.check_submitted()
+
+        # Discount any cash for positions hold
+        credit = 0.0
+        for data in self._openpositions():
+            pos = self.positions[data]
+            comminfo = self.getcommissioninfo(data)
+            dt0 = data.datetime.datetime()
+            dcredit = comminfo.get_credit_interest(data, pos, dt0)
+            self.d_credit[data] += dcredit
+            credit += dcredit
+            pos.datetime = dt0  # mark last credit operation
+
+        self.cash -= credit
+
+        self._process_order_history()
+
+        self._process_pending()
+
         # Operations have been executed ... adjust cash end of bar
-        for data, pos in self.positions.items():
+        for data in self._openpositions():
             # futures change cash every bar
-            if pos:
-                comminfo = self.getcommissioninfo(data)
-                self.cash += comminfo.cashadjust(pos.size,
-                                                 pos.adjbase,
-                                                 data.close[0])
-                # record the last adjustment price
-                pos.adjbase = data.close[0]
+            pos = self.positions[data]
+            comminfo = self.getcommissioninfo(data)
+            self.cash += comminfo.cashadjust(pos.size,
+                                             pos.adjbase,
+                                             data.close[0])
+            # record the last adjustment price
+            pos.adjbase = data.close[0]
 
         self._get_value()  # update value
 
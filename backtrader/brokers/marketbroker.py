@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import collections
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import backtrader as bt
+from backtrader.comminfo import CommInfoBase
+from backtrader.order import Order
+
+from .bbroker import BackBroker
+
+__all__ = ['MarketBroker']
+
+
+# methods of the commission schemes whose arithmetic is done in the batches
+_BATCHCOMM = ('_getcommission', 'getcommission', 'confirmexec',
+              'getoperationcost', 'getvaluesize', 'profitandloss',
+              'cashadjust', 'get_leverage')
+
+
+class MarketBroker(BackBroker):
+    '''Broker Simulator for backtests which only use ``Market`` orders
+
+      Orders of other types, and orders with a parent or children
+      (brackets), are rejected. The executions are those of ``BackBroker``
+      (same prices, slippage, cash checks, cheat-on-close/open and
+      commission schemes). The gains come from:
+
+        - The market orders of a bar are executed in a single batch: the
+          sizes and prices of the positions and the parameters of the
+          commission schemes are kept in NumPy arrays and the cash checks
+          of the submission, the closed/opened sizes, the commissions, the
+          pnl and the cash after each order are calculated for all orders
+          at once. The cash is accumulated (``cumsum``) in the order of
+          acceptance, with the same operations as ``BackBroker``, and the
+          results are identical
+
+          A bar is only batched if the orders are for different datas with
+          stocklike ``CommInfoBase`` schemes, the executions are at the
+          ``open`` price (no ``coc``, ``coo``, ``filler`` or slippage on
+          open) and no order lacks cash. Else, and without NumPy, the
+          orders are executed one by one with the code of ``BackBroker``
+
+        - The orders waiting for execution are kept in a queue (acceptance
+          order), without the price indexing needed by limit and stop
+          orders
+
+        - The notifications without executions (submitted, accepted,
+          cancelled ...) are only made if something listens to them (see the
+          ``notify`` param). Creating them (a clone of the order for each
+          one) is one of the largest costs of the broker when many orders are
+          issued
+
+      Params:
+
+        - ``notify`` (default: ``None``): ``True``/``False`` forces making or
+          skipping the notifications. With ``None`` they are only made if a
+          strategy overrides ``notify_order``, an analyzer overrides
+          ``notify_order`` or an observer other than those of backtrader
+          (which only look at the executions) is present
+
+          The notifications of the executions are always made: the trades
+          of the strategies (and ``notify_trade``, the trade analyzers and
+          the trade ledger) are built from them. Rejected orders and orders
+          without cash (``Margin``) are also always notified. The orders
+          returned by ``buy``/``sell`` are updated as usual
+
+        - ``batch`` (default: ``True``): execute the orders of a bar in
+          batches when possible. ``False`` executes them always one by one
+    '''
+    params = (
+        ('notify', None),
+        ('batch', True),
+    )
+
+    def init(self):
+        super(MarketBroker, self).init()
+        self._mktqueue = collections.deque()  # pending in acceptance order
+        self._mktseq = dict()  # ref -> acceptance sequence number
+        self._listening = self.p.notify
+
+        self._vidx = None  # data -> index in the arrays
+        self._vcomm = None  # comminfo dict the commission arrays come from
+        self._vsync = False  # position arrays match the positions
+
+    def submit(self, order, check=True):
+        if order.exectype != Order.Market or order.parent is not None or \
+           not order.transmit:
+            order.reject()
+            self.notify(order)
+            return order
+
+        return super(MarketBroker, self).submit(order, check=check)
+
+    def notify(self, order):
+        if self._listening is None:
+            self._listening = self._haslisteners()
+
+        # the executions are always delivered, the trades are made of them
+        if self._listening or \
+           order.status in (Order.Rejected, Order.Margin) or \
+           len(order.executed.exbits) > order.executed.p2:
+            super(MarketBroker, self).notify(order)
+
+    def _haslisteners(self):
+        # evaluated with the 1st notification, once the strategies exist
+        for strat in self.cerebro.runningstrats:
+            if type(strat).notify_order is not bt.Strategy.notify_order:
+                return True
+
+            for analyzer in strat.analyzers:
+                if type(analyzer).notify_order is not bt.Analyzer.notify_order:
+                    return True
+
+            for observer in strat.observers:
+                # the observers of backtrader only look at the executions
+                if not type(observer).__module__.startswith(
+                        'backtrader.observers'):
+                    return True
+
+        return False
+
+    def _execute(self, order, ago=None, price=None, cash=None, position=None,
+                 dtcoc=None):
+        if ago is not None:
+            self._vsync = False  # a position changed outside of a batch
+
+        return super(MarketBroker, self)._execute(
+            order, ago=ago, price=price, cash=cash, position=position,
+            dtcoc=dtcoc)
+
+    def _padd(self, order, seq=None):
+        if seq is None:
+            seq = next(self._pseq)
+
+        self.pending[order.ref] = order
+        self._mktseq[order.ref] = seq
+        self._mktqueue.append(order)
+
+    def _premove(self, order):
+        del self.pending[order.ref]
+        del self._mktseq[order.ref]
+        try:
+            self._mktqueue.remove(order)  # cancellation: rare, short queue
+        except ValueError:
+            pass  # in the pass of _process_pending
+
+    def _pseqof(self, order):
+        # not the position in the queue: it is swapped out while executing
+        return self._mktseq[order.ref]
+
+    def _batchable(self):
+        p = self.p
+        return p.batch and np is not None and \
+            not (p.coc or p.coo or p.filler is not None or
+                 (p.slip_open and (p.slip_perc or p.slip_fixed)))
+
+    def _varrays(self):
+        # index of the datas, commission parameters and positions as arrays
+        if self._vidx is None:
+            datas = self.cerebro.datas
+            self._vidx = dict((data, i) for i, data in enumerate(datas))
+            self._vdatas = list(datas)
+
+        if self._vcomm != self.comminfo:  # a scheme has been set
+            self._vcomm = dict(self.comminfo)
+            cinfos = [self.getcommissioninfo(d) for d in self._vdatas]
+            self._vcinfos = cinfos
+            self._vcommok = np.array([
+                isinstance(c, CommInfoBase) and bool(c._stocklike) and
+                all(getattr(type(c), m) is getattr(CommInfoBase, m)
+                    for m in _BATCHCOMM)
+                for c in cinfos], dtype=bool)
+            self._vrate = np.array([c.p.commission for c in cinfos],
+                                   dtype=np.float64)
+            self._vperc = np.array([c._commtype == c.COMM_PERC
+                                    for c in cinfos], dtype=bool)
+            self._vmult = np.array([c.p.mult for c in cinfos],
+                                   dtype=np.float64)
+            self._vlever = np.array([c.p.leverage for c in cinfos],
+                                    dtype=np.float64)
+
+        if not self._vsync:
+            positions = [self.positions.get(d) for d in self._vdatas]
+            self._vsize = np.array([pos.size if pos is not None else 0
+                                    for pos in positions])
+            self._vprice = np.array([pos.price if pos is not None else 0.0
+                                     for pos in positions], dtype=np.float64)
+            self._vsync = True
+
+        return self._vidx
+
+    def _batchexec(self, orders, prices, pseudo=False):
+        '''Executes the orders (one per data) in a single step with the
+        arithmetic of ``BackBroker._execute``. With ``pseudo`` the cash check
+        of the submission is done (price and cost of the position are those
+        of the creation of the order)
+
+        Returns a list of per order lists (closed, opened, closedvalue,
+        closedcomm, openedvalue, openedcomm, pnl, size, price of the
+        position) and the final cash or ``None`` if the orders cannot be
+        batched or one of them lacks cash'''
+        vidx = self._varrays()
+        try:
+            idx = np.array([vidx[order.data] for order in orders], dtype=int)
+            price = np.array(prices, dtype=np.float64)
+        except (KeyError, TypeError, ValueError):
+            return None  # unknown data or no usable price
+
+        size = np.array([order.executed.remsize for order in orders])
+        psize0 = self._vsize[idx]
+        if size.dtype.kind != 'i' or psize0.dtype.kind != 'i' or \
+           not size.all() or np.isnan(price).any() or \
+           len(np.unique(idx)) != len(idx) or not self._vcommok[idx].all():
+            return None
+
+        pprice0 = self._vprice[idx]
+        rate, mult, lever = self._vrate[idx], self._vmult[idx], \
+            self._vlever[idx]
+
+        # Position.update: part of size closing and part opening
+        psize = psize0 + size
+        reduces = (psize0 != 0) & (np.sign(size) != np.sign(psize0))
+        reverses = reduces & (psize != 0) & \
+            (np.sign(psize) != np.sign(psize0))
+        closed = np.where(reverses, -psize0, np.where(reduces, size, 0))
+        opened = size - closed
+        with np.errstate(divide='ignore', invalid='ignore'):
+            incprice = (pprice0 * psize0 + size * price) / psize
+
+        pprice = np.where(
+            psize == 0, 0.0,
+            np.where(reduces & ~reverses, pprice0,
+                     np.where(reduces | (psize0 == 0), price, incprice)))
+
+        if pseudo:
+            pnl = np.zeros(len(orders))
+            pcost = price  # the closed part is valued at the order price
+        else:
+            pnl = -closed * (price - pprice0) * mult
+            pcost = pprice0
+
+        absclosed, absopened = np.abs(closed), np.abs(opened)
+        if self.p.shortcash:
+            closedvalue = -closed * pcost
+            openedvalue = opened * price
+        else:
+            closedvalue = absclosed * pcost
+            openedvalue = absopened * price
+
+        perc = self._vperc[idx]
+        closedcomm = np.where(perc, absclosed * rate * price,
+                              absclosed * rate)
+        openedcomm = np.where(perc, absopened * rate * price,
+                              absopened * rate)
+
+        closecash = np.where(closedvalue > 0, closedvalue / lever,
+                             closedvalue)
+        opencash = np.where(openedvalue > 0, openedvalue / lever,
+                            openedvalue)
+
+        # cash operations in the order of BackBroker, accumulated in order
+        ops = np.empty(4 * len(orders) + 1)
+        ops[0] = self.cash
+        ops[1::4] = closecash + pnl
+        ops[2::4] = -closedcomm
+        ops[3::4] = -opencash
+        ops[4::4] = -openedcomm
+        cash = np.cumsum(ops)[4::4]  # cash after each order
+
+        if pseudo:
+            if (cash < 0.0).any():
+                return None
+        elif ((opened != 0) & (cash < 0.0)).any():
+            return None
+
+        if not pseudo:
+            self._vsize[idx] = psize
+            self._vprice[idx] = pprice
+
+        isclosed, isopened = closed != 0, opened != 0
+        execs = list(zip(
+            closed.tolist(), opened.tolist(),
+            np.where(isclosed, closedvalue, 0.0).tolist(),
+            np.where(isclosed, closedcomm, 0.0).tolist(),
+            np.where(isopened, openedvalue, 0.0).tolist(),
+            np.where(isopened, openedcomm, 0.0).tolist(),
+            pnl.tolist(), psize.tolist(), pprice.tolist()))
+
+        return execs, float(cash[-1])
+
+    def check_submitted(self):
+        if self.submitted and self._batchable():
+            orders = list(self.submitted)
+            for order in orders:
+                self.positions[order.data]  # created in the same order
+                if order.parent is not None or \
+                   order.data._compensate is not None:
+                    break
+            else:
+                ex = self._batchexec(
+                    orders, [order.created.price for order in orders],
+                    pseudo=True)
+                if ex is not None:  # all orders have cash
+                    self.submitted.clear()
+                    for order in orders:
+                        self.submit_accept(order)
+                    return
+
+        super(MarketBroker, self).check_submitted()
+
+    def _process_pending(self):
+        queue, self._mktqueue = self._mktqueue, collections.deque()
+        if self._batchable() and self._process_batch(queue):
+            return
+
+        pending = self.pending
+        for order in queue:
+            if order.ref not in pending:
+                continue  # cancelled by the execution of a previous order
+
+            del pending[order.ref]
+            popen, phigh, plow, _ = self._barprices(order.data)
+            self._try_exec_market(order, popen, phigh, plow)
+            if order.alive():  # not yet executable or partially executed
+                pending[order.ref] = order
+                self._mktqueue.append(order)
+
+            else:
+                del self._mktseq[order.ref]
+                if order.status == Order.Completed:
+                    self._bracketize(order)  # releases the parent/children
+
+    def _process_batch(self, queue):
+        # Executes the orders of the queue in a batch. Returns False, with
+        # nothing done, if they cannot be batched
+        pending = self.pending
+        orders, prices, waiting = list(), list(), list()
+        for order in queue:
+            if order.ref not in pending:
+                continue
+
+            data = order.data
+            if data.datetime[0] <= order.created.dt:
+                waiting.append(order)  # can only execute after creation
+                continue
+
+            if data._compensate is not None or not self._ocoalone(order):
+                return False
+
+            orders.append(order)
+            prices.append(self._barprices(data)[0])
+
+        if orders:
+            for order in orders:
+                self.positions[order.data]  # created in the same order
+
+            batch = self._batchexec(orders, prices)
+            if batch is None:
+                return False
+
+            execs, self.cash = batch
+            cinfos = self._vcinfos
+            vidx = self._vidx
+            for order, price, ex in zip(orders, prices, execs):
+                closed, opened, cvalue, ccomm, ovalue, ocomm, pnl, \
+                    psize, pprice = ex
+
+                del pending[order.ref]
+                del self._mktseq[order.ref]
+
+                data = order.data
+                position = self.positions[data]
+                position.datetime = data.datetime.datetime()
+                position.price_orig = position.price
+                position.size, position.price = psize, pprice
+                position.upopened, position.upclosed = opened, closed
+                if opened:
+                    position.adjbase = price
+
+                if closed and self.p.int2pnl:  # accumulated interest
+                    ccomm += self.d_credit.pop(data, 0.0)
+
+                comminfo = cinfos[vidx[data]]
+                order.execute(data.datetime[0], closed + opened, price,
+                              closed, cvalue, ccomm,
+                              opened, ovalue, ocomm,
+                              comminfo.margin, pnl,
+                              psize, pprice)
+                order.addcomminfo(comminfo)
+
+                self.notify(order)
+                self._ococheck(order)
+                self._bracketize(order)  # releases the parent/children
+
+            self._posdirty = True
+
+        self._mktqueue.extend(waiting)
+        return True
+
+    def _ocoalone(self, order):
+        # no other pending order is cancelled by the execution of order
+        ocoref = self._ocos.get(self._ocos.get(order.ref))
+        return all(ref == order.ref or ref not in self.pending
+                   for ref in self._ocol.get(ocoref, ()))
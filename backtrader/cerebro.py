@@ -25,6 +25,13 @@ import datetime
 import collections
 import itertools
 import multiprocessing
+import os
+import warnings
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 try:  # For new Python versions
     collectionsAbc = collections.abc  # collections.Iterable -> collections.abc.Iterable
@@ -57,6 +64,127 @@ class OptReturn(object):
             setattr(self, k, v)
 
 
+class OptResult(object):
+    '''Compact result of a strategy run during an optimization, returned
+    instead of ``OptReturn`` if the ``optmetrics`` parameter of ``Cerebro`` is
+    set. The analyzers have already been evaluated in the worker process.
+
+    Attributes:
+
+      - ``strategycls``: class of the strategy
+      - ``params``: tuple with the values of the parameters of the strategy
+      - ``names``: tuple with the paths of the metrics
+      - ``metrics``: tuple with the values (``float``) of the metrics. Metrics
+        which could not be found or converted are ``nan``
+      - ``pruned``: ``True`` if the run was stopped by a progress callback
+        (see ``addprogresscb``)
+    '''
+    __slots__ = ('strategycls', 'params', 'names', 'metrics', 'pruned')
+
+    def __init__(self, strategycls, params, names, metrics, pruned=False):
+        self.strategycls = strategycls
+        self.params = params
+        self.names = names
+        self.metrics = metrics
+        self.pruned = pruned
+
+    def getparams(self):
+        '''Returns an OrderedDict with the names and values of the params'''
+        return OrderedDict(zip(self.strategycls.params._getkeys(),
+                               self.params))
+
+    def getmetrics(self):
+        '''Returns an OrderedDict with the paths and values of the metrics'''
+        return OrderedDict(zip(self.names, self.metrics))
+
+    def __getitem__(self, name):
+        return self.metrics[self.names.index(name)]
+
+    @classmethod
+    def fromstrategy(cls, strat, paths=None):
+        '''Creates the result extracting the metrics indicated by ``paths``
+        (iterable of ``'analyzername.key.subkey'``) from the analyzers of the
+        strategy. If ``paths`` is ``None`` all numeric values are extracted'''
+        if paths is None:
+            names, metrics = list(), list()
+            for aname, analyzer in strat.analyzers.getitems():
+                _flatmetrics(analyzer.get_analysis(), aname, names, metrics)
+        else:
+            names = list(paths)
+            metrics = [_getmetric(strat.analyzers, name) for name in names]
+
+        return cls(type(strat), tuple(strat.params._getvalues()),
+                   tuple(names), tuple(metrics), strat.pruned)
+
+
+def _getmetric(analyzers, path):
+    aname, _, path = path.partition('.')
+    try:
+        analysis = analyzers.getbyname(aname).get_analysis()
+    except ValueError:
+        return float('nan')
+
+    for key in path.split('.') if path else []:
+        # keys are matched by their string form (datetimes, years, ...) and
+        # without indexing, because AutoDicts create missing keys
+        try:
+            analysis = next(v for k, v in analysis.items() if str(k) == key)
+        except (AttributeError, StopIteration):
+            return float('nan')
+
+    try:
+        return float(analysis)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def _flatmetrics(analysis, path, names, metrics):
+    if hasattr(analysis, 'items'):
+        for key, val in analysis.items():
+            _flatmetrics(val, '%s.%s' % (path, key), names, metrics)
+
+    elif isinstance(analysis, (integer_types, float)):
+        names.append(path)
+        metrics.append(float(analysis))
+
+
+# Estimated memory of an optimization worker process: interpreter overhead and
+# lines created during a run (indicators, observers, ...) as a multiple of the
+# footprint of the datas
+_WORKERMEM = 2 ** 26
+_WORKERLINES = 4
+
+
+def _availmem():
+    '''Returns the available memory of the system in bytes or ``None``'''
+    if psutil is not None:
+        return psutil.virtual_memory().available
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024  # in kB
+    except (IOError, OSError, ValueError):
+        pass
+
+    return None
+
+
+# Worker side of optimizations with shared datas. The cerebro instance is sent
+# once to each worker process with the pool initializer and not with each task
+_optcerebro = None
+
+
+def _optinit(cerebro):
+    global _optcerebro
+    _optcerebro = cerebro
+
+
+def _optrun(iterstrat):
+    return _optcerebro(iterstrat)
+
+
 class Cerebro(with_metaclass(MetaParams, object)):
     '''Params:
 
@@ -86,6 +214,17 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
          How many cores to use simultaneously for optimization
 
+         Possible values:
+
+           - ``None``, ``True`` or ``'auto'``: all available cores
+
+           - an ``int``: the number of worker processes (``1`` runs the
+             optimization in the main process)
+
+           - ``'adaptive'``: all available cores, but no more worker
+             processes than fit in the available memory of the system (see
+             ``optworkermem``)
+
       - ``stdstats`` (default: ``True``)
 
         If True default Observers will be added: Broker (Cash and Value),
@@ -175,6 +314,35 @@ class Cerebro(with_metaclass(MetaParams, object)):
         Corner cases may happen in which this drives a line object off its
         minimum period and breaks things and it is therefore disabled.
 
+      - ``indcache`` (default: ``False``)
+
+        If ``True`` the values calculated by indicators in ``runonce`` mode
+        are kept in a cache which lives across runs in the same process (see
+        ``IndicatorCache`` in ``backtrader.indicator``). The key is made up of
+        the indicator class, the values of its parameters and the identity of
+        its inputs (the contents of the data feeds)
+
+        During optimization each worker process keeps its own cache and
+        combinations sharing indicators (for example the same moving average
+        in many combinations) calculate them only once
+
+        Indicators which support it (``Average``, ``SumN``, ``Highest``,
+        ``Lowest``, ``ExponentialSmoothing`` and the moving averages built on
+        them, which in turn are the foundation of for example ``RSI``,
+        ``BollingerBands``, ``ATR`` or ``Stochastic``) are calculated in a
+        single pass for all values of an optimized parameter which matches
+        their ``period``
+
+      - ``indcachesize`` (default: ``2 ** 28``)
+
+        Memory budget in bytes for ``indcache``. The least recently used
+        results are evicted when exceeded
+
+      - ``indcachedir`` (default: ``None``)
+
+        If not ``None``, a directory in which the results of ``indcache`` are
+        also stored, to be reused across processes and sessions
+
       - ``writer`` (default: ``False``)
 
         If set to ``True`` a default WriterFile will be created which will
@@ -187,6 +355,15 @@ class Cerebro(with_metaclass(MetaParams, object)):
         for all strategies. This can also be accomplished on a per strategy
         basis with the strategy method ``set_tradehistory``
 
+      - ``tradeledger`` (default: ``False``)
+
+        If set to ``True`` the closed trades of each strategy are recorded
+        in a ``TradeLedger`` (columnar arrays, see ``strategy.tradeledger``)
+        and the ``Trade`` objects are released once notified. If it is the
+        name of a directory, the rows are moved in blocks to a file in it
+        (one per strategy and process) to keep the memory bounded. See the
+        strategy method ``set_tradeledger``
+
       - ``optdatas`` (default: ``True``)
 
         If ``True`` and optimizing (and the system can ``preload`` and use
@@ -196,6 +373,57 @@ class Cerebro(with_metaclass(MetaParams, object)):
         The tests show an approximate ``20%`` speed-up moving from a sample
         execution in ``83`` seconds to ``66``
 
+      - ``optshm`` (default: ``False``)
+
+        If ``True`` and the datas are preloaded only once for an optimization
+        (see ``optdatas``) the lines of the datas are moved to shared memory
+        blocks (one per line). The worker processes attach to those blocks
+        (zero-copy, read-only) instead of receiving a pickled copy of the
+        datas, and ``cerebro`` itself is sent only once to each worker rather
+        than with each parameter combination.
+
+        This makes a difference with large datas and with the ``spawn`` start
+        method of ``multiprocessing``. Requires ``numpy`` and Python 3.8+
+
+        Notice that the lines of the datas in the workers are then ``numpy``
+        arrays, as with ``linestorage='numpy'``: their values are
+        ``numpy.float64`` instances and a division by zero returns
+        ``inf``/``nan`` (with a ``RuntimeWarning``) rather than raising
+        ``ZeroDivisionError``. Results may hence differ from runs without
+        ``optshm`` and a warning is issued if ``linestorage`` is not
+        ``'numpy'``
+
+      - ``optworkermem`` (default: ``None``)
+
+        Memory (in bytes) needed by each worker process of an optimization if
+        ``maxcpus`` is ``'adaptive'``. If ``None`` it is estimated from the
+        footprint of the datas preloaded in the main process (see
+        ``optdatas``): each worker receives a copy of them (unless ``optshm``
+        is in use) and creates lines (indicators, observers, ...) of the same
+        length. The available memory is read with ``psutil`` if installed or
+        else from ``/proc/meminfo``. If it cannot be determined all cores are
+        used
+
+      - ``optchunksize`` (default: ``1``)
+
+        Number of parameter combinations sent together to a worker process
+        during an optimization. Larger values reduce the inter-process
+        communication overhead for large grids of quick runs
+
+      - ``optordered`` (default: ``True``)
+
+        If ``True`` the results of an optimization are delivered (to the
+        callbacks added with ``optcallback`` and in the list returned by
+        ``run``) in the order of the parameter combinations. If ``False``
+        they are delivered as soon as each combination is done
+
+      - ``optkeep`` (default: ``True``)
+
+        If ``False`` the results of an optimization are only delivered to the
+        callbacks added with ``optcallback`` and not accumulated, keeping the
+        memory used by the main process flat. ``run`` returns then an empty
+        list
+
       - ``optreturn`` (default: ``True``)
 
         If ``True`` the optimization results will not be full ``Strategy``
@@ -214,6 +442,24 @@ class Cerebro(with_metaclass(MetaParams, object)):
         with ``optdatas`` the total gain increases to a total speed-up of
         ``32%`` in an optimization run.
 
+      - ``optmetrics`` (default: ``None``)
+
+        If set, the results of an optimization are compact ``OptResult``
+        records (see ``backtrader.cerebro.OptResult``) instead of analyzers
+        and *params*. The analysis of the analyzers is done in the worker
+        process and only the params values and the selected metrics (as
+        ``float``) are sent back, reducing the communication overhead by
+        orders of magnitude.
+
+        Possible values:
+
+          - ``True``: all numeric values in the analysis of all analyzers are
+            extracted
+
+          - an iterable with metric paths in the form
+            ``'analyzername.key.subkey'``, like for example
+            ``['drawdown.max.drawdown', 'tradeanalyzer.pnl.net.total']``
+
       - ``oldsync`` (default: ``False``)
 
         Starting with release 1.9.0.99 the synchronization of multiple datas
@@ -269,6 +515,20 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
         Set to ``False`` for compatibility. May be changed to ``True``
 
+      - ``linestorage`` (default: ``None``)
+
+        Storage used for the unbounded buffers of lines. ``None`` uses the
+        standard ``array.array`` storage.
+
+        With ``'numpy'`` buffers are preallocated ``numpy.ndarray`` instances
+        (sized after the length of the preloaded datas) and the ``array``
+        attribute of each line is a zero-copy view of it, which can be
+        directly used by vectorized calculations. Requires ``numpy``
+
+        Notice that values fetched from the lines will then be
+        ``numpy.float64`` instances, for which a division by zero returns
+        ``inf``/``nan`` rather than raising ``ZeroDivisionError``
+
     '''
 
     params = (
@@ -281,16 +541,27 @@ class Cerebro(with_metaclass(MetaParams, object)):
         ('lookahead', 0),
         ('exactbars', False),
         ('optdatas', True),
+        ('optshm', False),
+        ('optworkermem', None),
+        ('optchunksize', 1),
+        ('optordered', True),
+        ('optkeep', True),
         ('optreturn', True),
+        ('optmetrics', None),
         ('objcache', False),
+        ('indcache', False),
+        ('indcachesize', 2 ** 28),
+        ('indcachedir', None),
         ('live', False),
         ('writer', False),
         ('tradehistory', False),
+        ('tradeledger', False),
         ('oldsync', False),
         ('tz', None),
         ('cheat_on_open', False),
         ('broker_coo', True),
         ('quicknotify', False),
+        ('linestorage', None),
     )
 
     def __init__(self):
@@ -303,6 +574,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
         self.datasbyname = collections.OrderedDict()
         self.strats = list()
         self.optcbs = list()  # holds a list of callbacks for opt strategies
+        self.progresscbs = list()  # callbacks invoked during the run
+        self._ledgerids = itertools.count()  # names of the ledger files
+        self._optvalues = list()  # names and values of optimized params
         self.observers = list()
         self.analyzers = list()
         self.indicators = list()
@@ -853,9 +1127,38 @@ class Cerebro(with_metaclass(MetaParams, object)):
         optimizations when each of the strategies has been run
 
         The signature: cb(strategy)
+
+        See the parameters ``optordered`` and ``optkeep`` to receive the
+        results as soon as they are available and not accumulate them
         '''
         self.optcbs.append(cb)
 
+    def addprogresscb(self, callback, interval=100):
+        '''
+        Adds a *callback* which is invoked every ``interval`` bars during the
+        run for each running strategy, to check intermediate results (broker
+        value, analyzers, ...)
+
+        The signature: callback(strategy)
+
+        If the callback returns ``True`` the run is stopped (see ``runstop``)
+        and the strategies are stopped as usual, i.e.: the analyzers hold the
+        results calculated so far. The strategy which triggered the stop has
+        its attribute ``pruned`` set to ``True``
+
+        During an optimization only the run of the combination is stopped,
+        and the rest of combinations continue to be run. The callbacks are
+        invoked in the worker processes and have to be picklable (like for
+        example module level functions) if ``maxcpus`` is not ``1``
+
+        ``interval`` has to be at least ``1``
+        '''
+        if interval < 1:
+            raise ValueError('The interval of a progress callback has to be '
+                             'at least 1, not %s' % interval)
+
+        self.progresscbs.append((callback, interval))
+
     def optstrategy(self, strategy, *args, **kwargs):
         '''
         Adds a ``Strategy`` class to the mix for optimization. Instantiation
@@ -890,14 +1193,17 @@ class Cerebro(with_metaclass(MetaParams, object)):
         and will create an internal pseudo-iterable if possible
         '''
         self._dooptimize = True
-        args = self.iterize(args)
+        args = [list(x) for x in self.iterize(args)]
         optargs = itertools.product(*args)
 
         optkeys = list(kwargs)
 
-        vals = self.iterize(kwargs.values())
+        vals = [list(x) for x in self.iterize(kwargs.values())]
         optvals = itertools.product(*vals)
 
+        # values taken by the optimized params (for batch calculations)
+        self._optvalues.extend(zip(optkeys, vals))
+
         okwargs1 = map(zip, itertools.repeat(optkeys), optvals)
 
         optkwargs = map(dict, okwargs1)
@@ -1014,12 +1320,14 @@ class Cerebro(with_metaclass(MetaParams, object)):
     def __getstate__(self):
         '''
         Used during optimization to prevent optimization result `runstrats`
-        from being pickled to subprocesses
+        and the callbacks, which are only invoked in the main process, from
+        being pickled to subprocesses
         '''
 
         rv = vars(self).copy()
         if 'runstrats' in rv:
             del(rv['runstrats'])
+        rv['optcbs'] = list()
         return rv
 
     def runstop(self):
@@ -1040,7 +1348,8 @@ class Cerebro(with_metaclass(MetaParams, object)):
             classes added with ``addstrategy``
 
           - For Optimization: a list of lists which contain instances of the
-            Strategy classes added with ``addstrategy``
+            Strategy classes added with ``addstrategy`` (empty if ``optkeep``
+            is ``False``)
         '''
         self._event_stop = False  # Stop is requested
 
@@ -1059,6 +1368,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
         linebuffer.LineActions.usecache(self.p.objcache)
         indicator.Indicator.usecache(self.p.objcache)
 
+        # Storage for the lines (re)created from now on
+        linebuffer.LineBuffer.usestorage(self.p.linestorage)
+
         self._dorunonce = self.p.runonce
         self._dopreload = self.p.preload
         self._exactbars = int(self.p.exactbars)
@@ -1124,18 +1436,26 @@ class Cerebro(with_metaclass(MetaParams, object)):
         if not self.strats:  # Datas are present, add a strategy
             self.addstrategy(Strategy)
 
+        maxcpus = self.p.maxcpus
+        if maxcpus is True or maxcpus == 'auto':
+            maxcpus = None  # True == 1 and would disable multiprocessing
+        elif isinstance(maxcpus, string_types) and maxcpus != 'adaptive':
+            raise ValueError('Unknown maxcpus value: %s' % maxcpus)
+
         iterstrats = itertools.product(*self.strats)
-        if not self._dooptimize or self.p.maxcpus == 1:
+        if not self._dooptimize or maxcpus == 1:
             # If no optimmization is wished ... or 1 core is to be used
             # let's skip process "spawning"
             for iterstrat in iterstrats:
                 runstrat = self.runstrategies(iterstrat)
-                self.runstrats.append(runstrat)
+                if not self._dooptimize or self.p.optkeep:
+                    self.runstrats.append(runstrat)
                 if self._dooptimize:
                     for cb in self.optcbs:
                         cb(runstrat)  # callback receives finished strategy
         else:
-            if self.p.optdatas and self._dopreload and self._dorunonce:
+            optdatas = self.p.optdatas and self._dopreload and self._dorunonce
+            if optdatas:
                 for data in self.datas:
                     data.reset()
                     if self._exactbars < 1:  # datas can be full length
@@ -1144,15 +1464,51 @@ class Cerebro(with_metaclass(MetaParams, object)):
                     if self._dopreload:
                         data.preload()
 
-            pool = multiprocessing.Pool(self.p.maxcpus or None)
-            for r in pool.imap(self, iterstrats):
-                self.runstrats.append(r)
-                for cb in self.optcbs:
-                    cb(r)  # callback receives finished strategy
+            optshm = optdatas and self.p.optshm
+            if optshm and self.p.linestorage != 'numpy':
+                warnings.warn('optshm gives numpy lines to the workers: '
+                              'values are numpy.float64 and a division by '
+                              'zero gives inf/nan instead of raising. Use '
+                              'linestorage="numpy" to have the same in all '
+                              'runs', RuntimeWarning)
+            if maxcpus == 'adaptive':
+                maxcpus = self._optworkers(optdatas, optshm)
 
-            pool.close()
+            try:
+                if optshm:
+                    for data in self.datas:
+                        for line in data.lines:
+                            line.shmshare()
+
+                    pool = multiprocessing.Pool(maxcpus or None,
+                                                initializer=_optinit,
+                                                initargs=(self,))
+                    poolrun = _optrun
+                else:
+                    pool = multiprocessing.Pool(maxcpus or None)
+                    poolrun = self
+
+                if self.p.optordered:
+                    poolmap = pool.imap
+                else:
+                    poolmap = pool.imap_unordered
 
-            if self.p.optdatas and self._dopreload and self._dorunonce:
+                for r in poolmap(poolrun, iterstrats, self.p.optchunksize):
+                    if self.p.optkeep:
+                        self.runstrats.append(r)
+                    for cb in self.optcbs:
+                        cb(r)  # callback receives finished strategy
+
+                pool.close()
+                if optshm:
+                    pool.join()  # workers must be gone before releasing
+            finally:
+                if optshm:
+                    for data in self.datas:
+                        for line in data.lines:
+                            line.shmrelease()
+
+            if optdatas:
                 for data in self.datas:
                     data.stop()
 
@@ -1162,12 +1518,45 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
         return self.runstrats
 
+    def _optworkers(self, optdatas, optshm):
+        '''
+        Returns the number of worker processes for an optimization which fit
+        in the available memory
+        '''
+        ncpus = multiprocessing.cpu_count()
+        availmem = _availmem()
+        if availmem is None:
+            return ncpus
+
+        workermem = self.p.optworkermem
+        if workermem is None:
+            datamem = 0
+            if optdatas:  # else each worker loads them (unknown size)
+                datamem = sum(len(line.array) * line.array.itemsize
+                              for data in self.datas for line in data.lines)
+
+            # per process overhead + lines created by the run + copy of the
+            # datas (not with shared memory)
+            workermem = _WORKERMEM + datamem * (_WORKERLINES + (not optshm))
+
+        return max(1, min(ncpus, availmem // workermem))
+
     def _init_stcount(self):
         self.stcount = itertools.count(0)
 
     def _next_stid(self):
         return next(self.stcount)
 
+    def _tradeledger(self):
+        ledger = self.p.tradeledger
+        if not isinstance(ledger, string_types):
+            return bt.TradeLedger()
+
+        # optimization workers run several strategies in several processes
+        path = os.path.join(ledger, 'trades-%d-%d.bin' %
+                            (os.getpid(), next(self._ledgerids)))
+        return bt.TradeLedger(path=path)
+
     def runstrategies(self, iterstrat, predata=False):
         '''
         Internal method invoked by ``run``` to run a set of strategies
@@ -1216,6 +1605,21 @@ class Cerebro(with_metaclass(MetaParams, object)):
                 if self._dopreload:
                     data.preload()
 
+        self._runbars = 0  # bars run (for the progress callbacks)
+
+        if self._dopreload:
+            # lines created from now on can be preallocated to the data length
+            linebuffer.LineBuffer.sizehint(max(d.buflen() for d in self.datas))
+
+        rcache = None
+        if self.p.indcache and self._dorunonce:
+            rcache = indicator.IndicatorCache.getcache(
+                size=self.p.indcachesize, path=self.p.indcachedir)
+            rcache.newrun()
+            rcache.setbatch(self._optvalues if self._dooptimize else [])
+
+        indicator.Indicator.useresultcache(rcache)
+
         for stratcls, sargs, skwargs in iterstrat:
             sargs = self.datas + list(sargs)
             try:
@@ -1227,6 +1631,8 @@ class Cerebro(with_metaclass(MetaParams, object)):
                 strat._oldsync = True  # tell strategy to use old clock update
             if self.p.tradehistory:
                 strat.set_tradehistory()
+            if self.p.tradeledger:
+                strat.set_tradeledger(self._tradeledger())
             runstrats.append(strat)
 
         tz = self.p.tz
@@ -1305,6 +1711,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
             for strat in runstrats:
                 strat._stop()
 
+            if self._dooptimize and any(s.pruned for s in runstrats):
+                self._event_stop = False  # only this combination is stopped
+
         self._broker.stop()
 
         if not predata:
@@ -1319,6 +1728,16 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
         self.stop_writers(runstrats)
 
+        if self._dooptimize and self.p.optmetrics:
+            # Results reduced to params and metrics
+            paths = self.p.optmetrics
+            if paths is True:
+                paths = None
+            elif isinstance(paths, string_types):
+                paths = [paths]
+
+            return [OptResult.fromstrategy(strat, paths) for strat in runstrats]
+
         if self._dooptimize and self.p.optreturn:
             # Results can be optimized
             results = list()
@@ -1330,7 +1749,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
                         if attrname.startswith('data'):
                             setattr(a, attrname, None)
 
-                oreturn = OptReturn(strat.params, analyzers=strat.analyzers, strategycls=type(strat))
+                oreturn = OptReturn(strat.params, analyzers=strat.analyzers,
+                                    strategycls=type(strat),
+                                    pruned=strat.pruned)
                 results.append(oreturn)
 
             return results
@@ -1432,6 +1853,11 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                     self._next_writers(runstrats)
 
+                if self.progresscbs:
+                    self._runprogress(runstrats)
+                    if self._event_stop:  # stop if requested
+                        return
+
         # Last notification chance before stopping
         self._datanotify()
         if self._event_stop:  # stop if requested
@@ -1472,6 +1898,11 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                 self._next_writers(runstrats)
 
+            if self.progresscbs:
+                self._runprogress(runstrats)
+                if self._event_stop:  # stop if requested
+                    return
+
     def _next_writers(self, runstrats):
         if not self.runwriters:
             return
@@ -1638,6 +2069,11 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                     self._next_writers(runstrats)
 
+                if self.progresscbs:
+                    self._runprogress(runstrats)
+                    if self._event_stop:  # stop if requested
+                        return
+
         # Last notification chance before stopping
         self._datanotify()
         if self._event_stop:  # stop if requested
@@ -1703,6 +2139,22 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                 self._next_writers(runstrats)
 
+            if self.progresscbs:
+                self._runprogress(runstrats)
+                if self._event_stop:  # stop if requested
+                    return
+
+    def _runprogress(self, runstrats):
+        self._runbars += 1
+        for callback, interval in self.progresscbs:
+            if self._runbars % interval:
+                continue
+
+            for strat in runstrats:
+                if callback(strat):
+                    strat.pruned = True
+                    self.runstop()
+
     def _check_timers(self, runstrats, dt0, cheat=False):
         timers = self._timers if not cheat else self._timerscheat
         for t in timers:
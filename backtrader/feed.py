@@ -22,11 +22,17 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import collections
+import copy
 import datetime
 import inspect
 import io
 import os.path
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 import backtrader as bt
 from backtrader import (date2num, num2date, time2num, TimeFrame, dataseries,
                         metabase)
@@ -136,6 +142,7 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
         ('tzinput', None),
         ('qcheck', 0.0),  # timeout in seconds (float) to check for events
         ('calendar', None),
+        ('bulkpreload', True),
     )
 
     (CONNECTED, DISCONNECTED, CONNBROKEN, DELAYED,
@@ -164,6 +171,15 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
 
     _started = False
 
+    # Subclasses able to load all the bars at once when preloading implement
+    # _loadcolumns() to return a dictionary with the values of the lines (see
+    # _preloadcolumns) or None if it cannot be done. It replaces the methods
+    # named in _bulkfor, and is not used if a subclass redefines those
+    _loadcolumns = None
+    _bulkfor = ('_load',)
+
+    _fastload = False  # set in _start if load can skip the filter machinery
+
     def _start_finish(self):
         # A live feed (for example) may have learnt something about the
         # timezones after the start and that's why the date/time related
@@ -205,6 +221,10 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
         if not self._started:
             self._start_finish()
 
+        # without filters (resampling and replaying are filters too) the bars
+        # go straight from _load to the lines
+        self._fastload = not self._filters
+
     def _timeoffset(self):
         return self._tmoffset
 
@@ -436,12 +456,92 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
         return True
 
     def preload(self):
-        while self.load():
-            pass
+        columns = None
+        if self._canbulk():
+            columns = self._loadcolumns()
+
+        if columns is not None:
+            self._preloadcolumns(columns)
+        else:  # bars before fromdate are discarded as they come
+            while self.load():
+                pass
 
         self._last()
         self.home()
 
+    def _canbulk(self):
+        # filters have to see the bars one by one
+        if not self.p.bulkpreload or self._filters:
+            return False
+
+        if self._barstack or self._barstash:  # pending bars go first
+            return False
+
+        if self._loadcolumns is None:
+            return False
+
+        mro = type(self).__mro__
+
+        def definer(name):
+            return next(cls for cls in mro if name in cls.__dict__)
+
+        bulkcls = definer('_loadcolumns')
+        return all(issubclass(bulkcls, definer(name)) for name in self._bulkfor)
+
+    def _preloadcolumns(self, columns):
+        '''Preloads the bars given in ``columns``, a dictionary with the
+        name of the lines as keys and sequences with the values of the bars,
+        in one go. Lines not in ``columns`` are filled with ``NaN``
+
+        The bars undergo the same input timezone conversion and
+        ``fromdate``/``todate`` checks as with ``load``. Filters are not
+        applied, hence this can only be used if the data has none
+
+        The values can be lists or ``numpy`` arrays
+        '''
+        dts = columns['datetime']
+        if self._tzinput:
+            tzinput = self._tzinput
+            dts = [date2num(tzinput.localize(num2date(dt))) for dt in dts]
+
+        # bars before fromdate are discarded, the 1st after todate ends it
+        fromdate, todate = self.fromdate, self.todate
+        start, keep = 0, None
+        if (np is not None and isinstance(dts, np.ndarray) and
+                not (dts[1:] < dts[:-1]).any()):
+            # sorted (the usual case): binary search for both ends
+            end = np.searchsorted(dts, todate, side='right')
+            start = np.searchsorted(dts[:end], fromdate, side='left')
+        elif np is not None and isinstance(dts, np.ndarray):
+            over = np.flatnonzero(dts > todate)
+            end = over[0] if len(over) else len(dts)
+            early = dts[:end] < fromdate
+            if early.any():
+                keep = np.flatnonzero(~early)
+                if len(keep) and keep[-1] - keep[0] == len(keep) - 1:
+                    # contiguous: slicing keeps views (memory mapped files)
+                    start, keep = keep[0], None
+        else:
+            end = next((i for i, dt in enumerate(dts) if dt > todate),
+                       len(dts))
+            if any(dts[i] < fromdate for i in range(end)):
+                keep = [i for i in range(end) if not dts[i] < fromdate]
+
+        size = end - start if keep is None else len(keep)
+        for alias, line in zip(self.getlinealiases(), self.lines):
+            values = dts if alias == 'datetime' else columns.get(alias)
+            if values is None:
+                values = [float('NaN')] * size
+            elif keep is not None:
+                if np is not None and isinstance(values, np.ndarray):
+                    values = values[keep]
+                else:
+                    values = [values[i] for i in keep]
+            elif start or end < len(values):
+                values = values[start:end]
+
+            line.forwardvalues(values)
+
     def _last(self, datamaster=None):
         # Last chance for filters to deliver something
         ret = 0
@@ -468,7 +568,37 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
                 continue
             ff.check(self, _forcedata=forcedata, *fargs, **fkwargs)
 
+    def _loadfast(self):
+        '''Version of ``load`` for datas without filters: no stacks and
+        only the input timezone and ``fromdate``/``todate`` checks'''
+        while True:
+            self.forward()
+            _loadret = self._load()
+            if not _loadret:
+                self.backwards(force=True)  # see load
+                return _loadret
+
+            dt = self.lines.datetime[0]
+            if self._tzinput:
+                dtime = self._tzinput.localize(num2date(dt))
+                self.lines.datetime[0] = dt = date2num(dtime)
+
+            if dt < self.fromdate:
+                self.backwards()
+                if self._barstash:
+                    return self.load()  # stashed bars need the full path
+                continue
+
+            if dt > self.todate:
+                self.backwards(force=True)
+                return False
+
+            return True
+
     def load(self):
+        if self._fastload and not self._barstack and not self._barstash:
+            return self._loadfast()
+
         while True:
             # move data pointer forward for new bar
             self.forward()
@@ -659,11 +789,17 @@ class CSVDataBase(with_metaclass(MetaCSVDataBase, DataBase)):
 
     The return value of ``_loadline`` (True/False) will be the return value
     of ``_load`` which has been overriden by this base class
+
+    Subclasses may also implement ``_loadcolumns`` to parse all the rows
+    (see ``_readrows``) at once when preloading, unless the parameter
+    ``bulkpreload`` is ``False`` or filters have been added to the data
     '''
 
     f = None
     params = (('headers', True), ('separator', ','),)
 
+    _bulkfor = ('_load', '_loadline')
+
     def start(self):
         super(CSVDataBase, self).start()
 
@@ -686,16 +822,16 @@ class CSVDataBase(with_metaclass(MetaCSVDataBase, DataBase)):
             self.f = None
 
     def preload(self):
-        while self.load():
-            pass
-
-        self._last()
-        self.home()
+        super(CSVDataBase, self).preload()
 
         # preloaded - no need to keep the object around - breaks multip in 3.x
         self.f.close()
         self.f = None
 
+    def _readrows(self):
+        '''Returns the tokens of all the remaining lines'''
+        return [line.rstrip('\n').split(self.separator) for line in self.f]
+
     def _load(self):
         if self.f is None:
             return False
@@ -811,3 +947,56 @@ class DataClone(AbstractDataBase):
     def advance(self, size=1, datamaster=None, ticks=True):
         self._dlen += size
         super(DataClone, self).advance(size, datamaster, ticks=ticks)
+
+
+class DataWindow(DataClone):
+    '''Delivers the bars from ``start`` to ``end`` (indices into the buffer)
+    of an already preloaded data feed passed as ``dataname``
+
+    When preloading, the values are not reloaded bar by bar and with numpy
+    line storage they are not even copied (the lines are views on the ones of
+    the guest data)
+    '''
+    _clone = False
+
+    params = (
+        ('start', 0),
+        ('end', None),
+    )
+
+    def start(self):
+        super(DataWindow, self).start()
+        self._idx = self.p.start
+
+    def _getend(self):
+        if self.p.end is None:
+            return self.data.buflen()
+
+        return min(self.p.end, self.data.buflen())
+
+    def preload(self):
+        end = self._getend()
+        for line, dline in zip(self.lines, self.data.lines):
+            line.setview(dline, self.p.start, end)
+
+        self.home()
+
+    def _load(self):
+        if self._idx >= self._getend():
+            return False
+
+        for line, dline in zip(self.lines, self.data.lines):
+            line[0] = dline.array[self._idx]
+
+        self._idx += 1
+        return True
+
+    def __getstate__(self):
+        # once preloaded the guest data is not needed (optimization workers)
+        state = vars(self).copy()
+        if self.buflen():
+            params = copy.copy(self.p)
+            params.dataname = None
+            state.update(data=None, _dataname=None, params=params, p=params)
+
+        return state
@@ -32,6 +32,8 @@ from .sierrachart import *
 from .mt4csv import *
 from .pandafeed import *
 from .influxfeed import *
+from .binary import *
+from .arrowfeed import *
 try:
     from .ibdata import *
 except ImportError:
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os.path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+from backtrader import date2num
+from backtrader.utils import date2num_array
+from backtrader.utils.py3 import string_types
+from backtrader.errors import ModuleImportError
+import backtrader.feed as feed
+
+
+__all__ = ['ParquetData', 'ArrowData']
+
+
+class ParquetData(feed.DataBase):
+    '''
+    Reads the bars from a Parquet file (``pyarrow`` is needed)
+
+    Only the columns mapped to lines are read, and the row groups which
+    cannot have bars in the ``fromdate``-``todate`` range (according to the
+    statistics of the datetime column) are skipped altogether. With sorted
+    files and a date range (walk-forward windows for example) only a fraction
+    of the file is read
+
+    The column buffers are taken as ``numpy`` views (no conversion is made
+    for ``float64`` columns without nulls) and go in one piece to the lines
+    when preloading
+
+    Params:
+
+      - ``datetime`` (default: ``None``): name of the column with the
+        timestamps. ``None`` takes the 1st column with a timestamp or date
+        type (an index saved by ``pandas`` for example)
+
+        Timezone aware timestamps are converted to UTC. Naive ones are taken
+        as they are (see ``tz`` and ``tzinput``)
+
+      - ``open``, ``high``, ``low``, ``close``, ``volume``, ``openinterest``:
+        name of the column for the line. The line is filled with ``NaN`` if
+        the column is not in the file and ``None`` skips it
+
+      - ``nocase`` (default: ``True``): case insensitive match of the names
+        of the columns
+    '''
+
+    params = (
+        ('nocase', True),
+        ('datetime', None),
+        ('open', 'open'),
+        ('high', 'high'),
+        ('low', 'low'),
+        ('close', 'close'),
+        ('volume', 'volume'),
+        ('openinterest', 'openinterest'),
+    )
+
+    def __init__(self):
+        if pa is None or np is None:
+            raise ModuleImportError('pyarrow and numpy are needed for %s' %
+                                    self.__class__.__name__)
+
+    def start(self):
+        super(ParquetData, self).start()
+        # fromdate/todate are only known once started
+        if not self._started:
+            self._start_finish()
+
+        table = self._readtable()
+        self._cols = self._tocolumns(table)
+        self._size = table.num_rows
+        self._idx = -1
+
+    def stop(self):
+        super(ParquetData, self).stop()
+        self._cols = dict()
+
+    def _readtable(self):
+        pf = pa.parquet.ParquetFile(self.p.dataname)
+        dtname, colnames = self._colnames(pf.schema_arrow)
+
+        meta = pf.metadata
+        groups = [i for i in range(meta.num_row_groups)
+                  if self._inrange(*self._rgbounds(meta.row_group(i), dtname))]
+
+        return pf.read_row_groups(groups, columns=colnames)
+
+    def _rgbounds(self, rg, dtname):
+        # float days of the min/max timestamp of a row group, None if unknown
+        for i in range(rg.num_columns):
+            col = rg.column(i)
+            if col.path_in_schema == dtname:
+                stats = col.statistics
+                if stats is not None and stats.has_min_max:
+                    return _statnum(stats.min), _statnum(stats.max)
+
+        return None, None
+
+    def _inrange(self, dtmin, dtmax):
+        if dtmin is None or dtmax is None:
+            return True  # no statistics, the bars are checked one by one
+
+        # the input timezone moves the bars at most a day
+        margin = 1.0 if self._tzinput else 0.0
+        return dtmax >= self.fromdate - margin and \
+            dtmin <= self.todate + margin
+
+    def _colnames(self, schema):
+        '''Returns the name of the datetime column and the names of the
+        columns to read'''
+        names = schema.names
+        if self.p.nocase:
+            lnames = dict((name.lower(), name) for name in reversed(names))
+
+            def findname(name):
+                return lnames.get(name.lower())
+        else:
+            def findname(name):
+                return name if name in names else None
+
+        dtname = self.p.datetime
+        if dtname is None:
+            dtname = next((field.name for field in schema
+                           if _isdatetime(field.type)), None)
+        else:
+            dtname = findname(dtname)
+
+        if dtname is None:
+            raise ValueError('No datetime column in %s' % self.p.dataname)
+
+        self._colmapping = colmapping = dict(datetime=dtname)
+        for alias in self.getlinealiases():
+            if alias == 'datetime':
+                continue
+
+            pname = getattr(self.params, alias)
+            colmapping[alias] = None if pname is None else findname(pname)
+
+        colnames = [dtname]
+        colnames.extend(name for name in colmapping.values()
+                        if name is not None and name not in colnames)
+        return dtname, colnames
+
+    def _tocolumns(self, table):
+        columns = dict()
+        for alias, name in self._colmapping.items():
+            if name is None:
+                continue
+
+            col = table.column(name)
+            if col.num_chunks == 1:  # a view on the arrow buffer if possible
+                values = col.chunk(0).to_numpy(zero_copy_only=False)
+            else:
+                values = col.to_numpy()
+
+            if alias == 'datetime':
+                if not _isdatetime(col.type):
+                    raise ValueError('Column %s has no datetime values' %
+                                     name)
+
+                columns[alias] = date2num_array(values)
+            else:
+                columns[alias] = np.asarray(values, dtype=np.float64)
+
+        return columns
+
+    def _loadcolumns(self):
+        return self._cols
+
+    def _load(self):
+        self._idx += 1
+        if self._idx >= self._size:
+            return False
+
+        for alias, line in zip(self.getlinealiases(), self.lines):
+            col = self._cols.get(alias)
+            if col is not None:
+                line[0] = float(col[self._idx])
+
+        return True
+
+
+class ArrowData(ParquetData):
+    '''
+    Reads the bars from an Arrow IPC file (also known as Feather version 2),
+    which is memory mapped
+
+    Only the mapped columns are touched and the record batches out of the
+    ``fromdate``-``todate`` range are skipped after looking at their
+    datetime column (the IPC format has no statistics)
+
+    See ``ParquetData`` for the params
+    '''
+
+    def _readtable(self):
+        source = self.p.dataname
+        if isinstance(source, string_types):
+            source = pa.memory_map(os.path.expanduser(source), 'r')
+
+        reader = pa.ipc.open_file(source)
+        dtname, colnames = self._colnames(reader.schema)
+
+        batches = list()
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).select(colnames)
+            dtcol = batch.column(dtname)
+            if len(dtcol) and _isdatetime(dtcol.type):
+                dts = date2num_array(dtcol.to_numpy(zero_copy_only=False))
+                if not self._inrange(np.nanmin(dts), np.nanmax(dts)):
+                    continue
+
+            batches.append(batch)
+
+        schema = pa.schema([reader.schema.field(name) for name in colnames])
+        return pa.Table.from_batches(batches, schema=schema)
+
+
+def _isdatetime(dtype):
+    return pa.types.is_timestamp(dtype) or pa.types.is_date(dtype)
+
+
+def _statnum(value):
+    # float days of a statistics value, None if not a date/datetime
+    if isinstance(value, datetime.datetime):
+        return date2num(value)
+
+    if isinstance(value, datetime.date):
+        return date2num(datetime.datetime.combine(value, datetime.time()))
+
+    return None
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import array
+import io
+import os
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .. import feed
+from .. import TimeFrame
+from ..errors import ModuleImportError
+
+
+__all__ = ['BinaryBarData']
+
+
+class BinaryBarData(feed.DataBase):
+    '''
+    Loads bars from a binary file with a column (little-endian ``float64``)
+    for each line. The ``datetime`` column holds the values as stored in the
+    lines (UTC float days), hence no conversion at all takes place
+
+    The columns are memory mapped with ``numpy.memmap``. With the ``numpy``
+    line storage (see ``linestorage`` in ``Cerebro``) the lines of the data
+    are views on the mapped file (copy-on-write): loading takes no time and
+    the processes using the same file (for example optimization workers)
+    share the pages of the file in the page cache. Else the values are copied
+    to the lines in a single pass
+
+    Files are written with ``BinaryBarData.write``, for example from another
+    data feed::
+
+      data = bt.feeds.GenericCSVData(dataname='bars.csv', ...)
+      ... preload it (cerebro.run) ...
+      bt.feeds.BinaryBarData.write('bars.bin', data)
+
+    or with ``tools/rewrite-data.py --outformat binary``
+
+    Layout of the file:
+
+      - Header: ``<8sIIqii``: magic ``b'BTBARS\\x00\\x00'``, version, number
+        of columns, number of bars, timeframe and compression
+
+      - The names of the columns (16 bytes each, ascii, ``\\x00`` padded)
+
+      - Padding up to a multiple of 64 bytes
+
+      - The columns, one after the other
+
+    Params:
+
+      - ``fileframe`` (default: ``True``): take the ``timeframe`` and
+        ``compression`` from the header of the file
+
+    Columns which do not match the name of a line are ignored and lines with
+    no column are filled with ``NaN``
+    '''
+
+    params = (('fileframe', True),)
+
+    MAGIC = b'BTBARS\x00\x00'
+    VERSION = 1
+    HEADER = struct.Struct(str('<8sIIqii'))
+    NAMESIZE = 16
+    ALIGN = 64
+
+    def __init__(self):
+        if np is None:
+            raise ModuleImportError('numpy is needed for BinaryBarData')
+
+        self._header = self._readheader(self.p.dataname)
+        if self.p.fileframe:
+            _, _, timeframe, compression = self._header
+            self.p.timeframe = timeframe
+            self.p.compression = compression
+
+    @classmethod
+    def _readheader(cls, dataname):
+        with io.open(dataname, 'rb') as f:
+            hdr = f.read(cls.HEADER.size)
+            if len(hdr) < cls.HEADER.size:
+                raise ValueError('%s is not a binary bars file' % dataname)
+
+            magic, version, ncols, nbars, timeframe, compression = \
+                cls.HEADER.unpack(hdr)
+            if magic != cls.MAGIC:
+                raise ValueError('%s is not a binary bars file' % dataname)
+            if version != cls.VERSION:
+                raise ValueError('Unsupported binary bars version %d in %s' %
+                                 (version, dataname))
+
+            names = [f.read(cls.NAMESIZE).rstrip(b'\x00').decode('ascii')
+                     for i in range(ncols)]
+
+        return names, nbars, timeframe, compression
+
+    @classmethod
+    def _dataoffset(cls, ncols):
+        size = cls.HEADER.size + ncols * cls.NAMESIZE
+        return -(-size // cls.ALIGN) * cls.ALIGN
+
+    @classmethod
+    def write(cls, dataname, data=None, columns=None,
+              timeframe=TimeFrame.Days, compression=1):
+        '''Writes a binary bars file to ``dataname``
+
+        The values are either all the bars of the (preloaded) ``data`` (its
+        lines and timeframe/compression) or those in ``columns``, a list of
+        ``(name, values)`` which has to contain ``datetime``
+        '''
+        if data is not None:
+            size = data.buflen()
+            columns = [(alias, line.array[:size])
+                       for alias, line in zip(data.getlinealiases(),
+                                              data.lines)]
+            timeframe, compression = data._timeframe, data._compression
+
+        columns = list(columns)
+        if 'datetime' not in [name for name, _ in columns]:
+            raise ValueError('A datetime column is needed')
+
+        nbars = len(columns[0][1])
+        if any(len(values) != nbars for _, values in columns):
+            raise ValueError('All columns must have the same length')
+
+        hdr = cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(columns), nbars,
+                              timeframe, compression)
+        for name, _ in columns:
+            bname = name.encode('ascii')
+            if len(bname) > cls.NAMESIZE:
+                raise ValueError('Column name too long: %s' % name)
+            hdr += bname.ljust(cls.NAMESIZE, b'\x00')
+
+        hdr = hdr.ljust(cls._dataoffset(len(columns)), b'\x00')
+
+        tmpname = '%s.%d.tmp' % (dataname, os.getpid())
+        with io.open(tmpname, 'wb') as f:
+            f.write(hdr)
+            for _, values in columns:
+                values = array.array(str('d'), values)
+                if sys.byteorder != 'little':
+                    values.byteswap()
+
+                values.tofile(f)
+
+        os.replace(tmpname, dataname)  # readers never see a partial file
+
+    def start(self):
+        super(BinaryBarData, self).start()
+        names, nbars, _, _ = self._header = \
+            self._readheader(self.p.dataname)
+
+        self._cols = dict()
+        if nbars:
+            mm = np.memmap(self.p.dataname, dtype=np.dtype(str('<f8')),
+                           mode='c', offset=self._dataoffset(len(names)),
+                           shape=(len(names), nbars))
+            self._cols = dict(zip(names, mm))
+
+        self._idx = -1
+
+    def stop(self):
+        super(BinaryBarData, self).stop()
+        self._cols = dict()  # unmapped once no line uses it
+
+    def _loadcolumns(self):
+        aliases = self.getlinealiases()
+        return dict((name, col) for name, col in self._cols.items()
+                    if name in aliases)
+
+    def _load(self):
+        self._idx += 1
+        if self._idx >= self._header[1]:
+            return False
+
+        for alias, line in zip(self.getlinealiases(), self.lines):
+            col = self._cols.get(alias)
+            if col is not None:
+                line[0] = float(col[self._idx])
+
+        return True
@@ -23,9 +23,16 @@ from __future__ import (absolute_import, division, print_function,
 
 from datetime import datetime
 import itertools
+from operator import itemgetter
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from .. import feed, TimeFrame
-from ..utils import date2num
+from ..utils import date2num, date2num_array, num2date
 from ..utils.py3 import integer_types, string_types
 
 
@@ -100,6 +107,206 @@ class GenericCSVData(feed.CSVDataBase):
         else:  # assume callable
             self._dtconvert = self.p.dtformat
 
+    def _loadcolumns(self):
+        # Bulk version of _loadline for preloading
+        rows = self._readrows()
+        try:
+            return self._tocolumns(rows)
+        except (ValueError, IndexError, TypeError) as e:
+            error = e
+
+        # A bad row. The row path stops at the 1st bar after todate and only
+        # fails if the bad row comes before (or is that bar)
+        for bad, row in enumerate(rows):
+            try:
+                self._tocolumns([row], cut=False)
+            except (ValueError, IndexError, TypeError):
+                break
+        else:
+            raise error  # not made by a single row
+
+        columns = self._tocolumns(rows[:bad])
+        if not self._pasttodate(columns['datetime']):
+            self._tocolumns(rows[bad:bad + 1])  # raises like _loadline
+
+        return columns
+
+    def _pasttodate(self, dtnums):
+        # same input timezone conversion and check as in _preloadcolumns
+        todate, tzinput = self.todate, self._tzinput
+        if tzinput:
+            return any(date2num(tzinput.localize(num2date(dt))) > todate
+                       for dt in dtnums)
+
+        return any(dt > todate for dt in dtnums)
+
+    def _tocolumns(self, rows, cut=True):
+        if np is not None and not self._tzinput:
+            columns = self._tocolumnsnp(rows, cut)
+            if columns is not None:
+                return columns
+
+        # row by row (the input timezone localizes each datetime)
+        dtcol = [row[self.p.datetime] for row in rows]
+        if self._dtstr:
+            dtformat = self.p.dtformat
+
+            if self.p.time >= 0:
+                # add time value and format if it's in a separate field
+                dtcol = [dtfield + 'T' + row[self.p.time]
+                         for dtfield, row in zip(dtcol, rows)]
+                dtformat += 'T' + self.p.tmformat
+
+            dts = _strptimes(dtcol, dtformat)
+        else:
+            dts = [self._dtconvert(dtfield) for dtfield in dtcol]
+
+        if self.p.timeframe >= TimeFrame.Days:
+            dtnums = list()
+            sessionend = self.p.sessionend
+            eoscache = dict()
+            for dt in dts:
+                # check if the expected end of session is larger than parsed
+                if self._tzinput:
+                    dtin = self._tzinput.localize(dt)  # pytz compatible-ized
+                else:
+                    dtin = dt
+
+                dtnum = date2num(dtin)  # utc'ize
+
+                dtdate = dt.date()
+                dteosnum = eoscache.get(dtdate)
+                if dteosnum is None:
+                    dteos = datetime.combine(dtdate, sessionend)
+                    dteosnum = eoscache[dtdate] = self.date2num(dteos)
+
+                if dteosnum > dtnum:
+                    dtnums.append(dteosnum)
+                else:
+                    # Avoid reconversion if already converted dtin == dt
+                    dtnums.append(date2num(dt) if self._tzinput else dtnum)
+        else:
+            dtnums = [date2num(dt) for dt in dts]
+
+        # the rows after the 1st one past todate are not needed (the input
+        # timezone moves the bars at most a day)
+        todate = self.todate + (1.0 if self._tzinput else 0.0)
+        if cut and todate != float('inf'):
+            end = next((i for i, dt in enumerate(dtnums) if dt > todate), None)
+            if end is not None:
+                rows, dtnums = rows[:end + 1], dtnums[:end + 1]
+
+        columns = dict(datetime=dtnums)
+        nullvalue = self.p.nullvalue
+        for linefield in (x for x in self.getlinealiases() if x != 'datetime'):
+            csvidx = getattr(self.params, linefield)
+
+            if csvidx is None or csvidx < 0:
+                # the field will not be present, assignt the "nullvalue"
+                columns[linefield] = [float(nullvalue)] * len(rows)
+            else:
+                columns[linefield] = [
+                    float(row[csvidx]) if row[csvidx] != '' else
+                    float(nullvalue) for row in rows]
+
+        return columns
+
+    def _tocolumnsnp(self, rows, cut=True):
+        # Column-wise version of _tocolumns with numpy. None is returned if
+        # the rows cannot be converted like this, to let the row path do it
+        # (or raise the same errors as _loadline)
+        if not rows:
+            return None
+
+        try:
+            dts = self._todt64(rows)
+        except (ValueError, TypeError, IndexError):
+            return None
+
+        if dts is None:
+            return None
+
+        dtnums = date2num_array(dts)
+        if self.p.timeframe >= TimeFrame.Days:
+            # check if the expected end of session is larger than parsed
+            days = dts.astype('datetime64[D]')
+            sessionend = self.p.sessionend
+            if self._tz is None:
+                eos = np.timedelta64(
+                    ((sessionend.hour * 60 + sessionend.minute) * 60 +
+                     sessionend.second) * 10 ** 6 + sessionend.microsecond,
+                    'us')
+                eosnums = date2num_array(days + eos)
+            else:
+                udays, inverse = np.unique(days, return_inverse=True)
+                eosnums = np.array([
+                    self.date2num(datetime.combine(day, sessionend))
+                    for day in udays.astype(object)])[inverse]
+
+            dtnums = np.where(eosnums > dtnums, eosnums, dtnums)
+
+        # the rows after the 1st one past todate are not needed
+        if cut and self.todate != float('inf'):
+            over = np.flatnonzero(dtnums > self.todate)
+            if len(over):
+                rows, dtnums = rows[:over[0] + 1], dtnums[:over[0] + 1]
+
+        size = len(rows)
+
+        columns = dict(datetime=dtnums)
+        nullvalue = float(self.p.nullvalue)
+        for linefield in (x for x in self.getlinealiases() if x != 'datetime'):
+            csvidx = getattr(self.params, linefield)
+
+            if csvidx is None or csvidx < 0:
+                # the field will not be present, assignt the "nullvalue"
+                columns[linefield] = np.full(size, nullvalue)
+                continue
+
+            try:
+                csvfields = list(map(itemgetter(csvidx), rows))
+                if '' not in csvfields:
+                    columns[linefield] = np.array(csvfields, dtype=np.float64)
+                    continue
+
+                # if empty ... assign the "nullvalue"
+                empty = np.array(csvfields) == ''
+                values = np.where(empty, '0', csvfields).astype(np.float64)
+            except (ValueError, TypeError, IndexError):
+                return None
+
+            values[empty] = nullvalue
+            columns[linefield] = values
+
+        return columns
+
+    def _todt64(self, rows):
+        # datetime64 values of the datetime field or None if not possible
+        dtfields = list(map(itemgetter(self.p.datetime), rows))
+        if not self._dtstr:
+            dts = [self._dtconvert(dtfield) for dtfield in dtfields]
+        else:
+            dtformat = self.p.dtformat
+            text = np.array(dtfields)
+
+            if self.p.time >= 0:
+                # add time value and format if it's in a separate field
+                tmfields = list(map(itemgetter(self.p.time), rows))
+                text = np.char.add(np.char.add(text, 'T'), tmfields)
+                dtformat += 'T' + self.p.tmformat
+
+            layout = _ISOLAYOUTS.get(dtformat)
+            if layout is None:
+                dts = _strptimes(text.tolist(), dtformat)
+            else:
+                return _isoparse(text, layout)
+
+        if not all(isinstance(dt, datetime) and dt.tzinfo is None
+                   for dt in dts):
+            return None  # date2num knows about timezones, numpy does not
+
+        return np.array(dts, dtype='datetime64[us]')
+
     def _loadline(self, linetokens):
         # Datetime needs special treatment
         dtfield = linetokens[self.p.datetime]
@@ -158,5 +365,77 @@ class GenericCSVData(feed.CSVDataBase):
         return True
 
 
+# Formats which datetime.fromisoformat (and numpy) parse like strptime,
+# provided that the text has the same layout
+_ISOLAYOUTS = dict((
+    ('%Y-%m-%d', 'dddd-dd-dd'),
+    ('%Y-%m-%d %H:%M', 'dddd-dd-dd dd:dd'),
+    ('%Y-%m-%dT%H:%M', 'dddd-dd-ddTdd:dd'),
+    ('%Y-%m-%d %H:%M:%S', 'dddd-dd-dd dd:dd:dd'),
+    ('%Y-%m-%dT%H:%M:%S', 'dddd-dd-ddTdd:dd:dd'),
+))
+
+_ISOFORMATS = dict((dtformat, re.compile(layout.replace('d', '[0-9]') + '$'))
+                   for dtformat, layout in _ISOLAYOUTS.items())
+
+
+def _strptimes(dtfields, dtformat):
+    '''Returns the datetimes parsed from ``dtfields`` with ``dtformat``'''
+    strptime = datetime.strptime
+    layout = _ISOFORMATS.get(dtformat)
+    if layout is None or not hasattr(datetime, 'fromisoformat'):
+        cache = dict()  # dates may repeat (separate time fields)
+        dts = list()
+        for dtfield in dtfields:
+            dt = cache.get(dtfield)
+            if dt is None:
+                dt = cache[dtfield] = strptime(dtfield, dtformat)
+            dts.append(dt)
+
+        return dts
+
+    fromisoformat = datetime.fromisoformat
+    match = layout.match
+
+    dts = list()
+    for dtfield in dtfields:
+        if match(dtfield):
+            try:
+                dts.append(fromisoformat(dtfield))
+                continue
+            except ValueError:
+                pass
+
+        dts.append(strptime(dtfield, dtformat))
+
+    return dts
+
+
+def _isoparse(text, layout):
+    '''Returns the ``datetime64`` values of the numpy array of strings
+    ``text`` if all have exactly ``layout`` (see ``_ISOLAYOUTS``), else
+    ``None``'''
+    width = len(layout)
+    if text.dtype != np.dtype('U%d' % width):
+        return None  # longer or shorter strings
+
+    chars = text.view('U1').reshape(len(text), width)
+    for i, c in enumerate(layout):
+        col = chars[:, i]
+        if c == 'd':
+            ok = (col >= '0') & (col <= '9')
+        else:
+            ok = col == c
+
+        if not ok.all():
+            return None
+
+    dts = text.astype('datetime64[us]')  # range errors raise ValueError
+    if (dts < np.datetime64('0001-01-01')).any():
+        return None  # strptime has no year 0
+
+    return dts
+
+
 class GenericCSV(feed.CSVFeedBase):
     DataCls = GenericCSVData
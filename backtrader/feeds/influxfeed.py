@@ -21,9 +21,22 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
+import hashlib
+import io
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 import backtrader as bt
 import backtrader.feed as feed
-from ..utils import date2num
+from ..utils import date2num, date2num_array
+from ..utils.py3 import string_types
+from .binary import BinaryBarData
 import datetime as dt
 
 TIMEFRAMES = dict(
@@ -37,8 +50,42 @@ TIMEFRAMES = dict(
     )
 )
 
+# seconds of the fixed size time groups, needed to align the chunks
+TFSECONDS = {
+    bt.TimeFrame.Seconds: 1,
+    bt.TimeFrame.Minutes: 60,
+    bt.TimeFrame.Days: 86400,
+    bt.TimeFrame.Weeks: 7 * 86400,
+}
+
+EPOCH = dt.datetime(1970, 1, 1)
+
+LINEFIELDS = ('open', 'high', 'low', 'close', 'volume')
+
 
 class InfluxDB(feed.DataBase):
+    '''
+    Loads the bars from an InfluxDB measurement (``dataname``), grouping the
+    points by ``timeframe``/``compression``
+
+    Params:
+
+      - ``chunksize`` (default: ``None``): number of bars asked for in each
+        query. The time range from ``startdate`` (or ``fromdate``) to
+        ``todate`` (or now) is paged through in chunks, which keeps the
+        responses small and lets ``cachedir`` work. ``None`` makes a single
+        query, which is also the case for months/years or if there is no
+        start. The chunks are aligned to the groups of bars, which never
+        straddle two chunks
+
+      - ``cachedir`` (default: ``None``): directory to keep the chunks
+        which are entirely in the past (in the format of ``BinaryBarData``),
+        which are not asked for again in later runs. Points inserted later in
+        the range of a cached chunk are not seen
+
+    The responses are decoded to columns: with ``preload`` the bars go to the
+    lines in a single pass
+    '''
     frompackages = (
         ('influxdb', [('InfluxDBClient', 'idbclient')]),
         ('influxdb.exceptions', 'InfluxDBClientError')
@@ -58,6 +105,8 @@ class InfluxDB(feed.DataBase):
         ('close', 'close_p'),
         ('volume', 'volume'),
         ('ointerest', 'oi'),
+        ('chunksize', None),
+        ('cachedir', None),
     )
 
     def start(self):
@@ -68,18 +117,47 @@ class InfluxDB(feed.DataBase):
         except InfluxDBClientError as err:
             print('Failed to establish connection to InfluxDB: %s' % err)
 
-        tf = '{multiple}{timeframe}'.format(
+        self._chunks = iter(self._getchunks())
+        self._cols = None
+        self._idx = self._size = 0
+
+    def _groupby(self):
+        return '{multiple}{timeframe}'.format(
             multiple=(self.p.compression if self.p.compression else 1),
             timeframe=TIMEFRAMES.get(self.p.timeframe, 'd'))
 
-        if not self.p.startdate:
+    def _getchunks(self):
+        '''Returns a list of ``(begin, end)`` limits of the queries (naive
+        UTC datetimes, ``None`` for no limit)'''
+        tfsecs = TFSECONDS.get(self.p.timeframe)
+        start = self.p.startdate or self.p.fromdate
+        if not self.p.chunksize or not start or tfsecs is None:
+            return [(self.p.startdate, None)]
+
+        if isinstance(start, string_types):
+            start = _strpdate(start)
+
+        group = dt.timedelta(seconds=tfsecs * (self.p.compression or 1))
+        span = group * self.p.chunksize
+        begin = start - (start - EPOCH) % group  # groups start at the epoch
+        end = self.p.todate or dt.datetime.utcnow()
+
+        chunks = list()
+        while begin <= end:
+            chunks.append((begin, begin + span))
+            begin += span
+
+        return chunks
+
+    def _query(self, begin, end):
+        if not begin:
             st = '<= now()'
         else:
-            st = '>= \'%s\'' % self.p.startdate
+            st = '>= \'%s\'' % _strfdate(begin)
+            if end is not None:
+                st += ' AND time < \'%s\'' % _strfdate(end)
 
-        # The query could already consider parameters like fromdate and todate
-        # to have the database skip them and not the internal code
-        qstr = ('SELECT mean("{open_f}") AS "open", mean("{high_f}") AS "high", '
+        return ('SELECT mean("{open_f}") AS "open", mean("{high_f}") AS "high", '
                 'mean("{low_f}") AS "low", mean("{close_f}") AS "close", '
                 'mean("{vol_f}") AS "volume", mean("{oi_f}") AS "openinterest" '
                 'FROM "{dataname}" '
@@ -88,28 +166,138 @@ class InfluxDB(feed.DataBase):
                     open_f=self.p.open, high_f=self.p.high,
                     low_f=self.p.low, close_f=self.p.close,
                     vol_f=self.p.volume, oi_f=self.p.ointerest,
-                    timeframe=tf, begin=st, dataname=self.p.dataname)
+                    timeframe=self._groupby(), begin=st,
+                    dataname=self.p.dataname)
+
+    def _fetch(self, begin, end):
+        '''Returns the columns (dict of sequences) of the bars in a chunk,
+        from the cache if possible. A failed query raises its error'''
+        cachefile = None
+        if self.p.cachedir and end is not None and \
+           end <= dt.datetime.utcnow():
+            cachefile = self._cachefile(begin, end)
+            if os.path.exists(cachefile):
+                return _readcache(cachefile)
 
         try:
-            dbars = list(self.ndb.query(qstr).get_points())
+            rs = self.ndb.query(self._query(begin, end), epoch='ms')
         except InfluxDBClientError as err:
+            # a gap in the bars would pass for a period without data
             print('InfluxDB query failed: %s' % err)
+            raise
+
+        columns = _decode(rs.raw)
+        if cachefile is not None:
+            if not os.path.isdir(self.p.cachedir):
+                os.makedirs(self.p.cachedir)
+
+            BinaryBarData.write(cachefile, columns=list(columns.items()),
+                                timeframe=self.p.timeframe,
+                                compression=self.p.compression)
+
+        return columns
 
-        self.biter = iter(dbars)
+    def _cachefile(self, begin, end):
+        key = repr((self.p.host, str(self.p.port), self.p.database,
+                    self.p.dataname, self.p.open, self.p.high, self.p.low,
+                    self.p.close, self.p.volume, self._groupby(),
+                    begin.isoformat(), end.isoformat()))
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.p.cachedir, name + '.bin')
+
+    def _loadcolumns(self):
+        chunks = [self._fetch(begin, end) for begin, end in self._chunks]
+        if len(chunks) == 1:
+            return chunks[0]
+
+        columns = dict()
+        for name in ('datetime',) + LINEFIELDS:
+            values = array.array(str('d'))
+            for chunk in chunks:
+                values.extend(chunk[name])
+            columns[name] = values
+
+        return columns
 
     def _load(self):
-        try:
-            bar = next(self.biter)
-        except StopIteration:
-            return False
+        while self._idx >= self._size:  # next chunk
+            try:
+                begin, end = next(self._chunks)
+            except StopIteration:
+                return False
 
-        self.l.datetime[0] = date2num(dt.datetime.strptime(bar['time'],
-                                                           '%Y-%m-%dT%H:%M:%SZ'))
+            self._cols = self._fetch(begin, end)
+            self._idx = 0
+            self._size = len(self._cols.get('datetime', ()))
 
-        self.l.open[0] = bar['open']
-        self.l.high[0] = bar['high']
-        self.l.low[0] = bar['low']
-        self.l.close[0] = bar['close']
-        self.l.volume[0] = bar['volume']
+        idx = self._idx
+        self._idx += 1
+        cols = self._cols
+        self.l.datetime[0] = cols['datetime'][idx]
+        self.l.open[0] = cols['open'][idx]
+        self.l.high[0] = cols['high'][idx]
+        self.l.low[0] = cols['low'][idx]
+        self.l.close[0] = cols['close'][idx]
+        self.l.volume[0] = cols['volume'][idx]
 
         return True
+
+
+def _strpdate(s):
+    for fmt in ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return dt.datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+
+    raise ValueError('Unsupported startdate format: %s' % s)
+
+
+def _strfdate(d):
+    if isinstance(d, string_types):
+        return d
+
+    return d.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _decode(raw):
+    '''Decodes a query response (``epoch='ms'``) to columns'''
+    series = raw.get('series') or []
+    values = [row for serie in series for row in serie['values']]
+    if values:
+        rawcols = dict(zip(series[0]['columns'], zip(*values)))
+    else:  # empty columns, an empty chunk is also cached
+        rawcols = dict((name, ()) for name in ('time',) + LINEFIELDS)
+
+    nan = float('nan')
+    columns = dict()
+    for name in LINEFIELDS:
+        columns[name] = array.array(
+            str('d'), [nan if v is None else v for v in rawcols[name]])
+
+    times = rawcols['time']
+    if np is not None:
+        columns['datetime'] = array.array(
+            str('d'), date2num_array(np.array(times, dtype='datetime64[ms]')))
+    else:
+        columns['datetime'] = array.array(
+            str('d'), [date2num(EPOCH + dt.timedelta(milliseconds=t))
+                       for t in times])
+
+    return columns
+
+
+def _readcache(filename):
+    '''Reads the columns of a chunk written with ``BinaryBarData.write``'''
+    names, nbars, _, _ = BinaryBarData._readheader(filename)
+    columns = dict()
+    with io.open(filename, 'rb') as f:
+        f.seek(BinaryBarData._dataoffset(len(names)))
+        for name in names:
+            values = array.array(str('d'))
+            values.fromfile(f, nbars)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            columns[name] = values
+
+    return columns
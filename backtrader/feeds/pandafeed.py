@@ -21,9 +21,15 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from backtrader.utils.py3 import filter, string_types, integer_types
 
 from backtrader import date2num
+from backtrader.utils import date2num_array
 import backtrader.feed as feed
 
 
@@ -42,6 +48,9 @@ class PandasDirectData(feed.DataBase):
       - A negative value in any of the parameters for the Data lines
         indicates it's not present in the DataFrame
         it is
+
+      - When preloading, the columns are converted at once (see
+        ``bulkpreload``) if the datetime column has a ``datetime64`` type
     '''
 
     params = (
@@ -64,6 +73,28 @@ class PandasDirectData(feed.DataBase):
         # reset the iterator on each start
         self._rows = self.p.dataname.itertuples()
 
+    def _loadcolumns(self):
+        # position 0 of the tuples is the index
+        df = self.p.dataname
+        columns = dict()
+        for datafield in self.getlinealiases():
+            colidx = getattr(self.params, datafield)
+            if colidx < 0:
+                continue  # column not present -- skip
+
+            col = df.index if not colidx else df.iloc[:, colidx - 1]
+            if datafield != 'datetime':
+                columns[datafield] = _floatvalues(col)
+                continue
+
+            dtnums = _dtnumvalues(col)
+            if dtnums is None:
+                return None  # let the rows be converted one by one
+
+            columns[datafield] = dtnums
+
+        return columns
+
     def _load(self):
         try:
             row = next(self._rows)
@@ -131,6 +162,10 @@ class PandasData(feed.DataBase):
         - None: column not present
         - -1: autodetect
         - >= 0 or string: specific colum identifier
+
+      - When preloading, the columns are converted at once (see
+        ``bulkpreload``) if the datetime index/column has a ``datetime64``
+        type
     '''
 
     params = (
@@ -231,6 +266,31 @@ class PandasData(feed.DataBase):
 
             self._colmapping[k] = v
 
+    def _loadcolumns(self):
+        df = self.p.dataname
+        columns = dict()
+        for datafield in self.getlinealiases():
+            if datafield == 'datetime':
+                continue
+
+            colindex = self._colmapping[datafield]
+            if colindex is None:
+                continue  # datafield signaled as missing in the stream
+
+            columns[datafield] = _floatvalues(df.iloc[:, colindex])
+
+        coldtime = self._colmapping['datetime']
+        if coldtime is None:
+            dtnums = _dtnumvalues(df.index)  # standard index in the datetime
+        else:
+            dtnums = _dtnumvalues(df.iloc[:, coldtime])
+
+        if dtnums is None:
+            return None  # let the rows be converted one by one
+
+        columns['datetime'] = dtnums
+        return columns
+
     def _load(self):
         self._idx += 1
 
@@ -271,3 +331,23 @@ class PandasData(feed.DataBase):
 
         # Done ... return
         return True
+
+
+def _floatvalues(col):
+    # values of a column (or index) as a float64 array
+    return np.asarray(col, dtype=np.float64)
+
+
+def _dtnumvalues(col):
+    # float days of the timestamps of a column (or index) or None if the
+    # values are not datetime64 (naive or timezone aware)
+    dtype = col.dtype
+    if getattr(dtype, 'tz', None) is not None:  # aware -> utc, like date2num
+        if hasattr(col, 'dt'):  # column
+            col = col.dt.tz_convert('UTC').dt.tz_localize(None)
+        else:  # index
+            col = col.tz_convert('UTC').tz_localize(None)
+    elif np is None or dtype.kind != 'M':
+        return None
+
+    return date2num_array(np.asarray(col))
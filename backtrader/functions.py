@@ -24,6 +24,11 @@ from __future__ import (absolute_import, division, print_function,
 import functools
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # vectorized logic will not be used
+
 from .linebuffer import LineActions
 from .utils.py3 import cmp, range
 
@@ -191,6 +196,10 @@ class If(Logic):
 
 
 class MultiLogic(Logic):
+    # Vectorized flogic which receives the list of slices (or scalars) of the
+    # arguments and is used in "once" if the storage is numpy
+    nplogic = None
+
     def next(self):
         self[0] = self.flogic([arg[0] for arg in self.args])
 
@@ -200,6 +209,11 @@ class MultiLogic(Logic):
         arrays = [arg.array for arg in self.args]
         flogic = self.flogic
 
+        if self.nplogic is not None and self._nparray is not None:
+            # slicing a PseudoArray returns the wrapped scalar
+            dst[start:end] = self.nplogic([arr[start:end] for arr in arrays])
+            return
+
         for i in range(start, end):
             dst[i] = flogic([arr[i] for arr in arrays])
 
@@ -209,9 +223,13 @@ class MultiLogicReduce(MultiLogic):
         super(MultiLogicReduce, self).__init__(*args)
         if 'initializer' not in kwargs:
             self.flogic = functools.partial(functools.reduce, self.flogic)
+            if self.nplogic is not None:
+                self.nplogic = functools.partial(functools.reduce,
+                                                 self.nplogic)
         else:
             self.flogic = functools.partial(functools.reduce, self.flogic,
                                             initializer=kwargs['initializer'])
+            self.nplogic = None  # keep the exact semantics of the reduction
 
 
 class Reduce(MultiLogicReduce):
@@ -228,6 +246,7 @@ def _andlogic(x, y):
 
 class And(MultiLogicReduce):
     flogic = staticmethod(_andlogic)
+    nplogic = staticmethod(np.logical_and) if np is not None else None
 
 
 def _orlogic(x, y):
@@ -236,14 +255,27 @@ def _orlogic(x, y):
 
 class Or(MultiLogicReduce):
     flogic = staticmethod(_orlogic)
+    nplogic = staticmethod(np.logical_or) if np is not None else None
+
+
+# Like max/min, the 1st of the arguments is kept unless a later one compares
+# greater/lower. This keeps the results identical when nan values are present
+def _npmaxlogic(arrays):
+    return functools.reduce(lambda x, y: np.where(y > x, y, x), arrays)
+
+
+def _npminlogic(arrays):
+    return functools.reduce(lambda x, y: np.where(y < x, y, x), arrays)
 
 
 class Max(MultiLogic):
     flogic = max
+    nplogic = staticmethod(_npmaxlogic)
 
 
 class Min(MultiLogic):
     flogic = min
+    nplogic = staticmethod(_npminlogic)
 
 
 class Sum(MultiLogic):
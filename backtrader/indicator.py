@@ -21,12 +21,23 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-
-from .utils.py3 import range, with_metaclass
-
+import array
+import datetime
+import hashlib
+import os
+import pickle
+import types
+
+from .utils.py3 import (range, zip, with_metaclass, string_types,
+                         integer_types)
+
+from .errors import ModuleImportError
+from .linebuffer import (LineBuffer, LinesOperation, LineOwnOperation,
+                         PseudoArray, _LineDelay, _LineForward)
 from .lineiterator import LineIterator, IndicatorBase
-from .lineseries import LineSeriesMaker, Lines
+from .lineseries import LineSeries, LineSeriesMaker, LineSeriesStub, Lines
 from .metabase import AutoInfoClass
+from .utils import OrderedDict
 
 
 class MetaIndicator(IndicatorBase.__class__):
@@ -44,6 +55,13 @@ class MetaIndicator(IndicatorBase.__class__):
     def usecache(cls, onoff):
         cls._icacheuse = onoff
 
+    # Results cache (across runs) used by indicators in runonce mode
+    _rcache = None
+
+    @classmethod
+    def useresultcache(cls, rcache):
+        cls._rcache = rcache
+
     # Object cache deactivated on 2016-08-17. If the object is being used
     # inside another object, the minperiod information carried over
     # influences the first usage when being modified during the 2nd usage
@@ -92,6 +110,67 @@ class Indicator(with_metaclass(MetaIndicator, IndicatorBase)):
 
     csv = False
 
+    def _once(self):
+        rcache = self.__class__._rcache
+        if rcache is None:
+            return super(Indicator, self)._once()
+
+        key = rcache.getkey(self)
+        if key is None:  # inputs/params cannot be identified
+            return super(Indicator, self)._once()
+
+        values = rcache.get(key)
+        if values is None and rcache.batch(self):
+            values = rcache.get(key)
+
+        buflen = self._clock.buflen()
+        if values is None or len(values) != self.lines.fullsize() or \
+           any(len(value) != buflen for value in values):
+            super(Indicator, self)._once()
+            rcache.put(key, [line.array for line in self.lines])
+            return
+
+        # Hit: sub-indicators are still run (they may be used from outside
+        # and will hit the cache themselves) and the own lines are restored
+        self.forward(size=buflen)
+
+        for indicator in self._lineiterators[LineIterator.IndType]:
+            indicator._once()
+
+        for observer in self._lineiterators[LineIterator.ObsType]:
+            observer.forward(size=self.buflen())
+
+        for data in self.datas:
+            data.home()
+
+        for indicator in self._lineiterators[LineIterator.IndType]:
+            indicator.home()
+
+        for observer in self._lineiterators[LineIterator.ObsType]:
+            observer.home()
+
+        self.home()
+
+        for line, value in zip(self.lines, values):
+            line.array[:] = value
+
+        for line in self.lines:
+            line.oncebinding()
+
+    def _batchparams(self, periods):
+        '''
+        Returns the keyword arguments for ``batch`` and the values of the
+        params matching each of ``periods`` (used by ``IndicatorCache``) or
+        ``None`` if the indicator cannot be calculated in a batch
+        '''
+        keys = list(self.p._getkeys())
+        pvalues = [
+            [period if key == 'period' else getattr(self.p, key)
+             for key in keys]
+            for period in periods]
+
+        return dict(), pvalues
+
     def advance(self, size=1):
         # Need intercepting this call to support datas with
         # different lengths (timeframes)
@@ -136,6 +215,319 @@ class Indicator(with_metaclass(MetaIndicator, IndicatorBase)):
             self.next()
 
 
+class IndicatorCache(object):
+    '''Cache of indicator results which lives across runs in a process
+
+    Results are keyed by the indicator class, the values of its parameters
+    and the identity of its inputs. Data feeds are identified by a
+    fingerprint of their (preloaded) contents and other inputs recursively by
+    their own keys, hence the same indicator over the same data in a
+    different run (for example another combination of an optimization) reuses
+    the already calculated values instead of calculating them again.
+
+    Indicators with inputs or parameters which cannot be identified (lambdas,
+    arbitrary objects, ...) are not cached
+
+    If the values of the parameters being optimized are known (``setbatch``),
+    indicators which provide a ``batch`` classmethod are calculated in a
+    single pass for all the values of the strategy parameter which gives
+    their period, the first time one of them is needed
+
+    Params:
+
+      - ``size``: memory budget in bytes. The least recently used results are
+        evicted when the budget is exceeded
+
+      - ``path``: if not ``None``, a directory in which results are also
+        stored, to be reused across processes and sessions
+    '''
+
+    _caches = dict()  # one cache per process and configuration
+
+    @classmethod
+    def getcache(cls, size=2 ** 28, path=None):
+        '''Returns the process-wide cache for the given configuration'''
+        try:
+            return cls._caches[(size, path)]
+        except KeyError:
+            pass
+
+        return cls._caches.setdefault((size, path), cls(size=size, path=path))
+
+    def __init__(self, size=2 ** 28, path=None):
+        self.size = size
+        self.path = path
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+
+        self._results = OrderedDict()
+        self._used = 0
+        self._batchvalues = list()
+        self.hits = self.misses = 0
+        self.newrun()
+
+    def setbatch(self, values):
+        '''Sets the names of the optimized strategy parameters and the lists
+        of values they take, as ``(name, values)`` pairs'''
+        self._batchvalues = [(name, list(x)) for name, x in values]
+
+    def newrun(self):
+        '''Forgets the keys of the objects of a previous run'''
+        self._keys = dict()
+
+    def clear(self):
+        '''Removes all results kept in memory'''
+        self._results = OrderedDict()
+        self._used = 0
+
+    def getkey(self, obj):
+        '''Returns the key of ``obj`` or ``None`` if it cannot be built'''
+        try:
+            return self._keys[id(obj)][1]
+        except KeyError:
+            pass
+
+        try:
+            key = self._getkey(obj)
+        except _NoKey:
+            key = None
+
+        self._keys[id(obj)] = (obj, key)  # keep obj alive -> id is unique
+        return key
+
+    def _objkey(self, obj):
+        key = self.getkey(obj)
+        if key is None:
+            raise _NoKey()
+
+        return key
+
+    def _getkey(self, obj):
+        if isinstance(obj, LineSeriesStub):
+            return self._objkey(obj.lines[0])
+
+        if isinstance(obj, Indicator):
+            return self._indkey(obj, obj.params._getvalues(), obj._minperiod)
+
+        if isinstance(obj, LineIterator):  # strategies, observers
+            raise _NoKey()
+
+        if isinstance(obj, LineSeries):  # data feeds and alike
+            return self._datakey(obj)
+
+        if isinstance(obj, LinesOperation):
+            if obj.btime and obj._tz is not None:
+                raise _NoKey()
+
+            return ('op', _valkey(obj.operation), self._opkey(obj.a),
+                    self._opkey(obj.b), obj._minperiod)
+
+        if isinstance(obj, LineOwnOperation):
+            return ('ownop', _valkey(obj.operation), self._opkey(obj.a),
+                    obj._minperiod)
+
+        if isinstance(obj, (_LineDelay, _LineForward)):
+            return (_clsname(obj.__class__), obj.ago, self._opkey(obj.a),
+                    obj._minperiod)
+
+        if type(obj) is LineBuffer:  # a line from a multiline object
+            owner = getattr(obj, '_owner', None)
+            if owner is not None:
+                for i, line in enumerate(owner.lines.lines):
+                    if line is obj:
+                        return (self._objkey(owner), i)
+
+        raise _NoKey()
+
+    def _indkey(self, ind, pvalues, minperiod):
+        return (_clsname(ind.__class__), _valkey(pvalues),
+                tuple(self._objkey(d) for d in ind.datas),
+                minperiod, ind._clock.buflen())
+
+    def batch(self, ind):
+        '''
+        Calculates ``ind`` for all periods which are optimized together with
+        its own period and stores the results. Returns ``True`` if done
+        '''
+        cls = ind.__class__
+        if 'batch' not in cls.__dict__ or len(ind.datas) != 1 or \
+           ind.lines.fullsize() != 1:
+            return False
+
+        period = getattr(ind.p, 'period', None)
+        if not isinstance(period, integer_types):
+            return False
+
+        # the values of the strategy parameter which gives the period. If
+        # several have the current value it is not known which one it is
+        strat = ind._owner
+        while strat is not None and \
+                getattr(strat, '_ltype', None) != LineIterator.StratType:
+            strat = getattr(strat, '_owner', None)
+
+        if strat is None:
+            return False
+
+        candidates = [values for name, values in self._batchvalues
+                      if getattr(strat.p, name, None) == period]
+        if len(candidates) != 1:
+            return False
+
+        periods = sorted(x for x in set(candidates[0])
+                         if isinstance(x, integer_types) and
+                         not isinstance(x, bool) and x >= 1)
+
+        buflen = ind._clock.buflen()
+        minperiod = ind._minperiod - period + 1  # of the input
+        if len(periods) < 2 or minperiod < 1 or \
+           len(periods) * buflen * 8 > self.size // 2:
+            return False
+
+        bparams = ind._batchparams(periods)
+        if bparams is None:
+            return False
+
+        kwargs, pvalues = bparams
+        try:
+            rows = cls.batch(ind.data.array, periods, minperiod=minperiod,
+                             **kwargs)
+        except ModuleImportError:
+            return False
+
+        for p, pvals, row in zip(periods, pvalues, rows):
+            key = self._indkey(ind, pvals, minperiod + p - 1)
+            if key not in self._results:
+                self.put(key, [row])
+
+        return True
+
+    def _opkey(self, obj):
+        if isinstance(obj, PseudoArray):
+            return ('value', _valkey(obj.wrapped))
+
+        if isinstance(obj, LineBuffer):
+            return self._objkey(obj)
+
+        return ('value', _valkey(obj))
+
+    def _datakey(self, data):
+        h = hashlib.sha1()
+        for line in data.lines.lines:
+            if line.mode != LineBuffer.UnBounded:
+                raise _NoKey()
+
+            h.update(memoryview(line.array).cast('B'))
+
+        return ('data', _valkey(getattr(data, '_name', None)),
+                getattr(data, '_timeframe', None),
+                getattr(data, '_compression', None),
+                data.lines.fullsize(), data.buflen(), h.hexdigest())
+
+    def _getfile(self, key):
+        sha = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, sha + '.pkl')
+
+    def get(self, key):
+        '''Returns the list of arrays stored for ``key`` or ``None``'''
+        try:
+            values = self._results.pop(key)
+        except KeyError:
+            values = None
+            if self.path is not None:
+                try:
+                    with open(self._getfile(key), 'rb') as f:
+                        fkey, values = pickle.load(f)
+                except (IOError, OSError, EOFError, pickle.PickleError):
+                    pass
+                else:
+                    if fkey != key:  # hash collision
+                        values = None
+
+            if values is None:
+                self.misses += 1
+                return None
+
+            self._used += _nbytes(values)
+
+        self._results[key] = values  # (re)insert as most recently used
+        self._evict()
+        self.hits += 1
+        return values
+
+    def put(self, key, arrays):
+        '''Stores a copy of the values of ``arrays`` under ``key``'''
+        values = list()
+        for a in arrays:
+            value = array.array(str('d'))
+            value.frombytes(memoryview(a).cast('B'))
+            values.append(value)
+
+        nbytes = _nbytes(values)
+        if nbytes <= self.size:
+            old = self._results.pop(key, None)
+            if old is not None:
+                self._used -= _nbytes(old)
+
+            self._results[key] = values
+            self._used += nbytes
+            self._evict()
+
+        if self.path is not None:
+            fname = self._getfile(key)
+            tmpname = '%s.%d' % (fname, os.getpid())
+            try:
+                with open(tmpname, 'wb') as f:
+                    pickle.dump((key, values), f, pickle.HIGHEST_PROTOCOL)
+                os.rename(tmpname, fname)
+            except (IOError, OSError):
+                pass
+
+    def _evict(self):
+        while self._used > self.size and self._results:
+            key, values = self._results.popitem(last=False)
+            self._used -= _nbytes(values)
+
+
+class _NoKey(Exception):
+    pass
+
+
+def _nbytes(values):
+    return sum(len(x) * x.itemsize for x in values)
+
+
+def _clsname(cls):
+    name = getattr(cls, '__qualname__', cls.__name__)
+    if '<' in name:  # <lambda>, <locals> ... not unique
+        raise _NoKey()
+
+    return '%s.%s' % (cls.__module__, name)
+
+
+def _valkey(val):
+    if val is None or isinstance(val, (bool, float, datetime.date,
+                                       datetime.time, datetime.timedelta)):
+        return val
+
+    if isinstance(val, string_types + integer_types):
+        return val
+
+    if isinstance(val, (list, tuple)):
+        return tuple(_valkey(x) for x in val)
+
+    if isinstance(val, dict):
+        return tuple((_valkey(k), _valkey(v)) for k, v in val.items())
+
+    if isinstance(val, type) or isinstance(val, types.FunctionType):
+        return _clsname(val)
+
+    if isinstance(val, types.BuiltinFunctionType):
+        if val.__self__ is None or isinstance(val.__self__, types.ModuleType):
+            return _clsname(val)  # not bound to an instance
+
+    raise _NoKey()
+
+
 class MtLinePlotterIndicator(Indicator.__class__):
     def donew(cls, *args, **kwargs):
         lname = kwargs.pop('name')
@@ -25,10 +25,18 @@ import functools
 import math
 import operator
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..errors import ModuleImportError
 from ..utils.py3 import map, range
 
 from . import Indicator
 
+NAN = float('NaN')
+
 
 class PeriodN(Indicator):
     '''
@@ -113,6 +121,20 @@ class Highest(OperationN):
     lines = ('highest',)
     func = max
 
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''
+        Calculates the indicator over the values in ``src`` for each of
+        ``periods`` in a single pass. ``minperiod`` is the minimum period of
+        the values in ``src``
+
+        Returns a 2-D numpy array (periods x len(src)) with the same values
+        the indicator would produce
+        '''
+        x, out = _npbatch(src, periods)
+        _npextremes(x, periods, minperiod - 1, out, max)
+        return out
+
 
 class Lowest(OperationN):
     '''
@@ -127,6 +149,13 @@ class Lowest(OperationN):
     lines = ('lowest',)
     func = min
 
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''See ``Highest.batch``'''
+        x, out = _npbatch(src, periods)
+        _npextremes(x, periods, minperiod - 1, out, min)
+        return out
+
 
 class ReduceN(OperationN):
     '''
@@ -171,6 +200,13 @@ class SumN(OperationN):
     lines = ('sumn',)
     func = math.fsum
 
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''See ``Highest.batch``'''
+        x, out = _npbatch(src, periods)
+        _npfsums(x, periods, minperiod - 1, out)
+        return out
+
 
 class AnyN(OperationN):
     '''
@@ -363,6 +399,13 @@ class Average(PeriodN):
         for i in range(start, end):
             dst[i] = math.fsum(src[i - period + 1:i + 1]) / period
 
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''See ``Highest.batch``'''
+        x, out = _npbatch(src, periods)
+        _npfsums(x, periods, minperiod - 1, out, mean=True)
+        return out
+
 
 class ExponentialSmoothing(Average):
     '''
@@ -411,6 +454,73 @@ class ExponentialSmoothing(Average):
         for i in range(start, end):
             larray[i] = prev = prev * alpha1 + darray[i] * alpha
 
+    def _batchparams(self, periods):
+        kwargs, pvalues = super(ExponentialSmoothing, self)._batchparams(
+            periods)
+
+        if self.p.alpha is None:
+            return kwargs, pvalues
+
+        # alpha can only follow the period for the known definitions
+        falphas = [f for f in (_emaalpha, _smmaalpha)
+                   if f(self.p.period) == self.p.alpha]
+        if len(falphas) != 1:
+            return None
+
+        ialpha = list(self.p._getkeys()).index('alpha')
+        for period, values in zip(periods, pvalues):
+            values[ialpha] = falphas[0](period)
+
+        kwargs['alphas'] = [falphas[0](period) for period in periods]
+        return kwargs, pvalues
+
+    @classmethod
+    def batch(cls, src, periods, minperiod=1, alphas=None):
+        '''
+        See ``Highest.batch``. ``alphas`` holds the ``alpha`` for each of
+        ``periods`` (defaults to the one calculated from the period)
+
+        The values of all periods are smoothed at the same time, bar by bar
+        '''
+        x, out = _npbatch(src, periods)
+        if alphas is None:
+            alphas = [_emaalpha(period) for period in periods]
+
+        first = minperiod - 1
+        order = sorted(range(len(periods)), key=lambda r: periods[r])
+        starts = [first + periods[r] - 1 for r in order]
+        alpha = np.array([alphas[r] for r in order])
+        alpha1 = 1.0 - alpha
+        outs = np.full(out.shape, NAN)  # rows ordered by period
+
+        # seed values are the average of the 1st period values
+        prev = np.full(len(order), NAN)
+        for i, r in enumerate(order):
+            if starts[i] < len(x):
+                outs[i, starts[i]] = prev[i] = \
+                    math.fsum(x[first:starts[i] + 1]) / periods[r]
+
+        k = 0  # rows with a seed value already in place
+        for i in range(starts[0] + 1 if order else len(x), len(x)):
+            while k < len(starts) and starts[k] < i:
+                k += 1
+
+            p = prev[:k]
+            p *= alpha1[:k]
+            p += x[i] * alpha[:k]
+            outs[:k, i] = p
+
+        out[order] = outs
+        return out
+
+
+def _emaalpha(period):
+    return 2.0 / (1.0 + period)
+
+
+def _smmaalpha(period):
+    return 1.0 / period
+
 
 class ExponentialSmoothingDynamic(ExponentialSmoothing):
     '''
@@ -492,3 +602,100 @@ class WeightedAverage(PeriodN):
         for i in range(start, end):
             data = darray[i - period + 1: i + 1]
             larray[i] = coef * math.fsum(map(operator.mul, data, weights))
+
+
+def _npbatch(src, periods):
+    if np is None:
+        raise ModuleImportError('numpy is needed for batch calculations')
+
+    x = np.array(src, dtype=np.float64)
+    return x, np.full((len(periods), len(x)), NAN)
+
+
+def _npexactints(xs, maxperiod):
+    # Scales the values to integers (exactly) with a common power of 2, such
+    # that the sum of maxperiod of them fits in an int64. Returns the
+    # integers and the power or (None, 0) if not possible
+    f, e = np.frexp(xs)
+    m = np.ldexp(f, 53).astype(np.int64)  # mantissas as integers
+    nz = m != 0
+    if not nz.any():
+        return np.zeros(len(xs), dtype=np.int64), 0
+
+    mnz = m[nz]
+    lowbit = (mnz & -mnz).astype(np.float64)  # power of 2 -> exact
+    exps = e[nz] - 53 + np.frexp(lowbit)[1] - 1
+    k = -int(exps.min())
+
+    with np.errstate(all='ignore'):
+        scaled = np.ldexp(xs, k)
+
+    if not np.all(np.abs(scaled) < 2.0 ** 62 / maxperiod):
+        return None, 0
+
+    return scaled.astype(np.int64), k
+
+
+def _npfsums(x, periods, first, out, mean=False):
+    # Fills the rows of out with the math.fsum of the windows of each period
+    # (divided by period if mean). The sums are done exactly with integers
+    # and rounded once, which is what math.fsum guarantees
+    xs = x[first:]
+    n = len(xs)
+    if not n:
+        return
+
+    nonfinite = ~np.isfinite(xs)
+    nbad = np.concatenate(([0], np.cumsum(nonfinite)))
+    ints, k = _npexactints(np.where(nonfinite, 0.0, xs), max(periods))
+    if ints is not None:
+        csum = np.concatenate(([0], np.cumsum(ints)))  # wraps but exact
+
+    for r, period in enumerate(periods):
+        if period > n:
+            continue
+
+        row = out[r, first:]
+        if ints is None:
+            fix = range(period - 1, n)
+        else:
+            wsum = csum[period:] - csum[:-period]
+            vals = np.ldexp(wsum.astype(np.float64), -k)
+            row[period - 1:] = vals / period if mean else vals
+
+            # non-finite values and zero sums (sign) as math.fsum does
+            bad = (nbad[period:] - nbad[:-period] > 0) | (wsum == 0)
+            fix = np.flatnonzero(bad) + period - 1
+
+        for i in fix:
+            val = math.fsum(xs[i - period + 1:i + 1])
+            row[i] = val / period if mean else val
+
+
+def _npextremes(x, periods, first, out, func):
+    # Fills the rows of out with func (max/min) of the windows of each
+    # period. The extremes for period + 1 are those of period extended with
+    # the value which precedes the window
+    npfunc = np.maximum if func is max else np.minimum
+    xs = x[first:]
+    n = len(xs)
+    nnan = np.concatenate(([0], np.cumsum(np.isnan(xs))))
+
+    acc = xs.copy()
+    q = 1
+    for r in sorted(range(len(periods)), key=lambda r: periods[r]):
+        period = periods[r]
+        if period > n:
+            break
+
+        while q < period:
+            npfunc(acc[q:], xs[:-q], out=acc[q:])
+            q += 1
+
+        row = out[r, first:]
+        row[period - 1:] = acc[period - 1:]
+
+        # nan and signed zeros depend on the order for the built-ins
+        bad = (nnan[period:] - nnan[:-period] > 0) | (acc[period - 1:] == 0)
+        for i in np.flatnonzero(bad) + period - 1:
+            row[i] = func(xs[i - period + 1:i + 1])
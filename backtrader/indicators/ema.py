@@ -53,3 +53,13 @@ class ExponentialMovingAverage(MovingAverageBase):
         self.alpha, self.alpha1 = es.alpha, es.alpha1
 
         super(ExponentialMovingAverage, self).__init__()
+
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''
+        Calculates the moving average of ``src`` for each of ``periods`` in a
+        single pass (see ``ExponentialSmoothing.batch``)
+        '''
+        alphas = [2.0 / (1.0 + period) for period in periods]
+        return ExponentialSmoothing.batch(src, periods, minperiod=minperiod,
+                                          alphas=alphas)
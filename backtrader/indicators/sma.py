@@ -43,3 +43,11 @@ class MovingAverageSimple(MovingAverageBase):
         self.lines[0] = Average(self.data, period=self.p.period)
 
         super(MovingAverageSimple, self).__init__()
+
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''
+        Calculates the moving average of ``src`` for each of ``periods`` in a
+        single pass (see ``Average.batch``)
+        '''
+        return Average.batch(src, periods, minperiod=minperiod)
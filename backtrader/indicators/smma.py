@@ -56,3 +56,13 @@ class SmoothedMovingAverage(MovingAverageBase):
             period=self.p.period,
             alpha=1.0 / self.p.period)
         super(SmoothedMovingAverage, self).__init__()
+
+    @classmethod
+    def batch(cls, src, periods, minperiod=1):
+        '''
+        Calculates the moving average of ``src`` for each of ``periods`` in a
+        single pass (see ``ExponentialSmoothing.batch``)
+        '''
+        alphas = [1.0 / period for period in periods]
+        return ExponentialSmoothing.batch(src, periods, minperiod=minperiod,
+                                          alphas=alphas)
@@ -36,17 +36,58 @@ import collections
 import datetime
 from itertools import islice
 import math
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy line storage will not be available
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None  # Python < 3.8
 
 from .utils.py3 import range, with_metaclass, string_types
 
 from .lineroot import LineRoot, LineSingle, LineMultiple
 from . import metabase
+from .errors import ModuleImportError
 from .utils import num2date, time2num
+from .utils.dateintern import (HOURS_PER_DAY, MINUTES_PER_HOUR,
+                               SECONDS_PER_MINUTE, MUSECONDS_PER_SECOND,
+                               MUSECONDS_PER_DAY)
 
 
 NAN = float('NaN')
 
 
+if np is not None:
+    # ufuncs with the same results as the operator applied to numpy.float64
+    # values, used by the "once" methods if the storage is numpy. "pow" is
+    # left out because np.power may differ in the last digit from "**"
+    NPOPS = {
+        operator.add: np.add,
+        operator.sub: np.subtract,
+        operator.mul: np.multiply,
+        operator.truediv: np.true_divide,
+        operator.floordiv: np.floor_divide,
+        operator.lt: np.less,
+        operator.le: np.less_equal,
+        operator.gt: np.greater,
+        operator.ge: np.greater_equal,
+        operator.eq: np.equal,
+        operator.ne: np.not_equal,
+        operator.abs: np.absolute,
+        operator.neg: np.negative,
+    }
+else:
+    NPOPS = dict()
+
+NPCMPOPS = (operator.lt, operator.le, operator.gt, operator.ge,
+            operator.eq, operator.ne)
+
+
 class LineBuffer(LineSingle):
     '''
     LineBuffer defines an interface to an "array.array" (or list) in which
@@ -68,16 +109,47 @@ class LineBuffer(LineSingle):
     The class can also hold "bindings" to other LineBuffers. When a value
     is set in this class
     it will also be set in the binding.
+
+    Unbounded buffers can alternatively be stored in a preallocated
+    ``numpy.ndarray`` (see ``usestorage``). In that case ``array`` is a
+    zero-copy view over the filled part of the preallocated buffer
     '''
 
     UnBounded, QBuffer = (0, 1)
 
+    _storage = None  # None -> array.array, 'numpy' -> numpy.ndarray
+    _sizehint = 0  # preallocation size for numpy storage
+
+    _shm = None  # shared memory block holding the values if any
+    _DTCACHESIZE = 16  # memoized datetime conversions
+    _shmowner = False  # True if the block was created by this buffer
+
+    @classmethod
+    def usestorage(cls, storage=None):
+        '''Sets the storage for unbounded buffers created (or reset) after the
+        call: ``None`` for ``array.array`` and ``'numpy'`` for ``numpy``
+        '''
+        if storage not in (None, 'numpy'):
+            raise ValueError('Unknown line storage: %s' % storage)
+
+        if storage == 'numpy' and np is None:
+            raise ModuleImportError('numpy is needed for numpy line storage')
+
+        cls._storage = storage
+        cls._sizehint = 0
+
+    @classmethod
+    def sizehint(cls, size):
+        '''Numpy backed buffers will preallocate ``size`` positions'''
+        cls._sizehint = size
+
     def __init__(self):
         self.lines = [self]
         self.mode = self.UnBounded
         self.bindings = list()
         self.reset()
         self._tz = None
+        self._dtcache = dict()
 
     def get_idx(self):
         return self._idx
@@ -110,9 +182,15 @@ class LineBuffer(LineSingle):
             # allows the forward without removing that bar
             self.array = collections.deque(maxlen=self.maxlen + self.extrasize)
             self.useislice = True
+            self._nparray = None
+        elif self._storage == 'numpy':
+            self._nparray = np.empty(self._sizehint)
+            self.array = self._nparray[:0]
+            self.useislice = False
         else:
             self.array = array.array(str('d'))
             self.useislice = False
+            self._nparray = None
 
         self.lencount = 0
         self.idx = -1
@@ -125,6 +203,113 @@ class LineBuffer(LineSingle):
         self.lenmark = self.maxlen - (not self.extrasize)
         self.reset()
 
+    def _npresize(self, size, value=NAN):
+        '''Resizes the numpy view by ``size`` positions (can be negative),
+        growing the preallocated buffer if needed. New positions take
+        ``value``'''
+        buf = self._nparray
+        start = len(self.array)
+        end = start + size
+        if end > len(buf):
+            # grow geometrically to keep appends amortized
+            self._nparray = np.empty(max(end, 2 * len(buf), 16))
+            self._nparray[:start] = buf[:start]
+            buf = self._nparray
+
+        if size > 0:
+            buf[start:end] = value
+
+        self.array = buf[:end]
+
+    def shmshare(self):
+        '''Moves the values of the buffer to a shared memory block. When
+        pickled (for example to be sent to an optimization worker) the buffer
+        is not copied, and the receiving process attaches a read-only numpy
+        view to the same block'''
+        if shared_memory is None or np is None:
+            raise ModuleImportError(
+                'numpy and multiprocessing.shared_memory are needed to '
+                'share lines')
+
+        if self._shm is not None or _mmapsource(self.array) is not None:
+            return  # already shared (the mapped file is pickled by position)
+
+        size = len(self.array)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+        shmarray = np.ndarray(size, dtype=np.float64, buffer=shm.buf)
+        shmarray[:] = self.array
+
+        self._shmstorage = self._nparray is not None
+        self._shm, self._shmowner = shm, True
+        self._nparray = shmarray
+        self.array = shmarray[:]
+
+    def shmrelease(self):
+        '''Moves the values back to private storage and releases the shared
+        memory block, which is destroyed if created by this buffer'''
+        shm = self._shm
+        if shm is None:
+            return
+
+        if self._shmowner and not self._shmstorage:
+            self._nparray = None
+            self.array = array.array(str('d'), self.array)
+        else:
+            self._nparray = np.array(self.array)
+            self.array = self._nparray[:]
+
+        self._shm = None
+        try:
+            shm.close()
+        except BufferError:
+            pass  # views still alive somewhere, unmapped when collected
+
+        if self._shmowner:
+            shm.unlink()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        shm = state.pop('_shm', None)
+        if shm is not None and self._shmowner:
+            # only the name travels, the receiver attaches to the block
+            state['_shm'] = (shm.name, len(self.array))
+            del state['array']
+            del state['_nparray']
+
+        elif state.get('_nparray') is not None:
+            mmap = _mmapsource(self.array)
+            if mmap is not None:
+                # only the file position travels, the receiver maps it too
+                state['_mmap'] = mmap
+                del state['_nparray']
+            else:
+                # pickle only the used part and rebuild the view on unpickling
+                state['_nparray'] = self.array
+            del state['array']
+
+        return state
+
+    def __setstate__(self, state):
+        shmname = state.pop('_shm', None)
+        mmap = state.pop('_mmap', None)
+        self.__dict__.update(state)
+        if mmap is not None:
+            filename, offset, size = mmap
+            self._nparray = self.array = np.memmap(
+                filename, dtype=np.dtype(str('<f8')), mode='c',
+                offset=offset, shape=(size,))
+
+        elif shmname is not None:
+            name, size = shmname
+            self._shm = shm = _shmattach(name)
+            self._shmowner = False
+            self._nparray = np.ndarray(size, dtype=np.float64, buffer=shm.buf)
+            self._nparray.flags.writeable = False  # shared with others
+            self.array = self._nparray[:]
+
+        elif self.__dict__.get('_nparray') is not None:
+            self.array = self._nparray[:]
+
     def getindicators(self):
         return []
 
@@ -254,9 +439,45 @@ class LineBuffer(LineSingle):
         self.idx += size
         self.lencount += size
 
+        if self._nparray is not None:
+            self._npresize(size, value)
+            return
+
         for i in range(size):
             self.array.append(value)
 
+    def forwardvalues(self, values):
+        ''' Moves the logical index forward as many positions as ``values``
+        has, taking the values in the new positions
+
+        Keyword Args:
+            values (sequence): values for the new positions
+        '''
+        if self.mode == self.QBuffer:
+            for value in values:
+                self.forward(value)
+            return
+
+        size = len(values)
+        self.idx += size
+        self.lencount += size
+
+        if self._nparray is not None:
+            if not len(self.array) and isinstance(values, np.memmap) and \
+               values.dtype == np.float64:
+                # use the (copy-on-write) mapped file, which can be shared
+                self._nparray = self.array = values
+                return
+
+            start = len(self.array)
+            self._npresize(size)
+            self.array[start:] = values
+        elif np is not None and isinstance(values, np.ndarray):
+            self.array.frombytes(
+                np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        else:
+            self.array.extend(values)
+
     def backwards(self, size=1, force=False):
         ''' Moves the logical index backwards and reduces the buffer as much as needed
 
@@ -267,6 +488,10 @@ class LineBuffer(LineSingle):
         # Go directly to property setter to support force
         self.set_idx(self._idx - size, force=force)
         self.lencount -= size
+        if self._nparray is not None:
+            self._npresize(-size)
+            return
+
         for i in range(size):
             self.array.pop()
 
@@ -294,9 +519,29 @@ class LineBuffer(LineSingle):
         set values in the buffer "future"
         '''
         self.extension += size
+        if self._nparray is not None:
+            self._npresize(size, value)
+            return
+
         for i in range(size):
             self.array.append(value)
 
+    def setview(self, src, start, end):
+        ''' Makes the buffer hold the values of ``src`` from ``start`` to
+        ``end`` and rewinds the logical index
+
+        If ``src`` has numpy storage, the values are a view on the ones in
+        ``src`` (no copy)
+        '''
+        if src._nparray is not None:
+            self._nparray = self.array = src.array[start:end]
+        else:
+            self._nparray = None
+            self.array = array.array(str('d'), src.array[start:end])
+
+        self.extension = 0
+        self.home()
+
     def addbinding(self, binding):
         ''' Adds another line binding
 
@@ -384,16 +629,30 @@ class LineBuffer(LineSingle):
         self._tz = tz
 
     def datetime(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive)
+        # the conversions of the last few values are memoized, because the
+        # same bar is usually asked for several times (logging, sessions)
+        x = self.array[self.idx + ago]
+        tz = tz or self._tz
+        key = (x, tz, naive)
+        cache = self._dtcache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:  # unhashable tz
+            return num2date(x, tz=tz, naive=naive)
+
+        if len(cache) >= self._DTCACHESIZE:
+            cache.clear()
+
+        cache[key] = dt = num2date(x, tz=tz, naive=naive)
+        return dt
 
     def date(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive).date()
+        return self.datetime(ago, tz=tz, naive=naive).date()
 
     def time(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive).time()
+        return self.datetime(ago, tz=tz, naive=naive).time()
 
     def dt(self, ago=0):
         '''
@@ -496,6 +755,43 @@ class LineBuffer(LineSingle):
         return num2date(int(self.array[self.idx + ago]) + tm)
 
 
+def _mmapsource(arr):
+    '''Returns ``(filename, offset, size)`` if ``arr`` is a contiguous view
+    on a file mapped with ``numpy.memmap`` and ``None`` otherwise'''
+    if np is None or not isinstance(arr, np.memmap):
+        return None
+
+    root = arr
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+
+    if not isinstance(root, np.memmap) or root.filename is None or \
+       not arr.flags.c_contiguous or arr.dtype != np.float64:
+        return None
+
+    offset = root.offset + (arr.ctypes.data - root.ctypes.data)
+    return root.filename, offset, len(arr)
+
+
+def _shmattach(name):
+    '''Attaches to an existing shared memory block, keeping the resource
+    tracker from destroying it when the attaching process ends'''
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13, no "track" parameter
+        pass
+
+    # The tracker may be shared with the creator of the block (which will
+    # unregister it when unlinking): skip registering rather than unregister
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
 class MetaLineActions(LineBuffer.__class__):
     '''
     Metaclass for Lineactions
@@ -722,6 +1018,9 @@ class LinesOperation(LineActions):
     No real execution time benefits were appreciated and therefore the loops
     have been kept in place for clarity (although the maps are not really
     unclear here)
+
+    With numpy storage, standard operations (arithmetic and comparisons) are
+    applied with a single ``ufunc`` over the ``start:end`` slice
     '''
 
     def __init__(self, a, b, operation, r=False):
@@ -739,6 +1038,11 @@ class LinesOperation(LineActions):
         if r:
             self.a, self.b = b, a
 
+        # vectorized version of the operation if storage allows it
+        self.npop = None
+        if self._nparray is not None:
+            self.npop = NPOPS.get(operation, None)
+
     def next(self):
         if self.bline:
             self[0] = self.operation(self.a[0], self.b[0])
@@ -768,6 +1072,11 @@ class LinesOperation(LineActions):
         srcb = self.b.array
         op = self.operation
 
+        if self.npop is not None:
+            with np.errstate(all='ignore'):
+                dst[start:end] = self.npop(srca[start:end], srcb[start:end])
+            return
+
         for i in range(start, end):
             dst[i] = op(srca[i], srcb[i])
 
@@ -779,6 +1088,14 @@ class LinesOperation(LineActions):
         op = self.operation
         tz = self._tz
 
+        if self.npop is not None and tz is None and op in NPCMPOPS:
+            # compare the times as microseconds in the day
+            bsecs = (srcb.hour * 60 + srcb.minute) * 60 + srcb.second
+            bmusecs = bsecs * 1000000 + srcb.microsecond
+            dst[start:end] = self.npop(_nptime2musecs(srca[start:end]),
+                                       bmusecs)
+            return
+
         for i in range(start, end):
             dst[i] = op(num2date(srca[i], tz=tz).time(), srcb)
 
@@ -789,6 +1106,11 @@ class LinesOperation(LineActions):
         srcb = self.b
         op = self.operation
 
+        if self.npop is not None and isinstance(srcb, (int, float)):
+            with np.errstate(all='ignore'):
+                dst[start:end] = self.npop(srca[start:end], srcb)
+            return
+
         for i in range(start, end):
             dst[i] = op(srca[i], srcb)
 
@@ -799,10 +1121,33 @@ class LinesOperation(LineActions):
         srcb = self.b.array
         op = self.operation
 
+        if self.npop is not None and isinstance(srca, (int, float)):
+            with np.errstate(all='ignore'):
+                dst[start:end] = self.npop(srca, srcb[start:end])
+            return
+
         for i in range(start, end):
             dst[i] = op(srca, srcb[i])
 
 
+def _nptime2musecs(x):
+    '''Vectorized ``num2date(x).time()`` expressed as microseconds in the day.
+    Follows the same steps and rounding compensations as ``num2date``'''
+    remainder = x - np.trunc(x)
+    hour, remainder = np.divmod(HOURS_PER_DAY * remainder, 1)
+    minute, remainder = np.divmod(MINUTES_PER_HOUR * remainder, 1)
+    second, remainder = np.divmod(SECONDS_PER_MINUTE * remainder, 1)
+    musecond = np.trunc(MUSECONDS_PER_SECOND * remainder)
+    musecond[musecond < 10] = 0.0
+
+    secs = (hour * MINUTES_PER_HOUR + minute) * SECONDS_PER_MINUTE + second
+    musecs = secs * MUSECONDS_PER_SECOND + musecond
+    # num2date rounds up to the next second (and day) for these
+    roundup = musecond > 999990
+    musecs[roundup] += MUSECONDS_PER_SECOND - musecond[roundup]
+    return np.mod(musecs, MUSECONDS_PER_DAY)
+
+
 class LineOwnOperation(LineActions):
     '''
     Holds an operation that operates on a single operand. Example: abs
@@ -816,6 +1161,11 @@ class LineOwnOperation(LineActions):
         self.operation = operation
         self.a = a
 
+        # vectorized version of the operation if storage allows it
+        self.npop = None
+        if self._nparray is not None:
+            self.npop = NPOPS.get(operation, None)
+
     def next(self):
         self[0] = self.operation(self.a[0])
 
@@ -825,5 +1175,9 @@ class LineOwnOperation(LineActions):
         srca = self.a.array
         op = self.operation
 
+        if self.npop is not None:
+            dst[start:end] = self.npop(srca[start:end])
+            return
+
         for i in range(start, end):
             dst[i] = op(srca[i])
@@ -21,7 +21,6 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import collections
 from copy import copy
 import datetime
 import itertools
@@ -58,6 +57,10 @@ class OrderExecutionBit(object):
       - pprice: current open position price
 
     '''
+    # one bit per execution: slots keep them small and fast to create
+    __slots__ = ('dt', 'size', 'price', 'closed', 'opened',
+                 'closedvalue', 'openedvalue', 'closedcomm', 'openedcomm',
+                 'value', 'comm', 'pnl', 'psize', 'pprice')
 
     def __init__(self,
                  dt=None, size=0, price=0.0,
@@ -114,11 +117,11 @@ class OrderData(object):
       - pprice: current open position price
 
     '''
-    # According to the docs, collections.deque is thread-safe with appends at
-    # both ends, there will be no pop (nowhere) and therefore to know which the
-    # new exbits are two indices are needed. At time of cloning (__copy__) the
-    # indices can be updated to match the previous end, and the new end
-    # (len(exbits)
+    # Appends to a list are atomic (as they are at both ends of a deque, which
+    # takes ten times the memory when empty), there will be no pop (nowhere)
+    # and therefore to know which the new exbits are two indices are needed.
+    # At time of cloning (__copy__) the indices can be updated to match the
+    # previous end, and the new end (len(exbits)
     # Example: start 0, 0 -> islice(exbits, 0, 0) -> []
     # One added -> copy -> updated 0, 1 -> islice(exbits, 0, 1) -> [1 elem]
     # Other added -> copy -> updated 1, 2 -> islice(exbits, 1, 2) -> [1 elem]
@@ -127,11 +130,17 @@ class OrderData(object):
     # the len of the exbits can be queried with no concerns about another
     # thread making an append and with no need for a lock
 
+    # two per order and a copy with each notification (see clone)
+    __slots__ = ('pclose', 'exbits', 'p1', 'p2', 'dt', 'size', 'remsize',
+                 'price', 'pricelimit', 'trailamount', 'trailpercent',
+                 '_plimit', 'value', 'comm', 'margin', 'pnl', 'psize',
+                 'pprice')
+
     def __init__(self, dt=None, size=0, price=0.0, pricelimit=0.0, remsize=0,
                  pclose=0.0, trailamount=0.0, trailpercent=0.0):
 
         self.pclose = pclose
-        self.exbits = collections.deque()  # for historical purposes
+        self.exbits = list()  # for historical purposes
         self.p1, self.p2 = 0, 0  # indices to pending notifications
 
         self.dt = dt
@@ -218,6 +227,15 @@ class OrderData(object):
         obj = copy(self)
         return obj
 
+    def __copy__(self):
+        # shallow: the exbits are shared, p1/p2 delimit the new ones
+        cls = self.__class__
+        obj = cls.__new__(cls)
+        for name in OrderData.__slots__:
+            setattr(obj, name, getattr(self, name))
+
+        return obj
+
 
 class OrderBase(with_metaclass(MetaParams, object)):
     params = (
@@ -271,6 +289,13 @@ class OrderBase(with_metaclass(MetaParams, object)):
         # Return attr from params if not found in order
         return getattr(self.params, name)
 
+    def __copy__(self):
+        # the snapshot of each notification (see clone)
+        cls = self.__class__
+        obj = cls.__new__(cls)
+        obj.__dict__.update(self.__dict__)
+        return obj
+
     def __setattribute__(self, name, value):
         if hasattr(self.params, name):
             setattr(self.params, name, value)
@@ -300,6 +325,11 @@ class OrderBase(with_metaclass(MetaParams, object)):
         return '\n'.join(tojoin)
 
     def __init__(self):
+        # the most read params, found in the instance they skip __getattr__
+        p = self.p
+        self.data, self.owner, self.parent = p.data, p.owner, p.parent
+        self.tradeid, self.exectype = p.tradeid, p.exectype
+
         self.ref = next(self.refbasis)
         self.broker = None
         self.info = AutoOrderedDict()
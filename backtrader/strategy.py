@@ -92,6 +92,7 @@ class MetaStrategy(StrategyBase.__class__):
         _obj._slave_analyzers = list()
 
         _obj._tradehistoryon = False
+        _obj.tradeledger = None
 
         return _obj, args, kwargs
 
@@ -113,6 +114,7 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
 
     csv = True
     _oldsync = False  # update clock using old methodology : data 0
+    pruned = False  # set if a cerebro progress callback stopped the run
 
     # keep the latest delivered data date in the line
     lines = ('datetime',)
@@ -495,6 +497,26 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
     def set_tradehistory(self, onoff=True):
         self._tradehistoryon = onoff
 
+    def set_tradeledger(self, ledger=True):
+        '''Records the closed trades in ``self.tradeledger`` and releases the
+        ``Trade`` objects once they have been notified
+
+        ``ledger`` can be ``True`` (a ``TradeLedger`` keeping the rows in
+        memory), a ``TradeLedger`` instance or ``None``/``False`` to stop
+        recording
+        '''
+        if ledger is True:
+            ledger = bt.TradeLedger()
+        elif ledger is False:
+            ledger = None
+
+        self.tradeledger = ledger
+
+    def _closetrade(self, trade, datatrades):
+        if self.tradeledger is not None:
+            self.tradeledger.add(trade)
+            datatrades.pop()  # the last one, the notifications keep a copy
+
     def clear(self):
         self._orders.extend(self._orderspending)
         self._orderspending = list()
@@ -542,6 +564,7 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
                     self._tradespending.append(copy.copy(trade))
                     if quicknotify:
                         qtrades.append(copy.copy(trade))
+                    self._closetrade(trade, datatrades)
 
             # Update it if needed
             if exbit.opened:
@@ -565,6 +588,7 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
                     self._tradespending.append(copy.copy(trade))
                     if quicknotify:
                         qtrades.append(copy.copy(trade))
+                    self._closetrade(trade, datatrades)
 
             if trade.justopened:
                 self._tradespending.append(copy.copy(trade))
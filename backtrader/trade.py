@@ -21,7 +21,13 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
+import collections
+import io
 import itertools
+import os
+import struct
+import sys
 
 from .utils import AutoOrderedDict
 from .utils.date import num2date
@@ -136,6 +142,10 @@ class Trade(object):
           or use the platform provided ``num2date`` method
 
       - ``barlen`` (``int``): number of bars this trade was open
+      - ``sizeopened`` (``int``): accumulated size of the updates which
+        opened or increased the trade
+      - ``priceclosed`` (``float``): average price of the updates which
+        reduced or closed the trade
       - ``historyon`` (``bool``): whether history has to be recorded
       - ``history`` (``list``): holds a list updated with each "update" event
         containing the resulting status and parameters used in the update
@@ -186,6 +196,9 @@ class Trade(object):
         self.dtclose = 0.0
         self.barlen = 0
 
+        self.sizeopened = 0
+        self.priceclosed = 0.0
+
         self.historyon = historyon
         self.history = list()
 
@@ -289,12 +302,19 @@ class Trade(object):
             # position increased (be it positive or negative)
             # update the average price
             self.price = (oldsize * self.price + size * price) / self.size
+            self.sizeopened += size
             pnl = 0.0
 
         else:  # abs(self.size) < abs(oldsize)
             # position reduced/closed
             pnl = comminfo.profitandloss(-size, self.price, price)
 
+            # closed size before/after the update to average the exit price
+            closed0 = self.sizeopened - oldsize
+            closed1 = self.sizeopened - self.size
+            self.priceclosed = \
+                (closed0 * self.priceclosed - size * price) / closed1
+
         self.pnl += pnl
         self.pnlcomm = self.pnl - self.commission
 
@@ -309,3 +329,144 @@ class Trade(object):
                 self.pnl, self.pnlcomm, self.data._tz)
             histentry.doupdate(order, size, price, commission)
             self.history.append(histentry)
+
+
+class TradeLedger(object):
+    '''Keeps the closed trades as rows of a columnar store (one
+    ``array.array`` per field) instead of keeping the ``Trade`` objects
+    (with their history) alive
+
+    Fields of a row (see ``Trade`` for the meaning):
+
+      - ``ref``, ``data`` (index in ``datanames``), ``tradeid`` (integer)
+      - ``long`` (``1`` for a long trade, ``0`` for a short one)
+      - ``dtopen``, ``dtclose``, ``baropen``, ``barclose``, ``barlen``
+      - ``size``: accumulated opening size (``Trade.sizeopened``)
+      - ``price``: average entry price, ``priceclosed``: average exit price
+      - ``pnl``, ``pnlcomm``, ``commission``
+
+    Params:
+
+      - ``path`` (default: ``None``): file to which the rows are moved
+        (appended in blocks of ``maxrows``) to keep the memory bounded.
+        ``None`` keeps all rows in memory. Its directory is created if
+        needed
+
+      - ``maxrows`` (default: ``65536``): rows kept in memory before they
+        are moved to ``path``
+
+    The rows are seen as a whole with ``len``, iteration (``TradeRecord``
+    named tuples), ``column`` and ``columns``
+    '''
+    FIELDS = (
+        ('ref', 'q'), ('data', 'q'), ('tradeid', 'q'), ('long', 'q'),
+        ('dtopen', 'd'), ('dtclose', 'd'),
+        ('baropen', 'q'), ('barclose', 'q'), ('barlen', 'q'),
+        ('size', 'd'), ('price', 'd'), ('priceclosed', 'd'),
+        ('pnl', 'd'), ('pnlcomm', 'd'), ('commission', 'd'),
+    )
+
+    TradeRecord = collections.namedtuple(
+        'TradeRecord', [name for name, _ in FIELDS])
+
+    BLOCKHEADER = struct.Struct(str('<q'))  # rows in the block
+
+    def __init__(self, path=None, maxrows=65536):
+        self.path = path
+        self.maxrows = maxrows
+        if path is not None:  # fail now rather than with the 1st spill
+            dirname = os.path.dirname(path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+        self.datanames = list()
+        self._dataidx = dict()
+        self._spilled = 0  # rows in path
+        self._cols = self._newcols()
+
+    def _newcols(self):
+        return [array.array(str(tcode)) for _, tcode in self.FIELDS]
+
+    def __len__(self):
+        return self._spilled + len(self._cols[0])
+
+    def add(self, trade):
+        '''Adds a row for the (closed) ``trade``'''
+        data = trade.data
+        try:
+            didx = self._dataidx[data]
+        except KeyError:
+            didx = self._dataidx[data] = len(self.datanames)
+            self.datanames.append(getattr(data, '_name', None) or str(didx))
+
+        row = (trade.ref, didx, trade.tradeid, trade.sizeopened > 0,
+               trade.dtopen, trade.dtclose,
+               trade.baropen, trade.barclose, trade.barlen,
+               trade.sizeopened, trade.price, trade.priceclosed,
+               trade.pnl, trade.pnlcomm, trade.commission)
+
+        for col, value in zip(self._cols, row):
+            col.append(value)
+
+        if self.path is not None and len(self._cols[0]) >= self.maxrows:
+            self.spill()
+
+    def spill(self):
+        '''Moves the rows in memory to ``path``'''
+        nrows = len(self._cols[0])
+        if self.path is None or not nrows:
+            return
+
+        with io.open(self.path, 'ab' if self._spilled else 'wb') as f:
+            f.write(self.BLOCKHEADER.pack(nrows))
+            for col in self._cols:
+                if sys.byteorder != 'little':
+                    col.byteswap()
+                col.tofile(f)
+
+        self._spilled += nrows
+        self._cols = self._newcols()
+
+    def _blocks(self):
+        # the blocks in path and then the rows in memory
+        if self._spilled:
+            with io.open(self.path, 'rb') as f:
+                while True:
+                    hdr = f.read(self.BLOCKHEADER.size)
+                    if not hdr:
+                        break
+
+                    nrows, = self.BLOCKHEADER.unpack(hdr)
+                    cols = self._newcols()
+                    for col in cols:
+                        col.fromfile(f, nrows)
+                        if sys.byteorder != 'little':
+                            col.byteswap()
+
+                    yield cols
+
+        yield self._cols
+
+    def column(self, name):
+        '''Returns an ``array.array`` with the values of field ``name``'''
+        idx = [fname for fname, _ in self.FIELDS].index(name)
+        values = array.array(self._cols[idx].typecode)
+        for cols in self._blocks():
+            values.extend(cols[idx])
+
+        return values
+
+    def columns(self):
+        '''Returns an ``OrderedDict`` with an ``array.array`` per field'''
+        values = self._newcols()
+        for cols in self._blocks():
+            for col, bcol in zip(values, cols):
+                col.extend(bcol)
+
+        return collections.OrderedDict(
+            (name, col) for (name, _), col in zip(self.FIELDS, values))
+
+    def __iter__(self):
+        for cols in self._blocks():
+            for row in zip(*cols):
+                yield self.TradeRecord(*row)
@@ -25,6 +25,11 @@ import datetime
 import math
 import time as _time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from .py3 import string_types
 
 
@@ -227,6 +232,97 @@ def date2num(dt, tz=None):
     return base
 
 
+def date2num_array(dts):
+    """
+    Vectorized :func:`date2num` for a :mod:`numpy` array of ``datetime64``
+    values (naive, or already in UTC). ``NaT`` values are converted to
+    ``nan``
+
+    The results are identical to those of :func:`date2num` (the fields are
+    summed exactly and rounded once, like :func:`math.fsum` does)
+    """
+    us = np.asarray(dts).astype('datetime64[us]').view(np.int64)
+    nat = us == np.iinfo(np.int64).min
+
+    days, tod = np.divmod(us, 86400 * 10 ** 6)
+    tod, musecs = np.divmod(tod, 10 ** 6)
+    tod, secs = np.divmod(tod, 60)
+    hours, mins = np.divmod(tod, 60)
+
+    terms = (days + _ORDINAL_EPOCH).astype(np.float64), \
+        hours / HOURS_PER_DAY, mins / MINUTES_PER_DAY, \
+        secs / SECONDS_PER_DAY, musecs / MUSECONDS_PER_DAY
+
+    # error free transformations: the exact sum is base + the errors
+    base, errs = terms[-1], list()
+    for term in reversed(terms[:-1]):
+        base, err = _twosum(term, base)
+        errs.append(err)
+
+    errsum = errs[0]
+    for err in errs[1:]:
+        errsum = errsum + err
+
+    base, err = _twosum(base, errsum)
+    # base is the exact sum rounded, unless the remaining error (err plus the
+    # error made summing the errors, which is tiny) is too close to a tie
+    tol = np.spacing(base) * 2.0 ** -40
+    up = np.nextafter(base, np.inf) - base
+    down = base - np.nextafter(base, -np.inf)
+    dubious = np.flatnonzero(((err >= 0.0) & (err >= up / 2.0 - tol)) |
+                             ((err < 0.0) & (-err >= down / 2.0 - tol)))
+
+    for i in dubious:
+        base[i] = math.fsum(float(term[i]) for term in terms)
+
+    base[nat] = float('nan')
+    return base
+
+
+def num2date_array(xs, tz=None, naive=True):
+    """
+    Vectorized :func:`num2date` for a sequence of float days. Returns a
+    :mod:`numpy` array of ``datetime64[us]`` values (``nan`` gives ``NaT``)
+
+    Without ``tz`` the values are those of :func:`num2date` (same float
+    operations and rounding compensation). With ``tz`` the values are
+    converted one by one to the (naive) local time of ``tz``
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    nan = np.isnan(xs)
+    if tz is not None:
+        return np.array(
+            ['NaT' if isnan else num2date(x, tz=tz).replace(tzinfo=None)
+             for x, isnan in zip(xs.tolist(), nan.tolist())],
+            dtype='datetime64[us]')
+
+    x = np.where(nan, 1.0, xs)
+    ix = np.trunc(x)
+    hour, rem = np.divmod(HOURS_PER_DAY * (x - ix), 1.0)
+    minute, rem = np.divmod(MINUTES_PER_HOUR * rem, 1.0)
+    second, rem = np.divmod(SECONDS_PER_MINUTE * rem, 1.0)
+    musecs = np.trunc(MUSECONDS_PER_SECOND * rem).astype(np.int64)
+    musecs[musecs < 10] = 0  # compensate for rounding errors
+    up = musecs > 999990
+    musecs[up] = 10 ** 6  # carried to the next second
+
+    days = ix.astype(np.int64) - _ORDINAL_EPOCH
+    us = ((days * 24 + hour.astype(np.int64)) * 60 +
+          minute.astype(np.int64)) * 60 + second.astype(np.int64)
+    us = us * 10 ** 6 + musecs
+    us[nan] = np.iinfo(np.int64).min  # NaT
+    return us.view('datetime64[us]')
+
+
+def _twosum(a, b):
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
+_ORDINAL_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
 def time2num(tm):
     """
     Converts the hour/minute/second/microsecond part of tm (datetime.datetime
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import bisect
+import collections
+import copy
+import itertools
+import math
+
+from .analyzer import Analyzer
+from .cerebro import OptResult
+from .feed import DataWindow
+from .linebuffer import LineBuffer
+from .metabase import MetaParams
+from .utils.py3 import with_metaclass, zip
+
+
+__all__ = ['WalkForward', 'WalkForwardWindow']
+
+
+class WalkForwardWindow(object):
+    '''Result of a walk-forward window
+
+    Attributes:
+
+      - ``insample``: ``(fromdate, todate)`` of the in-sample period
+      - ``outsample``: ``(fromdate, todate)`` of the out-of-sample period
+      - ``params``: dictionary with the best parameters found in-sample
+      - ``score``: in-sample objective value of ``params``
+      - ``scores``: list of ``(params, score)`` for all in-sample combinations
+      - ``strategy``: strategy run out-of-sample with ``params``
+      - ``equity``: list of ``(datetime, value)`` of the out-of-sample run
+    '''
+    def __init__(self, insample, outsample, params, score, scores):
+        self.insample = insample
+        self.outsample = outsample
+        self.params = params
+        self.score = score
+        self.scores = scores
+        self.strategy = None
+        self.equity = list()
+
+
+class _EquityCurve(Analyzer):
+    def next(self):
+        self.rets[self.strategy.datetime.datetime()] = \
+            self.strategy.broker.getvalue()
+
+
+class WalkForward(with_metaclass(MetaParams, object)):
+    '''Walk-forward optimization driver
+
+    The datas, broker, sizers, analyzers ... of the given ``cerebro`` are
+    used as a template. The datas are loaded once and each window gets a view
+    on the preloaded buffers (see ``DataWindow``), hence nothing is re-read
+    from disk
+
+    For each window the strategy added with ``optstrategy`` is optimized
+    over the in-sample bars (with ``Cerebro.optstrategy``, in parallel if so
+    configured with the arguments to ``run``) and the combination with the
+    best ``objective`` is then run over the out-of-sample bars which follow.
+    The out-of-sample equity curves are stitched in ``equity``
+
+    Example::
+
+      cerebro = bt.Cerebro()
+      cerebro.adddata(data)
+      cerebro.addanalyzer(bt.analyzers.SQN, _name='sqn')
+
+      wf = bt.WalkForward(cerebro, insample=500, outsample=100,
+                          objective='sqn.sqn')
+      wf.optstrategy(MyStrategy, period=range(10, 30))
+      windows = wf.run(maxcpus=4)
+
+    Params:
+
+      - ``insample`` (default: ``252``)
+
+        Number of bars (of the 1st data) of the in-sample windows
+
+      - ``outsample`` (default: ``63``)
+
+        Number of bars of the out-of-sample windows, which immediately follow
+        the in-sample ones. Windows are moved forward by this amount. Last
+        bars which do not fill an out-of-sample window are not used
+
+      - ``anchored`` (default: ``False``)
+
+        If ``True`` all in-sample windows start at the 1st bar
+
+      - ``objective`` (default: ``None``)
+
+        Either a string with the path of a value in the analysis of an
+        analyzer added to cerebro, like ``'sqn.sqn'`` or
+        ``'drawdown.max.drawdown'`` (evaluated in the optimization workers,
+        see ``optmetrics`` in ``Cerebro``) or a callable which receives each
+        in-sample result (see ``optreturn`` in ``Cerebro``) and returns its
+        score
+
+      - ``maximize`` (default: ``True``)
+
+        Whether the best score is the highest or the lowest one. Scores which
+        are not numbers (``None``, ``nan``) are never the best
+
+    Other datas are cut to the timestamps of the windows of the 1st data.
+    Each out-of-sample run starts afresh (positions are not carried over and
+    indicators need their minimum period again)
+    '''
+
+    params = (
+        ('insample', 252),
+        ('outsample', 63),
+        ('anchored', False),
+        ('objective', None),
+        ('maximize', True),
+    )
+
+    def __init__(self, cerebro):
+        self.cerebro = cerebro
+        self.strat = None
+        self.windows = list()
+        self.equity = list()
+
+    def optstrategy(self, strategy, **kwargs):
+        '''Sets the strategy and the values of the params to optimize in each
+        in-sample window, as with ``Cerebro.optstrategy``'''
+        self.strat = (strategy, kwargs)
+
+    def getwindows(self, size):
+        '''Returns a list of ``(isstart, isend, osend)`` bar indices for a data
+        with ``size`` bars'''
+        windows = list()
+        isend = self.p.insample
+        while isend + self.p.outsample <= size:
+            isstart = 0 if self.p.anchored else isend - self.p.insample
+            osend = isend + self.p.outsample
+            windows.append((isstart, isend, osend))
+            isend = osend
+
+        return windows
+
+    def run(self, **kwargs):
+        '''Runs the walk-forward analysis. ``kwargs`` are passed to
+        ``Cerebro.run`` (for example ``maxcpus``)
+
+        Returns a list of ``WalkForwardWindow`` instances
+        '''
+        if self.strat is None:
+            raise ValueError('No strategy to optimize has been set')
+        if self.p.objective is None:
+            raise ValueError('An objective is needed')
+
+        datas = self.cerebro.datas
+        LineBuffer.usestorage(kwargs.get('linestorage',
+                                         self.cerebro.p.linestorage))
+        for data in datas:
+            data.reset()
+            data._start()
+            data.preload()
+
+        self.windows = list()
+        self.equity = list()
+        scale = 1.0
+        try:
+            dts = datas[0].lines.datetime.array
+            for isstart, isend, osend in self.getwindows(len(dts)):
+                window = self._optimize(kwargs, isstart, isend, osend)
+                self._outsample(window, kwargs, isend, osend)
+
+                for dt, value in window.equity:
+                    self.equity.append((dt, value * scale))
+
+                if window.equity:
+                    startcash = window.strategy.broker.startingcash
+                    scale *= window.equity[-1][1] / startcash
+
+                self.windows.append(window)
+        finally:
+            for data in datas:
+                data.stop()
+
+        return self.windows
+
+    def _bounds(self, start, end):
+        # bar indices of the datas which fall into [start, end) of data0
+        dts = self.cerebro.datas[0].lines.datetime.array
+        dtstart, dtend = dts[start], dts[end - 1]
+
+        bounds = [(start, end)]
+        for data in self.cerebro.datas[1:]:
+            ddts = data.lines.datetime.array
+            bounds.append((bisect.bisect_left(ddts, dtstart),
+                           bisect.bisect_right(ddts, dtend)))
+
+        return bounds
+
+    def _mkcerebro(self, start, end):
+        template = self.cerebro
+        cerebro = copy.copy(template)
+        # run kwargs modify the params
+        cerebro.params = cerebro.p = copy.copy(template.params)
+
+        cerebro.datas = list()
+        cerebro.datasbyname = collections.OrderedDict()
+        cerebro.feeds = list()
+        cerebro.strats = list()
+        cerebro.analyzers = list(template.analyzers)
+        cerebro.optcbs = list()
+        cerebro._optvalues = list()
+        cerebro._dooptimize = False
+        cerebro._dataid = itertools.count(1)
+
+        # a broker of its own (cash, positions, orders ...) and not tied to
+        # the template, which holds the complete datas
+        memo = dict((id(data), data) for data in template.datas)
+        memo[id(template)] = cerebro
+        cerebro._broker = copy.deepcopy(template._broker, memo)
+
+        for data, (dstart, dend) in zip(template.datas,
+                                        self._bounds(start, end)):
+            cerebro.adddata(DataWindow(dataname=data, start=dstart, end=dend),
+                            name=data._name)
+
+        return cerebro
+
+    def _evaluate(self, result, names):
+        # string objectives are evaluated in the workers (compact results)
+        if isinstance(result, OptResult):
+            score = result[self.p.objective]
+            rparams = result.getparams()
+            params = dict((k, rparams[k]) for k in names)
+        else:
+            score = self.p.objective(result)
+            params = dict((k, getattr(result.params, k)) for k in names)
+
+        try:
+            score = float(score)
+        except (TypeError, ValueError):
+            return params, None
+
+        return params, (None if math.isnan(score) else score)
+
+    def _optimize(self, kwargs, isstart, isend, osend):
+        strategy, optkwargs = self.strat
+        cerebro = self._mkcerebro(isstart, isend)
+        cerebro.optstrategy(strategy, **optkwargs)
+
+        iskwargs = dict(kwargs)
+        if not callable(self.p.objective):
+            iskwargs['optmetrics'] = self.p.objective
+
+        scores = list()
+        best, bestscore = None, None
+        for run in cerebro.run(**iskwargs):
+            params, score = self._evaluate(run[0], optkwargs)
+            scores.append((params, score))
+
+            if best is None:
+                best = params  # something in case no score is valid
+
+            if score is None:
+                continue
+
+            if bestscore is None or \
+               (score > bestscore if self.p.maximize else score < bestscore):
+                best, bestscore = params, score
+
+        insample = (self._getdt(isstart), self._getdt(isend - 1))
+        outsample = (self._getdt(isend), self._getdt(osend - 1))
+        return WalkForwardWindow(insample, outsample, best, bestscore, scores)
+
+    def _getdt(self, idx):
+        dtline = self.cerebro.datas[0].lines.datetime
+        return dtline.datetime(ago=idx - dtline.idx)
+
+    def _outsample(self, window, kwargs, start, end):
+        strategy, _ = self.strat
+        cerebro = self._mkcerebro(start, end)
+        cerebro.addstrategy(strategy, **window.params)
+        cerebro.addanalyzer(_EquityCurve, _name='_wfequity')
+
+        window.strategy = strat = cerebro.run(**kwargs)[0]
+        window.equity = list(strat.analyzers._wfequity.get_analysis().items())
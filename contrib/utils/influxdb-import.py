@@ -21,6 +21,7 @@ class InfluxDBTool(object):
         self._database = args.database if args.database else 'instruments'
         self._ticker = args.ticker
         self._cache = os.path.expanduser(args.sourcepath)
+        self._batch_size = args.batch_size or None
 
         self.dfdb = dfclient(self._host, self._port,
                              self._username, self._password,
@@ -43,8 +44,9 @@ class InfluxDBTool(object):
         df = df.set_index('Datetime')
         df = df.drop(['Date', 'Time'], axis=1)
 
+        # batches keep the requests small, the server rejects huge bodies
         try:
-            self.dfdb.write_points(df, ticker)
+            self.dfdb.write_points(df, ticker, batch_size=self._batch_size)
         except InfluxDBClientError as err:
             log.error('Write to database failed: %s' % err)
 
@@ -96,6 +98,10 @@ if __name__ == "__main__":
                         required=False, action='store',
                         default='~/.iqfeed/data',
                         help='Path to CSV source folder.')
+    parser.add_argument('--batch-size',
+                        required=False, action='store',
+                        default=5000, type=int,
+                        help='Points per write request (0 for a single one).')
     parser.add_argument('--testrun',
                         required=False, action='store_true',
                         help='Don\'t write to InfluxDB')
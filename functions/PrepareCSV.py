@@ -2,37 +2,20 @@ import pandas as pd
 import datetime
 import os
 import warnings
+try:
+    from datacache import cached, daily_files, read_daily
+except ImportError:  # not run from functions/
+    from functions.datacache import cached, daily_files, read_daily
 warnings.filterwarnings("ignore")
 
 def prepare_data(time0, time9, symbol, fgCov=False, prep_new=True, mode='test'):
     path = '..//Data//futures//'
     df9path = f'..//data//{symbol}_1m_{mode}.csv'
     if prep_new:
-        time0 = pd.to_datetime(time0)
-        time0 = datetime.datetime.date(time0)
-        time9 = pd.to_datetime(time9)
-        time9 = datetime.datetime.date(time9)
-        time5 = time0
-        df9 = pd.DataFrame()
-        while time5 <= time9:
-            try:
-                file = path + str(time5) + '//' + str(time5) + '_' + symbol + '_1m.csv'
-                df0 = pd.read_csv(file)
-                df0['datetime'] = [x[:19] for x in df0['candle_begin_time']]
-                df0.set_index('datetime', drop=True, inplace=True)
-                df0.index = pd.to_datetime(df0.index, format='%Y-%m-%d %H:%M:%S')
-                df0.sort_index(ascending=True, inplace=True)
-            except:
-                time5 = time5 + datetime.timedelta(days=1)
-                file = path + str(time5) + '//' + str(time5) + '_' + symbol + '_1m.csv'
-                df0 = pd.read_csv(file)
-                df0['datetime'] = [x[:19] for x in df0['candle_begin_time']]
-                df0.set_index('datetime', drop=True, inplace=True)
-                df0.index = pd.to_datetime(df0.index, format='%Y-%m-%d %H:%M:%S')
-                df0.sort_index(ascending=True, inplace=True)
-            df9 = df9.append(df0)
-            df9.drop(columns=['candle_begin_time'], inplace=True)
-            time5 = time5 + datetime.timedelta(days=1)
+        files = daily_files(path, symbol, time0, time9)
+        # parsing the daily files is only done if they (or the range) change
+        df9 = cached(files, ('PrepareCSV.prepare_data', symbol, str(time0), str(time9)),
+                     lambda: read_daily(files), tag=symbol)
         # print(df9)
         # df9.reset_index(inplace=True)
         # df9['candle_begin_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,187 @@
+'''
+Content-addressed cache of prepared data frames
+
+The key of an entry is a hash of the source files (path, size and mtime)
+plus the parameters used to prepare the frame: changing a source file or a
+parameter gives a new key and the stale entries are evicted eventually (least
+recently used first, when the cache is over maxbytes). Frames are stored as
+pickles, which load much faster than parsing the csv files again
+'''
+
+import datetime
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+
+CACHEDIR = '..//data//cache//'
+MAXBYTES = 2 * 1024 ** 3
+SUFFIX = '.pkl'
+
+
+def cache_key(files, params):
+    """
+    :param files: source files of the frame
+    :param params: parameters used to prepare the frame (repr is hashed)
+    :return: the key of the entry
+    """
+    h = hashlib.sha1()
+    for file in files:
+        st = os.stat(file)
+        h.update(f'{os.path.abspath(file)}|{st.st_size}|{st.st_mtime_ns}\n'.encode('utf-8'))
+
+    h.update(repr(params).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _entry(key, tag, cachedir):
+    return os.path.join(cachedir, f'{tag}_{key}{SUFFIX}')
+
+
+def load(key, tag='data', cachedir=CACHEDIR):
+    """
+    :return: the cached frame or None (a corrupt entry is removed)
+    """
+    path = _entry(key, tag, cachedir)
+    try:
+        df = pd.read_pickle(path)
+    except OSError:
+        return None
+    except (EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+            ValueError, TypeError, IndexError):
+        # truncated or written by other versions: a miss, rebuilt by cached
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    os.utime(path)  # most recently used
+    return df
+
+
+def store(key, df, tag='data', cachedir=CACHEDIR, maxbytes=MAXBYTES):
+    """
+    Stores the frame and evicts the least recently used entries if the cache
+    grows over maxbytes
+    """
+    os.makedirs(cachedir, exist_ok=True)
+    path = _entry(key, tag, cachedir)
+    tmppath = f'{path}.{os.getpid()}.tmp'
+    df.to_pickle(tmppath)
+    os.replace(tmppath, path)  # other processes never see half an entry
+    evict(maxbytes, cachedir)
+
+
+def cached(files, params, prepare, tag='data', cachedir=CACHEDIR, maxbytes=MAXBYTES):
+    """
+    Returns the frame prepared from files with params, calling prepare()
+    to build it only if it is not in the cache. Empty frames are not stored
+
+    :param files: source files of the frame
+    :param params: parameters used to prepare the frame
+    :param prepare: callable returning the frame
+    :param tag: prefix of the entry (the symbol for example), see invalidate
+    """
+    key = cache_key(files, params)
+    df = load(key, tag, cachedir)
+    if df is None:
+        df = prepare()
+        if not df.empty:
+            store(key, df, tag, cachedir, maxbytes)
+
+    return df
+
+
+def _entries(cachedir):
+    entries = []
+    if not os.path.isdir(cachedir):
+        return entries
+
+    for name in os.listdir(cachedir):
+        if name.endswith(SUFFIX):
+            path = os.path.join(cachedir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name, path))
+
+    return entries
+
+
+def evict(maxbytes=MAXBYTES, cachedir=CACHEDIR):
+    """
+    Removes the least recently used entries until the cache is under maxbytes
+    """
+    entries = sorted(_entries(cachedir), reverse=True)
+    total = 0
+    for _, size, _, path in entries:
+        total += size
+        if total > maxbytes:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def invalidate(tag=None, cachedir=CACHEDIR):
+    """
+    Removes the entries with the given tag, or all of them if tag is None
+
+    :return: number of removed entries
+    """
+    removed = 0
+    for _, _, name, path in _entries(cachedir):
+        if tag is None or name.startswith(f'{tag}_'):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+    return removed
+
+
+def daily_files(datapath, symbol, fromdate, todate):
+    """
+    :return: the daily 1m files of symbol from fromdate to todate
+    :raise FileNotFoundError: if the file of any day is missing (or there
+        are no days): a frame with gaps would be cached as if complete
+    """
+    day = pd.to_datetime(fromdate).date()
+    lastday = pd.to_datetime(todate).date()
+    files, missing = [], []
+    while day <= lastday:
+        file = datapath + str(day) + '//' + str(day) + '_' + symbol + '_1m.csv'
+        (files if os.path.exists(file) else missing).append(file)
+        day = day + datetime.timedelta(days=1)
+
+    if missing:
+        raise FileNotFoundError(f'Missing {symbol} daily files: {", ".join(missing)}')
+    if not files:
+        raise FileNotFoundError(f'No {symbol} days from {fromdate} to {todate}')
+
+    return files
+
+
+def read_daily(files):
+    """
+    Reads and concatenates (once) the daily 1m files
+
+    :return: frame indexed by datetime without candle_begin_time
+    """
+    dfs = []
+    for file in files:
+        df0 = pd.read_csv(file)
+        df0['datetime'] = [x[:19] for x in df0['candle_begin_time']]
+        df0.set_index('datetime', drop=True, inplace=True)
+        df0.index = pd.to_datetime(df0.index, format='%Y-%m-%d %H:%M:%S')
+        df0.drop(columns=['candle_begin_time'], inplace=True)
+        dfs.append(df0)
+
+    df9 = pd.concat(dfs) if dfs else pd.DataFrame()
+    df9.sort_index(ascending=True, inplace=True)
+    return df9
@@ -1,61 +1,73 @@
 import pandas as pd
-import ccxt
 import time
 import os
+import json
 import datetime
 
 pd.set_option('expand_frame_repr', False)  # 当列太多时不换行
 
 
-def save_spot_candle_data_from_exchange(exchange, symbol, time_interval, start_time, path):
+def fetch_candles(exchange, symbol, time_interval, since, end_time, limit=None, pause=1.2):
     """
-    将某个交易所在指定日期指定交易对的K线数据，保存到指定文件夹
-    :param exchange: ccxt交易所
-    :param symbol: 指定交易对，例如'BTC/USDT'
-    :param time_interval: K线的时间周期
-    :param start_time: 指定日期，格式为'2020-03-16 00:00:00'
-    :param path: 文件保存根目录
-    :return:
+    抓取从since开始的K线数据, 直到end_time或者没有新的数据
+    :param since: 开始时间, 毫秒时间戳
+    :param end_time: 结束时间, pd.Timestamp
+    :param pause: 每次抓取之间暂停的秒数, 防止抓取过于频繁
+    :return: dataframe, 列为candle_begin_time, open, high, low, close, volume
     """
-    # ===对火币的limit做特殊处理
-    limit = None
-    if exchange.id == 'huobipro':
-        limit = 2000
-
-    # ===开始抓取数据
     df_list = []
-    start_time_since = exchange.parse8601(start_time)
-    end_time = pd.to_datetime(start_time) + datetime.timedelta(days=1)
-
     while True:
         # 获取数据
         while True:
             try:
-                df = exchange.fetch_ohlcv(symbol=symbol, timeframe=time_interval, since=start_time_since, limit=limit)
+                df = exchange.fetch_ohlcv(symbol=symbol, timeframe=time_interval, since=since, limit=limit)
                 break
             except:
                 time.sleep(3)
         # 整理数据
         df = pd.DataFrame(df, dtype=float)  # 将数据转换为dataframe
+        if df.empty:
+            break
         # 合并数据
         df_list.append(df)
         # 新的since
         t = pd.to_datetime(df.iloc[-1][0], unit='ms')
-        start_time_since = exchange.parse8601(str(t))
+        since = exchange.parse8601(str(t))
         # 判断是否挑出循环
         if t >= end_time or df.shape[0] <= 1:
             break
-        # 抓取间隔需要暂停2s，防止抓取过于频繁
-        time.sleep(1.2)
+        time.sleep(pause)
 
     # ===合并整理数据
-    df = pd.concat(df_list, ignore_index=True)
-    # print(df)
+    columns = ['candle_begin_time', 'open', 'high', 'low', 'close', 'volume']
+    if not df_list:
+        return pd.DataFrame(columns=columns)
 
+    df = pd.concat(df_list, ignore_index=True)
     df.rename(columns={0: 'MTS', 1: 'open', 2: 'high',
                        3: 'low', 4: 'close', 5: 'volume'}, inplace=True)  # 重命名
     df['candle_begin_time'] = pd.to_datetime(df['MTS'], unit='ms')  # 整理时间
-    df = df[['candle_begin_time', 'open', 'high', 'low', 'close', 'volume']]  # 整理列的顺序
+    return df[columns]  # 整理列的顺序
+
+
+def save_spot_candle_data_from_exchange(exchange, symbol, time_interval, start_time, path):
+    """
+    将某个交易所在指定日期指定交易对的K线数据，保存到指定文件夹
+    :param exchange: ccxt交易所
+    :param symbol: 指定交易对，例如'BTC/USDT'
+    :param time_interval: K线的时间周期
+    :param start_time: 指定日期，格式为'2020-03-16 00:00:00'
+    :param path: 文件保存根目录
+    :return:
+    """
+    # ===对火币的limit做特殊处理
+    limit = None
+    if exchange.id == 'huobipro':
+        limit = 2000
+
+    # ===开始抓取数据
+    end_time = pd.to_datetime(start_time) + datetime.timedelta(days=1)
+    df = fetch_candles(exchange, symbol, time_interval, exchange.parse8601(start_time), end_time, limit=limit)
 
     # 选取数据时间段
     df = df[df['candle_begin_time'].dt.date == pd.to_datetime(start_time).date()]
@@ -65,91 +77,194 @@ def save_spot_candle_data_from_exchange(exchange, symbol, time_interval, start_t
     df.reset_index(drop=True, inplace=True)
 
     # ===保存数据到文件
-    # 创建交易所文件夹
-    path = '../data/futures'
-    if os.path.exists(path) is False:
-        os.mkdir(path)
-    # 创建日期文件夹
-    path = os.path.join(path, str(pd.to_datetime(start_time).date()))
-    if os.path.exists(path) is False:
-        os.mkdir(path)
-    # 拼接文件目录
-    file_name = '_'.join([symbol.replace('/', ''), time_interval]) + '.csv'
-    file_name = str(pd.to_datetime(start_time).date()) + '_' + file_name
-    path = os.path.join(path, file_name)
+    # 创建日期文件夹, 文件和增量模式的一样
+    file = day_file(path, symbol, time_interval, pd.to_datetime(start_time).date())
+    os.makedirs(os.path.dirname(file), exist_ok=True)
     # 保存数据
-    df.to_csv(path, index=False)
-
-
-# 这下面是写入一些参数
-begin_date = '2022-01-30'  # 手工设定开始时间
-# end_date = begin_date  # 手工设定结束时间
-
-end_date = '2023-01-25'  # 手工设定结束时间
-
-date_list = []
-date = pd.to_datetime(begin_date)
-while date <= pd.to_datetime(end_date):
-    date_list.append(str(date))
-    date += datetime.timedelta(days=1)
-    start_time = f'{begin_date} 00:00:00'
-
-for start_time in date_list:
-    # 如果历史数据抓完了那就把for缩进进去, 然后替换成为yesterday那个命令
-    path = os.getcwd()
-    print(path)
-    error_list = []
-
-    # 遍历交易所
-    # for exchange in [ccxt.binance()]:
-    # for exchange in [ccxt.binance({'timeout': 5000, 'enableRateLimit': False})]:
-    for exchange in [ccxt.binance({'timeout': 5000, 'enableRateLimit': False,
-                                   'proxies': {'https': 'http://127.0.0.1:7520', 'http': 'http://127.0.0.1:7520'}})]:
-        # for exchange in [ccxt.huobipro(), ccxt.binance(), ccxt.okex()]:
-        # 获取交易所需要的数据
-        while True:
-            try:
-                market = exchange.load_markets()
-                print('loaded')
-                break
-            except:
-                time.sleep(3)
+    df.to_csv(file, index=False)
+
+
+MANIFEST = 'manifest.json'
+
+
+def read_manifest(path):
+    """
+    读取数据目录的清单: {'BTCUSDT_1m': {'first': ..., 'last': ...}}, 不用打开数据文件就知道有哪些数据
+    """
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_manifest(path, manifest):
+    file = os.path.join(path, MANIFEST)
+    tmpfile = file + '.tmp'
+    with open(tmpfile, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmpfile, file)  # 原子替换
+
+
+def day_file(path, symbol, time_interval, day):
+    file_name = '_'.join([str(day), symbol.replace('/', ''), time_interval]) + '.csv'
+    return os.path.join(path, str(day), file_name)
+
+
+def stored_range(path, symbol, time_interval):
+    """
+    保存的第一根和最后一根K线的时间: 先查清单, 没有的话就找第一个和最后一个日期文件夹里的文件
+    :return: (first, last), 没有数据的话为(None, None)
+    """
+    entry = read_manifest(path).get('_'.join([symbol.replace('/', ''), time_interval]))
+    if entry:
+        return pd.to_datetime(entry['first']), pd.to_datetime(entry['last'])
+
+    if not os.path.exists(path):
+        return None, None
+
+    def scan(days, agg):
+        for day in days:
+            file = day_file(path, symbol, time_interval, day)
+            if os.path.exists(file):
+                df = pd.read_csv(file, usecols=['candle_begin_time'])
+                if not df.empty:
+                    return agg(pd.to_datetime(df['candle_begin_time']))
+        return None
+
+    days = sorted(os.listdir(path))
+    return scan(days, min), scan(reversed(days), max)
 
-        market = pd.DataFrame(market).T
-
-        symbol_list3 = list(market['symbol'])  # 获取所有交易对
-        symbol_list1 = ['UNI/USDT', 'EGLD/USDT', 'BSV/USDT', 'XLM/USDT', 'KAVA/USDT', 'REN/USDT',
-                        'DOGE/USDT', 'TRX/USDT', 'ONE/USDT', 'EOS/USDT', 'BTC/USDT', 'ADA/USDT',
-                        'BNB/USDT', 'ETC/USDT', 'SUSHI/USDT', 'WAVES/USDT', '1INCH/USDT', 'ALGO/USDT',
-                        'ATOM/USDT', 'XRP/USDT', 'XTZ/USDT', 'BTT/USDT', 'COMP/USDT', 'FTM/USDT',
-                        'DOT/USDT', 'ETH/USDT', 'LTC/USDT', 'ZEC/USDT', 'RAY/USDT', 'SOL/USDT',
-                        'RLC/USDT', 'XMR/USDT', 'LUNA/USDT', 'BCH/USDT', 'CRV/USDT', 'NEO/USDT',
-                        'CHZ/USDT', 'SNX/USDT', 'LINK/USDT', 'AVAX/USDT', 'OMG/USDT', 'FIL/USDT',
-                        'DASH/USDT', 'VET/USDT', 'AAVE/USDT', 'ICP/USDT']
-        symbol_list2 = []
-        # symbol_list = list(set(symbol_list2).union(set(symbol_list1)))
-        # symbol_list = list(set(symbol_list3).difference(set(symbol_list1)))
-        symbol_list = symbol_list3
-        # print(symbol_list)
-        # symbol_list = ["BTC/USDT"] # 只抓取目前主流币
-
-        # 遍历交易对
-        for symbol in symbol_list:
-            if symbol.endswith('/USDT') is False:
-                continue
-
-            # 遍历时间周期
-            for time_interval in ['1m']:
-                print(exchange.id, symbol, time_interval)
-
-                # 抓取数据并且保存
+
+def sync_spot_candle_data(exchange, symbol, time_interval, path, start_time=None, end_time=None, pause=1.2):
+    """
+    增量同步: 只抓取最后保存的K线之后的数据, 追加到每天的文件, 然后更新清单
+    :param start_time: 没有保存过数据时的开始时间, 格式为'2020-03-16 00:00:00'
+    :param end_time: 结束时间, 默认为现在
+    :return: 新增的K线数量
+    """
+    end_time = pd.Timestamp.utcnow().tz_localize(None) if end_time is None else pd.to_datetime(end_time)
+    first, last = stored_range(path, symbol, time_interval)
+    if last is None:
+        if start_time is None:
+            raise ValueError('No stored data for %s %s, a start_time is needed' % (symbol, time_interval))
+        since = exchange.parse8601(str(pd.to_datetime(start_time)))
+    else:
+        since = exchange.parse8601(str(last)) + 1  # 最后一根K线之后
+
+    limit = 2000 if exchange.id == 'huobipro' else None
+    df = fetch_candles(exchange, symbol, time_interval, since, end_time, limit=limit, pause=pause)
+    if last is not None:
+        df = df[df['candle_begin_time'] > last]
+    # 只保存已经结束的K线
+    interval = pd.Timedelta(seconds=exchange.parse_timeframe(time_interval))
+    df = df[df['candle_begin_time'] + interval <= end_time]
+    df = df.drop_duplicates(subset=['candle_begin_time'], keep='last').sort_values('candle_begin_time')
+    if df.empty:
+        return 0
+
+    # 追加到每天的文件, 每个文件之后更新清单: 中断之后不会重复抓取已经保存的K线
+    key = '_'.join([symbol.replace('/', ''), time_interval])
+    saved = 0
+    for day, dfday in df.groupby(df['candle_begin_time'].dt.date):
+        file = day_file(path, symbol, time_interval, day)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        exists = os.path.exists(file)
+        daylast = dfday['candle_begin_time'].iloc[-1]  # 这个文件保存到这根K线
+        if exists:  # 清单更新之前中断过: 去掉文件里已经有的K线
+            stored = pd.to_datetime(pd.read_csv(file, usecols=['candle_begin_time'])['candle_begin_time'])
+            if not stored.empty:
+                dfday = dfday[dfday['candle_begin_time'] > stored.max()]
+        dfday.to_csv(file, mode='a' if exists else 'w', header=not exists, index=False)
+        saved += len(dfday)
+
+        manifest = read_manifest(path)
+        manifest[key] = {'first': str(df['candle_begin_time'].iloc[0] if first is None else first),
+                         'last': str(daylast)}
+        write_manifest(path, manifest)
+
+    return saved
+
+
+if __name__ == '__main__':
+    import ccxt
+
+    # 这下面是写入一些参数
+    begin_date = '2022-01-30'  # 手工设定开始时间
+    # end_date = begin_date  # 手工设定结束时间
+
+    end_date = '2023-01-25'  # 手工设定结束时间
+
+    incremental = False  # 增量模式: 从begin_date开始, 每个交易对只抓取最后保存的K线之后的数据
+    path = '../data/futures'  # 数据根目录, 两种模式都保存到这里
+
+    date_list = []
+    date = pd.to_datetime(begin_date)
+    while date <= pd.to_datetime(end_date):
+        date_list.append(str(date))
+        date += datetime.timedelta(days=1)
+        start_time = f'{begin_date} 00:00:00'
+    if incremental:
+        date_list = [f'{begin_date} 00:00:00']  # 只需遍历一次
+
+    for start_time in date_list:
+        # 如果历史数据抓完了那就把for缩进进去, 然后替换成为yesterday那个命令
+        print(path)
+        error_list = []
+
+        # 遍历交易所
+        # for exchange in [ccxt.binance()]:
+        # for exchange in [ccxt.binance({'timeout': 5000, 'enableRateLimit': False})]:
+        for exchange in [ccxt.binance({'timeout': 5000, 'enableRateLimit': False,
+                                       'proxies': {'https': 'http://127.0.0.1:7520', 'http': 'http://127.0.0.1:7520'}})]:
+            # for exchange in [ccxt.huobipro(), ccxt.binance(), ccxt.okex()]:
+            # 获取交易所需要的数据
+            while True:
                 try:
-                    # 调用函数
-                    save_spot_candle_data_from_exchange(exchange, symbol, time_interval, start_time, path)
-                    print(start_time)
-                except Exception as e:
-                    print(e)
-                    error_list.append('_'.join([exchange.id, symbol, time_interval]))
+                    market = exchange.load_markets()
+                    print('loaded')
+                    break
+                except:
+                    time.sleep(3)
+
+            market = pd.DataFrame(market).T
+
+            symbol_list3 = list(market['symbol'])  # 获取所有交易对
+            symbol_list1 = ['UNI/USDT', 'EGLD/USDT', 'BSV/USDT', 'XLM/USDT', 'KAVA/USDT', 'REN/USDT',
+                            'DOGE/USDT', 'TRX/USDT', 'ONE/USDT', 'EOS/USDT', 'BTC/USDT', 'ADA/USDT',
+                            'BNB/USDT', 'ETC/USDT', 'SUSHI/USDT', 'WAVES/USDT', '1INCH/USDT', 'ALGO/USDT',
+                            'ATOM/USDT', 'XRP/USDT', 'XTZ/USDT', 'BTT/USDT', 'COMP/USDT', 'FTM/USDT',
+                            'DOT/USDT', 'ETH/USDT', 'LTC/USDT', 'ZEC/USDT', 'RAY/USDT', 'SOL/USDT',
+                            'RLC/USDT', 'XMR/USDT', 'LUNA/USDT', 'BCH/USDT', 'CRV/USDT', 'NEO/USDT',
+                            'CHZ/USDT', 'SNX/USDT', 'LINK/USDT', 'AVAX/USDT', 'OMG/USDT', 'FIL/USDT',
+                            'DASH/USDT', 'VET/USDT', 'AAVE/USDT', 'ICP/USDT']
+            symbol_list2 = []
+            # symbol_list = list(set(symbol_list2).union(set(symbol_list1)))
+            # symbol_list = list(set(symbol_list3).difference(set(symbol_list1)))
+            symbol_list = symbol_list3
+            # print(symbol_list)
+            # symbol_list = ["BTC/USDT"] # 只抓取目前主流币
+
+            # 遍历交易对
+            for symbol in symbol_list:
+                if symbol.endswith('/USDT') is False:
+                    continue
+
+                # 遍历时间周期
+                for time_interval in ['1m']:
+                    print(exchange.id, symbol, time_interval)
 
-print(error_list)
+                    # 抓取数据并且保存
+                    try:
+                        # 调用函数
+                        if incremental:
+                            n = sync_spot_candle_data(exchange, symbol, time_interval, path, start_time=start_time)
+                            print(symbol, n)
+                        else:
+                            save_spot_candle_data_from_exchange(exchange, symbol, time_interval, start_time, path)
+                            print(start_time)
+                    except Exception as e:
+                        print(e)
+                        error_list.append('_'.join([exchange.id, symbol, time_interval]))
 
+    print(error_list)
@@ -36,6 +36,10 @@ import pandas as pd
 import os
 import copy
 #
+try:
+    import datacache
+except ImportError:  # not run from functions/
+    from functions import datacache
 import numpy as np
 import pandas as pd
 import tushare as ts
@@ -544,47 +548,25 @@ def prepare_data(symbol, fromdt, todt, datapath=None):
         # print(data)
         # data.index = pd.to_datetime(df.index, format='%Y-%m-%dT%H:%M:%S.%fZ')
         return data
-    else:  # prepare new file
-        fromdt = pd.to_datetime(fromdt)
-        fromdt = dt.datetime.date(fromdt)
-        todt = pd.to_datetime(todt)
-        todt = dt.datetime.date(todt)
-        reftime = fromdt
-        df9 = pd.DataFrame()
-        while reftime <= todt:
-            try:
-                file = datapath + str(reftime) + '//' + str(reftime) + '_' + symbol + '_1m.csv'
-                df0 = pd.read_csv(file)
-                df0['datetime'] = [x[:19] for x in df0['candle_begin_time']]
-                df0.set_index('datetime', drop=True, inplace=True)
-                df0.index = pd.to_datetime(df0.index, format='%Y-%m-%d %H:%M:%S')
-                df0.sort_index(ascending=True, inplace=True)
-            except Exception:
-                reftime = reftime + dt.timedelta(days=1)
-                file = datapath + str(reftime) + '//' + str(reftime) + '_' + symbol + '_1m.csv'
-                df0 = pd.read_csv(file)
-                df0['datetime'] = [x[:19] for x in df0['candle_begin_time']]
-                df0.set_index('datetime', drop=True, inplace=True)
-                df0.index = pd.to_datetime(df0.index, format='%Y-%m-%d %H:%M:%S')
-                df0.sort_index(ascending=True, inplace=True)
-            df9 = df9.append(df0)
-            df9.drop(columns=['candle_begin_time'], inplace=True)
-            reftime = reftime + dt.timedelta(days=1)
-        # print(df9)
-        # df9.reset_index(inplace=True)
-        # df9['candle_begin_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        # as_list = df9['candle_begin_time'].tolist()
-        # for x in as_list:
-        #     if '.000' in str(x):
-        #         idx = as_list.index(x)
-        #         as_list[idx] = idx[0:8]
-        # df9.set_index(as_list, drop=True, inplace=True)
-
-        df9.sort_index(ascending=True, inplace=True)
-        df9.index = pd.to_datetime(df9.index, format='%Y-%m-%d %H:%M:%S')
-        data = bt.feeds.PandasData(dataname=df9, fromdate=fromdt, todate=todt)
+
+    # else the range is built from the daily files (raises if any is missing)
+    files = datacache.daily_files(datapath, symbol, fromdt, todt)
+
+    def build():
+        df9 = datacache.read_daily(files)
+        if not df9.empty:  # never kept if there is nothing
+            df9.to_csv(cachepath + filename)  # also read as the benchmark
+        return df9
+
+    # the parsed frame is cached until the daily files (or the range) change
+    df9 = datacache.cached(files, ('toolkit.prepare_data', symbol, fromdt, todt),
+                           build, tag=symbol)
+    if not df9.empty and not os.path.exists(cachepath + filename):  # frame from the cache, the csv was removed
         df9.to_csv(cachepath + filename)
-        return data
+
+    fromdt = dt.datetime.date(pd.to_datetime(fromdt))
+    todt = dt.datetime.date(pd.to_datetime(todt))
+    return bt.feeds.PandasData(dataname=df9, fromdate=fromdt, todate=todt)
 
 
 def pools_get4flst(qx, rdat0, syblst, tim0str='', tim9str='', fgInx=False, fgPr=False, fgCov=True):
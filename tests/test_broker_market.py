@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+NDATAS = 4
+
+
+class MarketStrategy(bt.Strategy):
+    '''Opens and closes positions with market orders'''
+    def start(self):
+        self.notifs = list()
+        self.values = list()
+
+    def next(self):
+        self.values.append((self.broker.getvalue(), self.broker.getcash()))
+        for i, data in enumerate(self.datas):
+            if (len(self) + i) % 7 == 0:
+                self.close(data=data)
+            elif (len(self) + i) % 3 == 0:
+                self.buy(data=data, size=1 + i)
+            elif (len(self) + i) % 5 == 0:
+                self.sell(data=data, size=1)
+
+
+class ListeningStrategy(MarketStrategy):
+    def notify_order(self, order):
+        self.notifs.append((len(self), order.status, order.executed.size,
+                            order.executed.price))
+
+    def notify_trade(self, trade):
+        self.notifs.append((len(self), trade.status, trade.pnl,
+                            trade.pnlcomm))
+
+
+class LimitStrategy(bt.Strategy):
+    def start(self):
+        self.statuses = list()
+
+    def notify_order(self, order):
+        self.statuses.append(order.status)
+
+    def next(self):
+        if len(self) == 1:
+            self.buy(exectype=bt.Order.Limit, price=self.data.close[0])
+
+
+class QuietRejectStrategy(bt.Strategy):
+    '''Nothing listens: the rejected and margin orders are notified'''
+    def next(self):
+        if len(self) == 1:
+            self.buy(exectype=bt.Order.Limit, price=self.data.close[0])
+            self.buy(size=1e6)  # no cash
+
+    def stop(self):
+        self.statuses = [o.status for o in self._orders + self._orderspending]
+
+
+class OcoStrategy(bt.Strategy):
+    '''The execution of a market order cancels the other one of the group'''
+    def start(self):
+        self.orders = list()
+
+    def next(self):
+        if len(self) == 1:
+            a = self.buy(size=1)
+            b = self.sell(size=1, oco=a)
+            self.orders = [a, b]
+
+
+def runstrat(brokercls, stratcls, **kwargs):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    cerebro = bt.Cerebro(stdstats=False, tradeledger=True)
+    for i in range(NDATAS):
+        cerebro.adddata(bt.feeds.BacktraderCSVData(dataname=datapath))
+
+    cerebro.broker = brokercls(**kwargs)
+    cerebro.broker.setcommission(commission=0.001)
+    cerebro.addstrategy(stratcls)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    back = runstrat(bt.brokers.BackBroker, ListeningStrategy)
+    market = runstrat(bt.brokers.MarketBroker, ListeningStrategy)
+    # nobody listens: only the executions are notified, same trades
+    quiet = runstrat(bt.brokers.MarketBroker, MarketStrategy)
+    # the same orders executed one by one
+    single = runstrat(bt.brokers.MarketBroker, ListeningStrategy, batch=False)
+    rejects = runstrat(bt.brokers.MarketBroker, QuietRejectStrategy)
+    limit = runstrat(bt.brokers.MarketBroker, LimitStrategy)
+    backoco = runstrat(bt.brokers.BackBroker, OcoStrategy)
+    oco = runstrat(bt.brokers.MarketBroker, OcoStrategy)
+    ocostatus = [o.status for o in oco.orders]
+
+    if main:
+        print('notifications', len(back.notifs), len(market.notifs),
+              quiet.broker._listening)
+        print('values', back.values[-1], market.values[-1], quiet.values[-1])
+        print('trades', len(back.tradeledger), len(quiet.tradeledger))
+        print('batched', market.broker._vidx is not None,
+              single.broker._vidx is not None)
+        print('limit', limit.statuses)
+        print('rejects', rejects.statuses)
+        print('oco', [o.getstatusname() for o in oco.orders])
+    else:
+        assert back.notifs
+        assert market.notifs == back.notifs
+        assert market.values == back.values
+        assert quiet.values == back.values
+        assert quiet.broker._listening is False
+        cols, backcols = quiet.tradeledger.columns(), \
+            back.tradeledger.columns()
+        del cols['ref'], backcols['ref']  # global counter
+        assert len(back.tradeledger) and cols == backcols
+        assert market.broker._vidx is not None  # arrays of the batches
+        assert single.broker._vidx is None
+        assert single.notifs == back.notifs
+        assert single.values == back.values
+        assert limit.statuses == [bt.Order.Rejected]
+        assert not rejects.broker._listening
+        assert rejects.statuses == [bt.Order.Rejected, bt.Order.Margin]
+        assert ocostatus == [bt.Order.Completed, bt.Order.Canceled]
+        assert ocostatus == [o.status for o in backoco.orders]
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+STEPS = 40
+STEP = 0.005
+
+
+class GridStrategy(bt.Strategy):
+    '''Places a grid of limit and stop orders (some with a validity) and
+    checks that the executions and expirations are those of the bars'''
+    def start(self):
+        self.placed = False
+        self.ranges = list()  # (dt, low, high) of the bars
+        self.executed = self.expired = 0
+        self.errors = list()
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            self.executed += 1
+            price = order.created.price
+            if order.exectype == bt.Order.Limit:
+                ok = self.data.low[0] <= price if order.isbuy() else \
+                    self.data.high[0] >= price
+            else:  # stop
+                ok = self.data.high[0] >= price if order.isbuy() else \
+                    self.data.low[0] <= price
+            if not ok:
+                self.errors.append(('bad execution', order.ref))
+
+        elif order.status == order.Expired:
+            self.expired += 1
+            if not self.data.datetime[0] > order.valid:
+                self.errors.append(('bad expiration', order.ref))
+
+    def next(self):
+        self.ranges.append((self.data.datetime[0],
+                            min(self.data.open[0], self.data.low[0]),
+                            max(self.data.open[0], self.data.high[0])))
+        if self.placed:
+            return
+
+        self.placed = True
+        close = self.data.close[0]
+        valid = self.data.datetime.date() + datetime.timedelta(days=30)
+        for i in range(1, STEPS + 1):
+            below, above = close * (1 - i * STEP), close * (1 + i * STEP)
+            v = valid if i % 4 == 0 else None
+            self.buy(exectype=bt.Order.Limit, price=below, valid=v)
+            self.sell(exectype=bt.Order.Limit, price=above, valid=v)
+            self.buy(exectype=bt.Order.Stop, price=above, valid=v)
+            self.sell(exectype=bt.Order.Stop, price=below, valid=v)
+
+    def stop(self):
+        orders = self.broker.get_orders_open()
+        refs = [order.ref for order in orders]
+        if refs != sorted(refs):
+            self.errors.append(('not in acceptance order', refs))
+
+        # the orders still open were never in the range of a later bar
+        for order in orders:
+            price = order.created.price
+            for dt, low, high in self.ranges:
+                if dt > order.created.dt and low <= price <= high:
+                    self.errors.append(('not executed', order.ref))
+                    break
+
+
+def test_run(main=False):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.BacktraderCSVData(dataname=datapath))
+    cerebro.addstrategy(GridStrategy)
+    strat = cerebro.run()[0]
+
+    nopen = len(strat.broker.get_orders_open())
+    if main:
+        print('executed', strat.executed, 'expired', strat.expired,
+              'open', nopen, 'errors', strat.errors)
+    else:
+        assert not strat.errors
+        assert strat.executed and strat.expired and nopen
+        assert strat.executed + strat.expired + nopen == 4 * STEPS
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+NDATAS = 12
+
+
+class RotateStrategy(bt.Strategy):
+    '''Keeps a few positions open out of many datas and checks the value of
+    the broker against one calculated over all positions'''
+    def start(self):
+        self.errors = list()
+
+    def portfolio(self):
+        broker = self.broker
+        value = 0.0
+        for data in self.datas:
+            pos = self.getposition(data)  # creates the flat ones too
+            comminfo = broker.getcommissioninfo(data)
+            if broker.p.shortcash:
+                dvalue = comminfo.getvaluesize(pos.size, data.close[0])
+            else:
+                dvalue = abs(comminfo.getvalue(pos, data.close[0]))
+
+            if dvalue > 0:  # long position - unlever
+                dunrealized = comminfo.profitandloss(pos.size, pos.price,
+                                                     data.close[0])
+                value += (dvalue - dunrealized) / comminfo.get_leverage()
+                value += dunrealized
+            else:
+                value += dvalue
+
+        return broker.getcash() + value
+
+    def next(self):
+        value = self.portfolio()
+        if abs(value - self.broker.getvalue()) > 1e-6:
+            self.errors.append((len(self), value, self.broker.getvalue()))
+
+        i = len(self) % NDATAS
+        data = self.datas[i]
+        if self.getposition(data):
+            self.close(data=data)
+        elif len(self) % 3:
+            self.buy(data=data, size=1 + i)
+        else:
+            self.sell(data=data, size=1)
+
+
+def test_run(main=False):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    for shortcash in [True, False]:
+        cerebro = bt.Cerebro(stdstats=False)
+        for i in range(NDATAS):
+            cerebro.adddata(bt.feeds.BacktraderCSVData(dataname=datapath))
+
+        cerebro.broker.set_shortcash(shortcash)
+        cerebro.addstrategy(RotateStrategy)
+        strat = cerebro.run()[0]
+        if main:
+            print('shortcash', shortcash, 'value', cerebro.broker.getvalue(),
+                  'errors', strat.errors)
+        else:
+            assert not strat.errors
+
+
+if __name__ == '__main__':
+    test_run(main=True)
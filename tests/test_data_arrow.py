@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os
+import os.path
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+
+TODATEMAX = datetime.datetime(2006, 12, 1)
+
+
+def loaddata(datacls, **kwargs):
+    cerebro = bt.Cerebro()
+    data = datacls(**kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return data
+
+
+def dumplines(data):
+    # no openinterest in the files (NaN)
+    return [repr([float(v) for v in line.array])  # nan safe
+            for alias, line in zip(data.getlinealiases(), data.lines)
+            if alias != 'openinterest']
+
+
+def writefiles(src, parquetpath, arrowpath, chunksize=50):
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    size = src.buflen()
+    dts = [bt.num2date(dt) for dt in src.datetime.array[:size]]
+    columns = dict(datetime=pa.array(dts, type=pa.timestamp('us')))
+    for alias in ['open', 'high', 'low', 'close', 'volume']:
+        columns[alias.capitalize()] = getattr(src.lines, alias).array[:size]
+
+    table = pa.table(columns)
+    pa.parquet.write_table(table, parquetpath, row_group_size=chunksize)
+    with pa.ipc.new_file(arrowpath, table.schema) as writer:
+        writer.write_table(table, max_chunksize=chunksize)
+
+
+def test_run(main=False):
+    try:
+        import pyarrow
+    except ImportError:
+        return  # the feeds need pyarrow
+
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    src = loaddata(bt.feeds.BacktraderCSVData, dataname=datapath)
+
+    paths = list()
+    for suffix in ['.parquet', '.arrow']:
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        paths.append(path)
+
+    try:
+        writefiles(src, *paths)
+        for kwargs in [dict(),
+                       dict(fromdate=testcommon.FROMDATE,
+                            todate=testcommon.TODATE),
+                       dict(fromdate=testcommon.FROMDATE, bulkpreload=False),
+                       dict(fromdate=datetime.datetime(2006, 6, 1),
+                            todate=datetime.datetime(2006, 9, 1))]:
+            csv = loaddata(bt.feeds.BacktraderCSVData, dataname=datapath,
+                           **kwargs)
+            for datacls, path in zip([bt.feeds.ParquetData,
+                                      bt.feeds.ArrowData], paths):
+                data = loaddata(datacls, dataname=path, **kwargs)
+                same = dumplines(data) == dumplines(csv)
+                # the chunks out of the range are not even read
+                skipped = data._size < src.buflen()
+                if main:
+                    print(datacls.__name__, kwargs, same, skipped)
+                else:
+                    assert same
+                    if kwargs.get('todate', TODATEMAX) < TODATEMAX:
+                        assert skipped
+    finally:
+        for path in paths:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import os.path
+import pickle
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import testcommon
+
+import backtrader as bt
+
+
+def loaddata(datacls, linestorage=None, **kwargs):
+    cerebro = bt.Cerebro(linestorage=linestorage)
+    data = datacls(**kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return data
+
+
+def dumplines(data):
+    return [repr([float(v) for v in line.array])  # nan safe
+            for line in data.lines]
+
+
+def test_run(main=False):
+    if np is None:
+        return  # numpy is needed to map the file
+
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    csvkwargs = dict(dataname=datapath)
+    src = loaddata(bt.feeds.BacktraderCSVData, **csvkwargs)
+
+    fd, binpath = tempfile.mkstemp(suffix='.bin')
+    os.close(fd)
+    try:
+        bt.feeds.BinaryBarData.write(binpath, src)
+
+        for kwargs in [dict(),
+                       dict(fromdate=testcommon.FROMDATE,
+                            todate=testcommon.TODATE),
+                       dict(fromdate=testcommon.FROMDATE, bulkpreload=False)]:
+            for linestorage in [None, 'numpy']:
+                csv = loaddata(bt.feeds.BacktraderCSVData,
+                               **dict(csvkwargs, **kwargs))
+                data = loaddata(bt.feeds.BinaryBarData, dataname=binpath,
+                                linestorage=linestorage, **kwargs)
+                if main:
+                    print(kwargs, linestorage, dumplines(data) ==
+                          dumplines(csv))
+                else:
+                    assert dumplines(data) == dumplines(csv)
+                    assert data._timeframe == src._timeframe
+
+        # with numpy storage the lines are views on the file, which are
+        # pickled by position
+        data = loaddata(bt.feeds.BinaryBarData, dataname=binpath,
+                        linestorage='numpy')
+        line = data.lines.close
+        assert isinstance(line.array, np.memmap)
+        clone = pickle.loads(pickle.dumps(line))
+        assert isinstance(clone.array, np.memmap)
+        assert list(clone.array) == list(line.array)
+        del data, line, clone
+    finally:
+        os.remove(binpath)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
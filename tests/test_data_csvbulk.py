@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import io
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+
+def getdata(**kwargs):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    kwargs.setdefault('dataname', datapath)
+    return bt.feeds.GenericCSVData(dtformat='%Y-%m-%d', **kwargs)
+
+
+def loaddata(text=None, **kwargs):
+    cerebro = bt.Cerebro()
+    if text is not None:
+        kwargs.update(dataname=io.StringIO(text), name='text')  # fresh one
+    data = getdata(**kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return [repr(list(line.array)) for line in data.lines]  # nan safe
+
+
+def test_run(main=False):
+    for kwargs in [dict(),
+                   dict(fromdate=testcommon.FROMDATE,
+                        todate=testcommon.TODATE),
+                   dict(timeframe=bt.TimeFrame.Minutes, openinterest=-1),
+                   dict(sessionend=datetime.time(17, 30))]:
+        bulk = loaddata(bulkpreload=True, **kwargs)
+        rows = loaddata(bulkpreload=False, **kwargs)
+        if main:
+            print(kwargs, bulk == rows)
+        else:
+            assert bulk == rows
+
+    # a partial row after todate is never reached, one before is an error
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    with io.open(datapath, 'r') as f:
+        text = f.read()
+
+    # columns parsed in one go: separate time field, empty fields and
+    # datetimes which are not in the expected layout
+    lines = text.splitlines()
+    timed = '\n'.join(lines[:1] + [line[:10] + ',09:30:00' + line[10:]
+                                    for line in lines[1:]]) + '\n'
+    for ctext, kwargs in [
+            (timed, dict(time=1, open=2, high=3, low=4, close=5, volume=6,
+                         openinterest=7, tz='US/Eastern')),
+            (text.replace(',0\n', ',\n'), dict(nullvalue=0.0)),
+            (text.replace('2006-03-01', '2006-3-01'), dict()),
+            (text, dict(tzinput='US/Eastern'))]:
+        bulk = loaddata(ctext, bulkpreload=True, **kwargs)
+        rows = loaddata(ctext, bulkpreload=False, **kwargs)
+        if main:
+            print(sorted(kwargs), bulk == rows)
+        else:
+            assert bulk == rows
+    text = text.rstrip('\n') + '\n2006-12-30,3650.0,36\n'
+    todate = datetime.datetime(2006, 12, 1)
+    bulk = loaddata(text, bulkpreload=True, todate=todate)
+    rows = loaddata(text, bulkpreload=False, todate=todate)
+    if main:
+        print('partial row after todate', bulk == rows)
+    else:
+        assert bulk == rows
+
+    for bulkpreload in (True, False):
+        try:
+            loaddata(text, bulkpreload=bulkpreload)
+        except IndexError:
+            pass
+        else:
+            assert main, 'partial row not seen'
+
+    # filters need to see the bars one by one
+    data = getdata()
+    assert data._canbulk()
+    data.addfilter(bt.filters.SessionFilter)
+    assert not data._canbulk()
+
+    # as do bars already stacked or stashed
+    data = getdata()
+    data._barstash.append([0.0] * data.size())
+    assert not data._canbulk()
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+class FixedTZ(datetime.tzinfo):
+    # pytz may not be installed
+    def utcoffset(self, dt):
+        return datetime.timedelta(hours=-5)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return 'EST'
+
+
+class SlowCSVData(bt.feeds.BacktraderCSVData):
+    # forces the full path of load (stacks and filters)
+    def _start(self):
+        super(SlowCSVData, self)._start()
+        self._fastload = False
+
+
+def loaddata(datacls, preload=True, **kwargs):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    cerebro = bt.Cerebro(preload=preload, runonce=preload)
+    data = datacls(dataname=datapath, bulkpreload=False, **kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return [repr(list(line.array)) for line in data.lines]  # nan safe
+
+
+def test_run(main=False):
+    for preload in [True, False]:
+        for kwargs in [dict(),
+                       dict(fromdate=testcommon.FROMDATE,
+                            todate=testcommon.TODATE),
+                       dict(fromdate=testcommon.FROMDATE, tzinput=FixedTZ())]:
+            fast = loaddata(bt.feeds.BacktraderCSVData, preload, **kwargs)
+            slow = loaddata(SlowCSVData, preload, **kwargs)
+            if main:
+                print(preload, kwargs, fast == slow)
+            else:
+                assert fast == slow
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import json
+import os.path
+import re
+import shutil
+import tempfile
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from urlparse import parse_qs, urlparse
+
+import testcommon
+
+import backtrader as bt
+
+EPOCH = datetime.datetime(1970, 1, 1)
+COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume', 'openinterest']
+
+
+class InfluxStandIn(HTTPServer):
+    '''Answers the queries of the feed with the bars of a data'''
+    def __init__(self, src):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), InfluxHandler)
+        size = src.buflen()
+        self.bars = list()
+        for i in range(size):
+            dt = bt.num2date(src.datetime.array[i])
+            row = [int((dt - EPOCH).total_seconds() * 1000)]
+            row.extend(getattr(src.lines, alias).array[i]
+                       for alias in COLUMNS[1:-1])
+            row.append(None)
+            self.bars.append((dt, row))
+
+        self.queries = list()
+        self.failfrom = None  # queries of chunks starting here fail
+
+
+class InfluxHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        q = parse_qs(urlparse(self.path).query)['q'][0]
+        self.server.queries.append(q)
+
+        bounds = re.findall(r"time ([<>]=?) '([^']+)'", q)
+        if ('>=', self.server.failfrom) in bounds:
+            body = json.dumps(dict(error='timeout')).encode('utf-8')
+            self.send_response(400)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        rows = list()
+        for dt, row in self.server.bars:
+            if all(self.inbound(dt, op, value) for op, value in bounds):
+                rows.append(row)
+
+        series = [dict(name='bars', columns=COLUMNS, values=rows)]
+        body = json.dumps(dict(results=[dict(
+            statement_id=0, series=series if rows else [])]))
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inbound(self, dt, op, value):
+        value = datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+        return dt >= value if op == '>=' else dt < value
+
+    def log_message(self, *args):
+        pass
+
+
+def loaddata(**kwargs):
+    cerebro = bt.Cerebro()
+    data = bt.feeds.InfluxDB(**kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return data
+
+
+def dumplines(data):
+    # no openinterest from the database (NaN)
+    return [repr([float(v) for v in line.array])  # nan safe
+            for alias, line in zip(data.getlinealiases(), data.lines)
+            if alias != 'openinterest']
+
+
+def test_run(main=False):
+    try:
+        import influxdb
+    except ImportError:
+        return  # the feed needs influxdb
+
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    cerebro = bt.Cerebro()
+    src = bt.feeds.BacktraderCSVData(dataname=datapath)
+    cerebro.adddata(src)
+    cerebro.run()
+
+    server = InfluxStandIn(src)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    cachedir = tempfile.mkdtemp()
+    try:
+        common = dict(dataname='bars', database='bt', port=server.server_port,
+                      startdate='2005-12-01T00:00:00Z',
+                      todate=datetime.datetime(2007, 2, 1))
+
+        single = loaddata(**common)
+        results = [('single', single, len(server.queries))]
+        for name, kwargs in [('chunked', dict(chunksize=30)),
+                             ('stream', dict(chunksize=30, preload=False)),
+                             ('cachefill', dict(chunksize=30,
+                                                cachedir=cachedir)),
+                             ('cached', dict(chunksize=30,
+                                             cachedir=cachedir))]:
+            nqueries = len(server.queries)
+            kwargs.update(common)
+            data = loaddata(**kwargs)
+            results.append((name, data, len(server.queries) - nqueries))
+
+        # the times go to the database with millisecond precision
+        expected = [row[0] for _, row in server.bars]
+        for name, data, nqueries in results:
+            dts = [int(round((bt.num2date(dt) - EPOCH).total_seconds() * 1000))
+                   for dt in data.datetime.array]
+            same = dumplines(data) == dumplines(single)
+            if main:
+                print(name, nqueries, len(data), same, dts == expected)
+            else:
+                assert same
+                assert len(data) == src.buflen()
+                assert dts == expected
+                if name == 'single':
+                    assert nqueries == 1
+                elif name == 'cached':
+                    assert nqueries == 0  # all chunks are in the past
+                else:
+                    assert nqueries == 15  # 427 days in chunks of 30
+
+        # a failed chunk is an error, not a gap, and it is not cached
+        failcache = tempfile.mkdtemp(dir=cachedir)
+        failed = bt.feeds.influxfeed.InfluxDBClientError
+        for kwargs in [dict(), dict(preload=False)]:
+            server.failfrom = '2006-03-01T00:00:00Z'  # 4th of 15 chunks
+            kwargs.update(common, chunksize=30, cachedir=failcache)
+            try:
+                loaddata(**kwargs)
+            except failed:
+                raised = True
+            else:
+                raised = False
+
+            server.failfrom = None
+            nqueries = len(server.queries)
+            data = loaddata(**kwargs)
+            nqueries = len(server.queries) - nqueries
+            same = dumplines(data) == dumplines(single)
+            if main:
+                print('failure', raised, nqueries, same)
+            else:
+                assert raised
+                assert same
+                assert nqueries == 12  # the chunks before were cached
+
+            shutil.rmtree(failcache)
+            os.mkdir(failcache)
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(cachedir)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+
+def getdataframe(tz=None):
+    import pandas
+
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    df = pandas.read_csv(datapath, index_col=0, parse_dates=True)
+    if tz is not None:
+        df.index = df.index.tz_localize(tz)
+
+    return df
+
+
+def loaddata(datacls, df, **kwargs):
+    cerebro = bt.Cerebro()
+    data = datacls(dataname=df, **kwargs)
+    cerebro.adddata(data)
+    cerebro.run()
+    return [repr(list(line.array)) for line in data.lines]  # nan safe
+
+
+def test_run(main=False):
+    try:
+        import pandas
+    except ImportError:
+        return  # the feeds need pandas
+
+    checks = [
+        (bt.feeds.PandasData, getdataframe(), dict()),
+        (bt.feeds.PandasData, getdataframe(),
+         dict(fromdate=testcommon.FROMDATE, todate=testcommon.TODATE)),
+        (bt.feeds.PandasData, getdataframe('Europe/Berlin'), dict()),
+        (bt.feeds.PandasData, getdataframe().reset_index(),
+         dict(datetime='Date', openinterest=None)),
+        (bt.feeds.PandasDirectData, getdataframe(), dict()),
+    ]
+
+    for datacls, df, kwargs in checks:
+        bulk = loaddata(datacls, df, bulkpreload=True, **kwargs)
+        rows = loaddata(datacls, df, bulkpreload=False, **kwargs)
+        if main:
+            print(datacls.__name__, kwargs, bulk == rows)
+        else:
+            assert bulk == rows
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+BATCHINDS = [btind.SMA, btind.EMA, btind.SMMA, btind.SumN, btind.Highest,
+             btind.Lowest]
+BATCHPERIODS = [1, 2, 5, 14, 30]
+
+
+class TestStrategy(bt.Strategy):
+    params = (('fast', 5), ('slow', 20),)
+
+    def __init__(self):
+        self.cross = btind.CrossOver(btind.SMA(period=self.p.fast),
+                                     btind.EMA(period=self.p.slow))
+        self.rsi = btind.RSI(period=self.p.fast)
+        self.macd = btind.MACD()
+
+    def next(self):
+        if not self.position:
+            if self.cross > 0.0:
+                self.buy()
+        elif self.cross < 0.0:
+            self.close()
+
+    def stop(self):
+        self.result = ['%.2f' % self.broker.getvalue()] + [
+            '%f' % x for x in (self.rsi[0], self.macd.macd[0],
+                               self.macd.signal[0])]
+
+
+class StakeStrategy(TestStrategy):
+    params = (('stake', 1),)  # optimized but not a period
+
+
+class BatchStrategy(bt.Strategy):
+    def __init__(self):
+        self.src = self.data.close - self.data.close(-2)
+        self.inds = [[ind(self.src, period=period) for period in BATCHPERIODS]
+                     for ind in BATCHINDS]
+
+
+def runbatch():
+    cerebro = bt.Cerebro()
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(BatchStrategy)
+    strat = cerebro.run()[0]
+
+    checks = list()
+    for ind, inds in zip(BATCHINDS, strat.inds):
+        rows = ind.batch(strat.src.array, BATCHPERIODS,
+                         minperiod=strat.src._minperiod)
+        for row, obj in zip(rows, inds):
+            vals = list(obj.lines[0].array)
+            checks.append(len(vals) == len(row) and
+                          all(_sameval(x, y) for x, y in zip(vals, row)))
+
+    return checks
+
+
+def _sameval(x, y):
+    # bit-identical, NaN (warm-up bars) equals NaN
+    return x == y or (x != x and y != y)
+
+
+def runopt(indcache):
+    cerebro = bt.Cerebro(maxcpus=1, optreturn=False, indcache=indcache)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.optstrategy(TestStrategy, fast=range(5, 8), slow=range(20, 23))
+    return [x[0].result for x in cerebro.run()]
+
+
+def runstake():
+    # the values of stake are never used as periods, even if they contain the
+    # current value of fast
+    rcache = bt.indicator.IndicatorCache.getcache()
+    rcache.clear()
+    cerebro = bt.Cerebro(maxcpus=1, optreturn=False, indcache=True)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.optstrategy(StakeStrategy, fast=range(5, 8), slow=(20,),
+                        stake=(5, 100))
+    cerebro.run()
+    avgname = 'backtrader.indicators.basicops.Average'  # SMA calculations
+    return sorted(set(key[1] for key in rcache._results
+                      if key[0] == avgname))
+
+
+def test_run(main=False):
+    results = runopt(indcache=False)
+    cached = runopt(indcache=True)
+
+    rcache = bt.indicator.IndicatorCache.getcache()
+    if main:
+        print('hits:', rcache.hits, 'misses:', rcache.misses)
+        print(results == cached)
+    else:
+        assert results == cached
+        assert rcache.hits > 0
+
+    try:
+        import numpy
+    except ImportError:
+        return  # batch calculations need numpy
+
+    avgperiods = runstake()
+    if main:
+        print('Average periods:', avgperiods)
+    else:
+        assert avgperiods == [(5,), (6,), (7,)]
+
+    checks = runbatch()
+    if main:
+        print(all(checks))
+    else:
+        assert all(checks)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
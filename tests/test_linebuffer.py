@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+import pickle
+
+import testcommon
+
+from backtrader.linebuffer import LineBuffer
+
+
+def _fill(storage):
+    LineBuffer.usestorage(storage)
+    try:
+        lb = LineBuffer()
+        for i in range(100):
+            lb.forward()
+            lb[0] = i
+
+        lb.backwards(size=10)
+        lb.extend(size=5)
+        lb.forward(value=-1.0, size=3)
+        return lb
+    finally:
+        LineBuffer.usestorage(None)
+
+
+def _check(lbarr, lbnp):
+    assert len(lbnp) == len(lbarr)
+    assert lbnp.buflen() == lbarr.buflen()
+    assert len(lbnp.array) == len(lbarr.array)
+    for va, vn in zip(lbarr.array, lbnp.array):
+        assert va == vn or (math.isnan(va) and math.isnan(vn))
+
+
+def test_run(main=False):
+    try:
+        import numpy as np
+    except ImportError:
+        return  # nothing to compare against
+
+    lbarr = _fill(None)
+    lbnp = _fill('numpy')
+
+    assert isinstance(lbnp.array, np.ndarray)
+    _check(lbarr, lbnp)
+
+    # the view must survive pickling (optimization with multiprocessing)
+    lbpk = pickle.loads(pickle.dumps(lbnp))
+    assert lbpk.array.base is lbpk._nparray
+    for lb in (lbarr, lbpk):
+        lb[0] = 1234.0
+        lb.forward(value=5.0, size=50)
+
+    _check(lbarr, lbpk)
+
+    # shared memory: the pickled buffer attaches to the same block
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        shared_memory = None
+
+    if shared_memory is not None:
+        lbarr.shmshare()
+        lbshm = pickle.loads(pickle.dumps(lbarr))
+        assert not lbshm.array.flags.writeable
+        _check(lbarr, lbshm)
+
+        lbarr[0] = 4321.0  # visible in the attached buffer
+        assert lbshm[0] == 4321.0
+
+        lbshm.shmrelease()
+        lbarr.shmrelease()
+        assert not isinstance(lbarr.array, np.ndarray)
+        _check(lbarr, lbshm)
+
+    if main:
+        print(list(lbnp.array))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import math
+
+import testcommon
+
+import backtrader as bt
+
+
+class SynthData(bt.DataBase):
+    '''Generates intraday bars with some nan values on the fly'''
+    params = (('bars', 500),)
+
+    def start(self):
+        super(SynthData, self).start()
+        self._bar = 0
+        self._dt = datetime.datetime(2020, 1, 1, 9, 0)
+
+    def _load(self):
+        if self._bar >= self.p.bars:
+            return False
+
+        i = self._bar
+        self._bar += 1
+        self._dt += datetime.timedelta(minutes=7)
+
+        c = 100.0 + 10.0 * math.sin(i / 10.0)
+        self.lines.datetime[0] = bt.date2num(self._dt)
+        self.lines.open[0] = c - 0.5 * math.cos(i)
+        self.lines.high[0] = c + 1.0
+        self.lines.low[0] = c - 1.0
+        self.lines.close[0] = c
+        self.lines.volume[0] = float('nan') if i % 17 == 0 else i % 5 + 1.0
+        self.lines.openinterest[0] = 0.0
+        return True
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        d = self.data
+        self.ops = [
+            d.close - d.open,
+            d.close * d.volume,
+            d.close / d.volume,
+            d.close ** 0.5,
+            d.close // 3,
+            2.0 - d.close,
+            100.0 / d.volume,
+            d.close > d.open,
+            d.close <= 100.0,
+            d.volume == 1,
+            d.volume != d.volume,
+            abs(d.open - d.close),
+            -d.close,
+            d.datetime > datetime.time(12, 0),
+            d.datetime == datetime.time(10, 24),
+            bt.And(d.close > d.open, d.volume),
+            bt.Or(d.close > d.open, d.volume, 0),
+            bt.Max(d.volume, d.open, 3.0),
+            bt.Min(d.open, d.volume, d.close(-1)),
+        ]
+
+    def stop(self):
+        self.values = [list(op.array) for op in self.ops]
+
+
+def _run(linestorage):
+    cerebro = bt.Cerebro(linestorage=linestorage, stdstats=False)
+    cerebro.adddata(SynthData())
+    cerebro.addstrategy(TestStrategy)
+    return cerebro.run()[0].values
+
+
+def test_run(main=False):
+    try:
+        import numpy
+    except ImportError:
+        return  # no vectorized operations to check
+
+    for arrvals, npvals in zip(_run(None), _run('numpy')):
+        assert len(arrvals) == len(npvals)
+        for a, b in zip(arrvals, npvals):
+            assert a == b or (math.isnan(a) and math.isnan(b))
+
+    if main:
+        print('vectorized operations match')
+
+
+if __name__ == '__main__':
+    test_run(main=True)
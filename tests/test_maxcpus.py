@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class ProcessId(bt.Analyzer):
+    def stop(self):
+        self.rets['pid'] = os.getpid()
+
+
+class TestStrategy(bt.Strategy):
+    params = (('period', 15),)
+
+    def __init__(self):
+        btind.SMA(self.data, period=self.p.period)
+
+
+def runcerebro(maxcpus, optworkermem=None):
+    cerebro = bt.Cerebro(optmetrics='process.pid', optworkermem=optworkermem)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addanalyzer(ProcessId, _name='process')
+    cerebro.optstrategy(TestStrategy, period=[10, 20])
+    return [r[0]['process.pid'] for r in cerebro.run(maxcpus=maxcpus)]
+
+
+def test_run(main=False):
+    pid = os.getpid()
+    for maxcpus in [True, 'auto', 'adaptive']:
+        results = runcerebro(maxcpus)
+        # True must not be taken as 1 (run in the main process)
+        assert all(r != pid for r in results)
+        if main:
+            print(maxcpus, results)
+
+    # a single worker if the memory cannot hold more
+    results = runcerebro('adaptive', optworkermem=2 ** 62)
+    assert len(set(results)) == 1
+
+    results = runcerebro(1)
+    assert all(r == pid for r in results)
+
+    try:
+        runcerebro('all')
+    except ValueError:
+        pass
+    else:
+        assert False, 'invalid maxcpus accepted'
+
+
+if __name__ == '__main__':
+    test_run(main=True)
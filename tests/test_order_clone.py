@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+
+
+def test_run(main=False):
+    order = bt.BuyOrder(data=None, size=10, price=1.0,
+                        exectype=bt.Order.Market, simulated=True)
+    order.addinfo(tag='a')
+
+    order.execute(1.0, 4, 1.0, 0, 0.0, 0.0, 4, 0.0, 0.0, 0.0, 0.0, 4, 1.0)
+    first = order.clone()
+    order.execute(2.0, 6, 1.2, 0, 0.0, 0.0, 6, 0.0, 0.0, 0.0, 0.0, 10, 1.12)
+    order.completed()
+    second = order.clone()
+
+    if main:
+        for snapshot in (first, second):
+            print(snapshot.getstatusname(), snapshot.executed.size,
+                  [bit.size for bit in snapshot.executed.iterpending()])
+        return
+
+    # the snapshots keep the state at the time of the clone
+    assert first.status == bt.Order.Partial
+    assert first.executed.size == 4 and first.executed.remsize == 6
+    assert second.status == bt.Order.Completed
+    assert second.executed.size == 10 and second.executed.remsize == 0
+
+    # the execution bits are shared, each snapshot sees only its new ones
+    assert [bit.size for bit in first.executed.iterpending()] == [4]
+    assert [bit.size for bit in second.executed.iterpending()] == [6]
+    assert len(second.executed) == 2
+
+    # params and info are those of the order
+    assert first.ref == second.ref == order.ref
+    assert first.size == 10 and first.info.tag == 'a'
+    assert first.exectype == bt.Order.Market and first.data is None
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+PRUNEBAR = 100
+
+
+class BarCounter(bt.Analyzer):
+    def start(self):
+        self.rets['bars'] = 0
+
+    def next(self):
+        self.rets['bars'] += 1
+
+
+class TestStrategy(bt.Strategy):
+    params = (('period', 15),)
+
+    def __init__(self):
+        self.cross = btind.CrossOver(self.data.close,
+                                     btind.SMA(self.data, period=self.p.period))
+
+    def next(self):
+        if not self.position:
+            if self.cross > 0.0:
+                self.buy()
+        elif self.cross < 0.0:
+            self.close()
+
+
+def prune_odd(strat):
+    # prune odd periods once the bar has been reached
+    return strat.p.period % 2 and len(strat.data) >= PRUNEBAR
+
+
+def runcerebro(runonce, preload, **kwargs):
+    cerebro = bt.Cerebro(runonce=runonce, preload=preload, maxcpus=1,
+                         stdstats=False, **kwargs)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addanalyzer(BarCounter, _name='counter')
+    cerebro.addprogresscb(prune_odd, interval=10)
+    cerebro.optstrategy(TestStrategy, period=[14, 15, 16])
+    return cerebro.run()
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        for preload in [True, False]:
+            results = runcerebro(runonce, preload)
+            bars = [r[0].analyzers.counter.get_analysis()['bars'] for r in results]
+            pruned = [r[0].pruned for r in results]
+            if main:
+                print(runonce, preload, bars, pruned)
+            else:
+                assert pruned == [False, True, False]
+                assert bars[0] == bars[2] > bars[1]
+                # partial results are returned up to the pruning bar
+                assert bars[1] <= PRUNEBAR
+
+            results = runcerebro(runonce, preload, optmetrics='counter.bars')
+            assert [r[0].pruned for r in results] == pruned
+            assert [r[0]['counter.bars'] for r in results] == bars
+
+    try:
+        bt.Cerebro().addprogresscb(prune_odd, interval=0)
+    except ValueError:
+        pass
+    else:
+        assert main, 'interval 0 accepted'
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    params = (('period', 15),)
+
+    def __init__(self):
+        sma = btind.SMA(self.data, period=self.p.period)
+        self.cross = btind.CrossOver(self.data.close, sma)
+
+    def next(self):
+        if not self.position:
+            if self.cross > 0.0:
+                self.buy()
+
+        elif self.cross < 0.0:
+            self.close()
+
+
+METRICS = ['drawdown.max.drawdown', 'ta.pnl.net.total', 'ta.notthere']
+
+
+def _run(**kwargs):
+    cerebro = bt.Cerebro(maxcpus=1, **kwargs)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.optstrategy(TestStrategy, period=range(10, 14))
+    cerebro.addanalyzer(bt.analyzers.DrawDown)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='ta')
+    return [r[0] for r in cerebro.run()]
+
+
+def test_run(main=False):
+    optreturns = _run()
+    optresults = _run(optmetrics=METRICS)
+    allresults = _run(optmetrics=True)
+
+    for oret, ores, oall in zip(optreturns, optresults, allresults):
+        assert ores.getparams()['period'] == oret.params.period
+        assert ores.names == tuple(METRICS)
+
+        dd = oret.analyzers.drawdown.get_analysis()
+        ta = oret.analyzers.ta.get_analysis()
+        assert ores['drawdown.max.drawdown'] == dd.max.drawdown
+        assert ores['ta.pnl.net.total'] == ta.pnl.net.total
+        assert math.isnan(ores['ta.notthere'])
+
+        assert oall['drawdown.max.drawdown'] == dd.max.drawdown
+        assert oall['ta.total.closed'] == ta.total.closed
+
+        if main:
+            print(ores.getparams(), ores.getmetrics())
+
+
+if __name__ == '__main__':
+    test_run(main=True)
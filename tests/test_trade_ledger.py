@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+import shutil
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+
+
+class RunStrategy(bt.Strategy):
+    '''Goes long and short every few bars, in and out in steps, and keeps
+    what the closed trades notify'''
+    params = (('period', 5),)
+
+    def start(self):
+        self.closed = list()
+        self.ntrades = 0
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.closed.append(
+                (trade.ref, 0, trade.tradeid, int(trade.sizeopened > 0),
+                 trade.dtopen, trade.dtclose,
+                 trade.baropen, trade.barclose, trade.barlen,
+                 trade.sizeopened, trade.price, trade.priceclosed,
+                 trade.pnl, trade.pnlcomm, trade.commission))
+
+    def next(self):
+        ntrades = sum(len(x) for x in self._trades[self.data].values())
+        self.ntrades = max(self.ntrades, ntrades)
+
+        step = len(self) % (2 * self.p.period)
+        if step == 0:
+            self.close()
+        elif step < 3:
+            self.buy(size=step)  # entry in two steps
+        elif step == self.p.period:
+            self.close()
+        elif step == self.p.period - 1:
+            self.sell(size=1)  # the long trade is closed in two steps
+        elif self.p.period < step < self.p.period + 3:
+            self.sell(size=1)
+
+
+def runstrat(**kwargs):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    cerebro = bt.Cerebro(stdstats=False, **kwargs)
+    cerebro.adddata(bt.feeds.BacktraderCSVData(dataname=datapath))
+    cerebro.addstrategy(RunStrategy)
+    cerebro.broker.setcash(100000.0)
+    cerebro.broker.setcommission(commission=0.001)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    strat = runstrat(tradeledger=True)
+    ledger = strat.tradeledger
+    rows = [tuple(row) for row in ledger]
+    if main:
+        print('closed', len(strat.closed), 'rows', len(rows),
+              'max trades kept', strat.ntrades)
+        for row in rows[:4]:
+            print(row)
+    else:
+        assert strat.closed and rows == strat.closed
+        assert strat.ntrades == 1  # the closed trades are released
+        assert ledger.datanames == [strat.data._name or '0']
+        assert list(ledger.column('pnl')) == [x[12] for x in strat.closed]
+
+        # long trades of buy 1 + buy 2, short ones of sell 1 + sell 1
+        assert all(row.size in (3, -2) for row in ledger)
+        for row in ledger:  # the average entry and exit prices give the pnl
+            pnl = row.size * (row.priceclosed - row.price)
+            assert abs(row.pnl - pnl) < 1e-6
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        # the directory is made with the ledger
+        path = os.path.join(tmpdir, 'ledger', 'trades.bin')
+        ledger = bt.TradeLedger(path=path, maxrows=7)
+        for row in rows:
+            ledger.add(_Closed(row))
+
+        if not main:
+            assert len(ledger) == len(rows)
+            assert len(ledger._cols[0]) < 7  # the others are in the file
+            assert [tuple(row) for row in ledger] == rows
+            cols = ledger.columns()
+            assert list(cols['ref']) == [row[0] for row in rows]
+            assert list(cols['priceclosed']) == [row[11] for row in rows]
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+class _Closed(object):
+    # a closed trade made of a ledger row
+    def __init__(self, row):
+        (self.ref, _, self.tradeid, _, self.dtopen, self.dtclose,
+         self.baropen, self.barclose, self.barlen,
+         self.sizeopened, self.price, self.priceclosed,
+         self.pnl, self.pnlcomm, self.commission) = row
+        self.data = None
+
+
+if __name__ == '__main__':
+    test_run(main=True)
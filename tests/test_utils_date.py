@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import random
+
+import testcommon
+
+from backtrader.linebuffer import LineBuffer
+from backtrader.utils import (date2num, date2num_array, num2date,
+                              num2date_array)
+
+
+def test_run(main=False):
+    try:
+        import numpy as np
+    except ImportError:
+        return  # the array conversions need numpy
+
+    rnd = random.Random(1)
+    dts = [datetime.datetime(2000, 1, 1) +
+           datetime.timedelta(microseconds=rnd.randrange(10 ** 15))
+           for i in range(10000)]
+
+    nums = date2num_array(np.array(dts, dtype='datetime64[us]'))
+    assert all(x == date2num(dt) for x, dt in zip(nums.tolist(), dts))
+
+    # including values which are not exact microseconds
+    nums = np.append(nums, [730000.99999999999, rnd.uniform(7e5, 8e5)])
+    backs = num2date_array(nums)
+    assert all(back == np.datetime64(num2date(x), 'us')
+               for x, back in zip(nums.tolist(), backs))
+
+    assert np.isnat(num2date_array([float('nan')])[0])
+    assert np.isnan(date2num_array(np.array(['NaT'], 'datetime64[us]'))[0])
+
+    # conversions of the same bar are memoized
+    lb = LineBuffer()
+    lb.forward(value=nums[0])
+    dt = lb.datetime()
+    assert lb.datetime() is dt
+    assert lb.date() == dt.date() and lb.time() == dt.time()
+    lb.forward(value=nums[1])
+    assert lb.datetime() == num2date(nums[1])
+    assert lb.datetime(ago=-1) is dt
+
+    if main:
+        print(dt, backs[:3])
+
+
+if __name__ == '__main__':
+    test_run(main=True)
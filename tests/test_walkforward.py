@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import pickle
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+PERIODS = range(5, 15)
+
+
+class TestStrategy(bt.Strategy):
+    params = (('period', 10),)
+
+    def __init__(self):
+        sma = btind.SMA(self.data, period=self.p.period)
+        self.cross = btind.CrossOver(self.data.close, sma)
+
+    def next(self):
+        if not self.position:
+            if self.cross > 0.0:
+                self.buy()
+        elif self.cross < 0.0:
+            self.close()
+
+
+def runwindow(fromdate, todate, **kwargs):
+    cerebro = bt.Cerebro(maxcpus=1)
+    cerebro.adddata(testcommon.getdata(0, fromdate=fromdate, todate=todate))
+    cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+    if kwargs:
+        cerebro.addstrategy(TestStrategy, **kwargs)
+        return cerebro.run()[0].broker.getvalue()
+
+    cerebro.optstrategy(TestStrategy, period=PERIODS)
+    scores = [r[0].analyzers.returns.get_analysis()['rtot']
+              for r in cerebro.run()]
+    return PERIODS[scores.index(max(scores))], max(scores)
+
+
+def test_run(main=False):
+    cerebro = bt.Cerebro(maxcpus=1)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
+
+    wf = bt.WalkForward(cerebro, insample=100, outsample=50,
+                        objective='returns.rtot')
+    wf.optstrategy(TestStrategy, period=PERIODS)
+    windows = wf.run()
+
+    # the windows must match independent runs over the same dates
+    for window in windows:
+        period, score = runwindow(*window.insample)
+        value = runwindow(*window.outsample, period=period)
+        if main:
+            print(window.insample, window.outsample, window.params,
+                  window.score, window.equity[-1][1])
+        else:
+            assert window.params == dict(period=period)
+            assert '%f' % window.score == '%f' % score
+            assert '%.2f' % window.equity[-1][1] == '%.2f' % value
+
+    if main:
+        print('Stitched equity:', wf.equity[-1])
+    else:
+        assert len(windows) == 3
+        assert len(wf.equity) == 150
+
+    # each window has its own broker
+    brokers = set(id(window.strategy.broker) for window in windows)
+    assert len(brokers) == len(windows)
+    assert id(cerebro.broker) not in brokers
+
+    # the pickled windows (optimization workers) carry only their bars
+    data = cerebro.datas[0]
+    data.reset()
+    data._start()
+    data.preload()
+    fullsize = len(pickle.dumps(data))
+    sizes = dict()
+    for bars in (10, 20, 200, 210):
+        window = wf._mkcerebro(0, bars).datas[0]
+        window._start()
+        window.preload()
+        sizes[bars] = len(pickle.dumps(window))
+        assert pickle.loads(pickle.dumps(window)).p.dataname is None
+
+    if main:
+        print('Pickled data / windows:', fullsize, sizes)
+    else:
+        assert sizes[10] < fullsize / 2
+        assert sizes[20] - sizes[10] == sizes[210] - sizes[200]
+
+
+if __name__ == '__main__':
+    test_run(main=True)
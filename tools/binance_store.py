@@ -1,6 +1,8 @@
+import hashlib
 import os
 import pandas as pd
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from backtrader.dataseries import TimeFrame
 from backtrader.feeds import GenericCSVData
 
@@ -26,6 +28,8 @@ class BinanceStore(object):
         (TimeFrame.Months, 1): '1M',
     }
 
+    _CACHEPREFIX = 'btcache_'  # only these files are pruned
+
     def __init__(self, coin_target='USDT', testnet=False):
         self.coin_target = coin_target
         self.testnet = testnet
@@ -34,9 +38,16 @@ class BinanceStore(object):
         """Get data from API (not implemented as we're focusing on local data)"""
         raise NotImplementedError("API data fetching not implemented - use local data instead")
 
-    def getlocaldata(self, dataname, timeframe, compression, start_date=None, end_date=None, datapath='\\\\znas\\Main\\spot'):
+    def getlocaldata(self, dataname, timeframe, compression, start_date=None, end_date=None, datapath='\\\\znas\\Main\\spot',
+                     max_workers=8, cachedir=None, cache_size=None):
         """
         Get data from local CSV files
+
+        The daily files are located up front and read concurrently (the
+        storage is latency bound), then concatenated once. The merged result
+        is kept in ``cachedir`` and reused while its source files are the
+        same (names) and none of them changes. If ``cache_size`` is given,
+        only the ``cache_size`` most recently used merged files are kept
         
         Args:
             dataname: Symbol name (e.g., 'BTCUSDT')
@@ -45,6 +56,10 @@ class BinanceStore(object):
             start_date: Start date for data
             end_date: End date for data
             datapath: Base path for local data files
+            max_workers: Number of threads reading files
+            cachedir: Directory of the merged files (default: datapath/merged/cache)
+            cache_size: Number of merged files kept in cachedir (default: None, no pruning).
+                Files of other processes may be removed while in use: only for a private cachedir
         """
         # Handle date parameters
         if start_date is None:
@@ -56,96 +71,42 @@ class BinanceStore(object):
             end_date = dt.datetime.now()
         elif isinstance(end_date, str):
             end_date = dt.datetime.strptime(end_date, '%Y-%m-%d')
-        
-        # First try direct file access
-        date_str = start_date.strftime('%Y-%m-%d')
-        direct_file = os.path.join(datapath, f"{date_str}_{dataname}_1m.csv")
-        merged_data = pd.DataFrame()
-        
-        def process_csv_file(file_path):
-            """Helper function to process a CSV file and return a DataFrame"""
-            df = pd.read_csv(file_path)
-            
-            # Handle different datetime column names
-            if 'datetime' not in df.columns and 'candle_begin_time' in df.columns:
-                print(f"Converting 'candle_begin_time' to 'datetime'")
-                df['datetime'] = pd.to_datetime(df['candle_begin_time'])
-                df.drop('candle_begin_time', axis=1, inplace=True)
-            else:
-                df['datetime'] = pd.to_datetime(df['datetime'])
-            
-            # Verify required columns
-            required_columns = ['open', 'high', 'low', 'close', 'volume']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            
-            df.set_index('datetime', inplace=True)
-            return df
 
-        # Try direct file access first
-        print(f"Trying direct file access: {direct_file}")
-        try:
-            df = process_csv_file(direct_file)
-            merged_data = df
-            print(f"Successfully processed {len(df)} rows from direct file")
-        except FileNotFoundError:
-            print("Direct file not found, trying date-based directory structure...")
-            # Fall back to date-based directory structure
-            current_date = start_date.date()
-            end_date = end_date.date()
-            found_data = False
-            
-            # Collect data from each day's file
-            while current_date <= end_date: 
-                date_str = current_date.strftime('%Y-%m-%d')
-                file_path = os.path.join(datapath, date_str, f"{date_str}_{dataname}_1m.csv")
-                
-                try:
-                    print(f"Processing data file: {file_path}")
-                    df = process_csv_file(file_path)
-                    merged_data = pd.concat([merged_data, df]) if not merged_data.empty else df
-                    found_data = True
-                    print(f"Successfully processed {len(df)} rows from {date_str}")
-                except FileNotFoundError:
-                    print(f"Warning: Data file not found {file_path}")
-                except pd.errors.EmptyDataError:
-                    print(f"Warning: Empty data file {file_path}")
-                except Exception as e:
-                    print(f"Error processing {date_str} data: {str(e)}")
-                
-                current_date += dt.timedelta(days=1)
-            
-            # If no data found in date directories, try direct file one more time with .csv extension
-            if not found_data:
-                direct_file_csv = os.path.join(datapath, f"{date_str}_{dataname}.csv")
-                try:
-                    print(f"Trying direct file access with .csv extension: {direct_file_csv}")
-                    df = process_csv_file(direct_file_csv)
-                    merged_data = df
-                    print(f"Successfully processed {len(df)} rows from direct file")
-                except (FileNotFoundError, pd.errors.EmptyDataError):
-                    pass
-        
-        if merged_data.empty:
+        # Direct file first, else the date-based directory structure
+        files = self._findfiles(dataname, start_date, end_date, datapath, max_workers)
+        if files is None:
             raise ValueError(f"No data found between {start_date} and {end_date}")
-        
-        # Sort and remove duplicates
-        merged_data = merged_data.sort_index()
-        merged_data = merged_data[~merged_data.index.duplicated(keep='first')]
-        
-        # Save merged data
-        output_dir = os.path.join(datapath, 'merged')
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Format dates for filename
-        start_str = start_date.strftime('%Y-%m-%d') if isinstance(start_date, dt.datetime) else start_date
-        end_str = end_date.strftime('%Y-%m-%d') if isinstance(end_date, dt.datetime) else end_date
-        
-        output_path = os.path.join(output_dir, f"{start_str}_{dataname}_1m_{end_str}.csv")
-        print(f"Saving merged data to: {output_path}")
-        merged_data.to_csv(output_path)
-        
+
+        if cachedir is None:
+            cachedir = os.path.join(datapath, 'merged', 'cache')
+        os.makedirs(cachedir, exist_ok=True)
+
+        # Format dates for filename, the names of the sources are part of the key
+        start_str = start_date.strftime('%Y-%m-%d')
+        end_str = end_date.strftime('%Y-%m-%d')
+        output_path = os.path.join(cachedir, f"{self._CACHEPREFIX}{start_str}_{dataname}_1m_{end_str}_"
+                                             f"{self._sourceskey(files)}.csv")
+
+        if self._cachevalid(output_path, files):
+            print(f"Using cached merged data: {output_path}")
+            os.utime(output_path)  # most recently used
+        else:
+            merged_data = self._readfiles([path for path, _ in files], max_workers)
+            if merged_data is None:
+                raise ValueError(f"No data found between {start_date} and {end_date}")
+
+            # Sort and remove duplicates
+            merged_data = merged_data.sort_index()
+            merged_data = merged_data[~merged_data.index.duplicated(keep='first')]
+
+            # Save merged data (renamed in place: concurrent readers never see half a file)
+            print(f"Saving merged data to: {output_path}")
+            tmp_path = f"{output_path}.{os.getpid()}.tmp"
+            merged_data.to_csv(tmp_path)
+            os.replace(tmp_path, output_path)
+            if cache_size is not None:
+                self._prunecache(cachedir, cache_size, keep=output_path)
+
         # Create and return a GenericCSVData feed
         data = GenericCSVData(
             dataname=output_path,
@@ -163,3 +124,138 @@ class BinanceStore(object):
         )
         
         return data
+
+    @staticmethod
+    def _process_csv_file(file_path):
+        """Helper function to process a CSV file and return a DataFrame"""
+        df = pd.read_csv(file_path)
+        
+        # Handle different datetime column names
+        if 'datetime' not in df.columns and 'candle_begin_time' in df.columns:
+            print(f"Converting 'candle_begin_time' to 'datetime'")
+            df['datetime'] = pd.to_datetime(df['candle_begin_time'])
+            df.drop('candle_begin_time', axis=1, inplace=True)
+        else:
+            df['datetime'] = pd.to_datetime(df['datetime'])
+        
+        # Verify required columns
+        required_columns = ['open', 'high', 'low', 'close', 'volume']
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        
+        df.set_index('datetime', inplace=True)
+        return df
+
+    @staticmethod
+    def _stat(path):
+        """Returns the (path, mtime) of an existing file or None"""
+        try:
+            return path, os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _findfiles(self, dataname, start_date, end_date, datapath, max_workers):
+        """
+        Returns the list of (path, mtime) of the files with the data or None
+
+        The existence of the daily files is checked concurrently
+        """
+        date_str = start_date.strftime('%Y-%m-%d')
+        direct_file = self._stat(os.path.join(datapath, f"{date_str}_{dataname}_1m.csv"))
+        if direct_file is not None:
+            print(f"Using direct file: {direct_file[0]}")
+            return [direct_file]
+
+        current_date, last_date = start_date.date(), end_date.date()
+        paths = list()
+        while current_date <= last_date:
+            date_str = current_date.strftime('%Y-%m-%d')
+            paths.append(os.path.join(datapath, date_str, f"{date_str}_{dataname}_1m.csv"))
+            current_date += dt.timedelta(days=1)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            stats = list(executor.map(self._stat, paths))
+
+        files = [stat for stat in stats if stat is not None]
+        for path, stat in zip(paths, stats):
+            if stat is None:
+                print(f"Warning: Data file not found {path}")
+
+        if files:
+            return files
+
+        # No data found in date directories, try direct file with .csv extension
+        direct_file_csv = self._stat(os.path.join(datapath, f"{date_str}_{dataname}.csv"))
+        if direct_file_csv is not None:
+            print(f"Using direct file: {direct_file_csv[0]}")
+            return [direct_file_csv]
+
+        return None
+
+    def _readfiles(self, paths, max_workers):
+        """
+        Reads the files concurrently and concatenates them in order
+
+        An error reading any of the files is raised: a partial merge would
+        otherwise be cached and served as if complete
+        """
+        def read(file_path):
+            try:
+                df = self._process_csv_file(file_path)
+            except pd.errors.EmptyDataError:
+                print(f"Warning: Empty data file {file_path}")
+                return None
+            except Exception as e:
+                print(f"Error processing {file_path}: {str(e)}")
+                raise
+
+            print(f"Successfully processed {len(df)} rows from {file_path}")
+            return df
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = [df for df in executor.map(read, paths) if df is not None]
+
+        if not frames:
+            return None
+
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    @staticmethod
+    def _sourceskey(files):
+        """Hash of the names of the source files"""
+        h = hashlib.sha1()
+        for path, _ in files:
+            h.update(os.path.abspath(path).encode('utf-8') + b'\n')
+        return h.hexdigest()[:16]
+
+    @staticmethod
+    def _cachevalid(output_path, files):
+        """A merged file (named after its sources) is valid if newer than all its source files"""
+        try:
+            cached = os.stat(output_path).st_mtime
+        except OSError:
+            return False
+
+        return all(mtime < cached for _, mtime in files)
+
+    @classmethod
+    def _prunecache(cls, cachedir, cache_size, keep=None):
+        """Removes the least recently used merged files beyond cache_size (never keep)"""
+        merged = list()
+        for name in os.listdir(cachedir):
+            if name.startswith(cls._CACHEPREFIX) and name.endswith('.csv'):
+                path = os.path.join(cachedir, name)
+                try:
+                    merged.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    pass
+
+        # the file about to be returned goes first, whatever its mtime
+        keep = os.path.abspath(keep) if keep is not None else None
+        merged.sort(key=lambda x: (os.path.abspath(x[1]) == keep, x[0]), reverse=True)
+        for _, path in merged[max(cache_size, 1):]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -51,6 +51,8 @@ def run_backtest(
     plot=True,
     use_local_data=True,  # Default to using local data
     data_path='\\\\znas\\Main\\spot',  # Default local data path
+    progresscb=None,
+    progress_interval=1000,
     **strategy_params
 ):
     """
@@ -68,6 +70,9 @@ def run_backtest(
         plot: Whether to plot
         use_local_data: Whether to use local data (default True)
         data_path: Local data path
+        progresscb: Callable(strategy) invoked every progress_interval bars,
+            returning True stops the run early (see Cerebro.addprogresscb)
+        progress_interval: Number of bars between progresscb calls
         strategy_params: Strategy parameters
     """
     # Handle date parameters
@@ -170,10 +175,16 @@ def run_backtest(
     
     # Add strategy
     cerebro.addstrategy(strategy, **strategy_params)
+
+    if progresscb is not None:
+        cerebro.addprogresscb(progresscb, interval=progress_interval)
     
     # Run backtest
     results = cerebro.run()
     strat = results[0]
+    if strat.pruned:
+        # Stopped early by progresscb, partial analyzers only
+        return results
     
     # Output statistics
     portfolio_value = cerebro.broker.getvalue()
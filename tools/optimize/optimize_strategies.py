@@ -12,7 +12,9 @@ def optimize_rsi_strategy(
     end_date=None,
     n_trials=50,
     study_name='rsi_optimization',
-    data_path='\\\\znas\\Main\\spot'
+    data_path='\\\\znas\\Main\\spot',
+    progress_interval=1000,
+    initial_cash=200000
 ):
     """
     Optimize RSI strategy parameters using Optuna
@@ -24,6 +26,8 @@ def optimize_rsi_strategy(
         n_trials: Number of optimization trials
         study_name: Name of the optimization study
         data_path: Path to historical data
+        progress_interval: Bars between intermediate reports to the pruner
+        initial_cash: Starting cash of the backtests
     """
     def objective(trial):
         # Define the parameter space
@@ -36,6 +40,12 @@ def optimize_rsi_strategy(
             'eth_size': trial.suggest_float('eth_size', 0.01, 0.1)
         }
         
+        def report_progress(strategy):
+            # Report the intermediate ROI and let the pruner stop the run
+            roi = (strategy.broker.getvalue() - initial_cash) / initial_cash
+            trial.report(roi, len(strategy))
+            return trial.should_prune()
+
         try:
             # Run backtest with the trial parameters
             results = run_backtest(
@@ -44,20 +54,24 @@ def optimize_rsi_strategy(
                 start_date=start_date,
                 end_date=end_date,
                 timeframe='15m',
-                initial_cash=200000,
+                initial_cash=initial_cash,
                 commission=0.0015,
                 plot=False,
                 use_local_data=True,
                 data_path=data_path,
+                progresscb=report_progress,
+                progress_interval=progress_interval,
                 **params
             )
             
             # Get the first strategy instance (we only use one)
             strategy = results[0]
+            if strategy.pruned:
+                raise optuna.TrialPruned()
             
             # Calculate metrics for optimization
             portfolio_value = strategy.broker.getvalue()
-            roi = (portfolio_value - 200000) / 200000
+            roi = (portfolio_value - initial_cash) / initial_cash
             sharpe = strategy.analyzers.sharpe.get_analysis()['sharperatio']
             drawdown = strategy.analyzers.drawdown.get_analysis()['max']['drawdown']
             
@@ -72,6 +86,8 @@ def optimize_rsi_strategy(
             score = roi * 0.4 + sharpe * 0.4 - (drawdown/100) * 0.2
             return score
             
+        except optuna.TrialPruned:
+            raise
         except Exception as e:
             logging.error(f"Error in trial {trial.number}: {str(e)}")
             return float('-inf')  # Return worst possible score on error
@@ -83,6 +99,7 @@ def optimize_rsi_strategy(
     study = optuna.create_study(
         study_name=study_name,
         direction="maximize",
+        pruner=optuna.pruners.MedianPruner(n_warmup_steps=progress_interval),
         storage=f"sqlite:///optimize/studies/{study_name}.db",
         load_if_exists=True
     )
@@ -44,8 +44,11 @@ DATAFORMATS = dict(
     yahoocsv=bt.feeds.YahooFinanceCSVData,
     yahoocsv_unreversed=bt.feeds.YahooFinanceCSVData,
     yahoo=bt.feeds.YahooFinanceData,
+    binary=bt.feeds.BinaryBarData,
 )
 
+OUTFORMATS = ['btcsv', 'binary']
+
 
 class RewriteStrategy(bt.Strategy):
     params = (
@@ -123,11 +126,20 @@ def runstrat(pargs=None):
     data = dfcls(dataname=args.infile, **dfkwargs)
     cerebro.adddata(data)
 
-    cerebro.addstrategy(RewriteStrategy,
-                        separator=args.separator,
-                        outfile=args.outfile)
+    if args.outformat == 'binary':
+        if args.outfile is None:
+            print('An output file is needed for the binary format')
+            sys.exit(1)
+
+        # the whole (preloaded) lines of the data are written at once
+        cerebro.run(stdstats=False)
+        bt.feeds.BinaryBarData.write(args.outfile, data)
+    else:
+        cerebro.addstrategy(RewriteStrategy,
+                            separator=args.separator,
+                            outfile=args.outfile)
 
-    cerebro.run(stdstats=False)
+        cerebro.run(stdstats=False)
 
     if args.plot:
         pkwargs = dict(style='bar')
@@ -141,7 +153,8 @@ def runstrat(pargs=None):
 def parse_args(pargs=None):
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-        description='Rewrite formats to BacktraderCSVData format')
+        description=('Rewrite formats to BacktraderCSVData format or to the '
+                     'binary format of BinaryBarData'))
 
     parser.add_argument('--format', '-fmt', required=False,
                         choices=DATAFORMATS.keys(),
@@ -154,6 +167,10 @@ def parse_args(pargs=None):
     parser.add_argument('--outfile', '-o', default=None, required=False,
                         help='File to write to')
 
+    parser.add_argument('--outformat', '-ofmt', required=False,
+                        choices=OUTFORMATS, default=OUTFORMATS[0],
+                        help='Format of the output file')
+
     parser.add_argument('--fromdate', '-f', required=False,
                         help='Starting date in YYYY-MM-DD format')
 
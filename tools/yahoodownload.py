@@ -26,7 +26,9 @@ import argparse
 import collections
 import datetime
 import io
+import json
 import logging
+import os
 import sys
 
 
@@ -50,6 +52,10 @@ class YahooDownload(object):
     retries = 3
 
     def __init__(self, ticker, fromdate, todate, period='d', reverse=False):
+        self.ticker = ticker
+        self.period = period
+        self.datafile = None
+
         try:
             import requests
         except ImportError:
@@ -159,6 +165,127 @@ class YahooDownload(object):
 
         f.close()
 
+    def bars(self):
+        '''Returns the header and a list of ``(datetime, line)`` with the
+        downloaded bars'''
+        self.datafile.seek(0)
+        header = self.datafile.readline()
+        bars = list()
+        for line in self.datafile:
+            if not line.strip():
+                continue
+            dt = datetime.datetime.strptime(line.split(',', 1)[0], '%Y-%m-%d')
+            bars.append((dt, line))
+
+        return header, bars
+
+    def writemanifest(self, filename):
+        '''Records the ticker, timeframe and dates of the bars written with
+        ``writetofile`` in the manifest of ``filename``'''
+        if not self.datafile:
+            return
+
+        _, bars = self.bars()
+        dts = [dt for dt, _ in bars]
+        writemanifest(filename, dict(
+            ticker=self.ticker, timeframe=self.period,
+            first=_strfdate(min(dts)) if dts else None,
+            last=_strfdate(max(dts)) if dts else None))
+
+    def appendtofile(self, filename, after=None):
+        '''Appends the downloaded bars later than ``after`` (a ``datetime``)
+        and than the last bar in ``filename`` to it, then updates the
+        manifest of the file. The header is only written if the file is
+        missing or empty'''
+        if not self.datafile:
+            return 0
+
+        # the file may be ahead of the manifest (interrupted before its update)
+        filelast = taildate(filename)
+        header, bars = self.bars()
+        bars = [(dt, line) for dt, line in bars
+                if all(dt > x for x in (after, filelast) if x is not None)]
+
+        empty = not os.path.exists(filename) or not os.path.getsize(filename)
+        with io.open(filename, 'a') as f:
+            if empty:
+                f.write(header)
+            f.writelines(line for _, line in bars)
+
+        manifest = readmanifest(filename)
+        dts = [dt for dt, _ in bars]
+        if filelast is None:  # no bars before
+            manifest['first'] = _strfdate(min(dts)) if dts else None
+        else:
+            dts.append(filelast)
+
+        manifest['last'] = _strfdate(max(dts)) if dts else None
+        manifest.update(ticker=self.ticker, timeframe=self.period)
+        writemanifest(filename, manifest)
+
+        return len(bars)
+
+
+MANIFEST = '.manifest.json'
+
+
+def readmanifest(filename):
+    '''Returns the manifest of a downloaded file (``ticker``, ``timeframe``
+    and the ``first``/``last`` dates of its bars) or an empty dict'''
+    try:
+        with io.open(filename + MANIFEST, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return dict()
+
+
+def writemanifest(filename, manifest):
+    '''Writes the manifest of a downloaded file (replaced atomically)'''
+    mfile = filename + MANIFEST
+    tmpfile = mfile + '.tmp'
+    with io.open(tmpfile, 'w') as f:
+        f.write(json.dumps(manifest, indent=1, sort_keys=True))
+    getattr(os, 'replace', os.rename)(tmpfile, mfile)
+
+
+def _strfdate(dt):
+    return dt.strftime('%Y-%m-%d')
+
+
+def lastdate(filename):
+    '''Returns the date (``datetime``) of the last bar in a downloaded file
+    or ``None`` if the file does not exist or has no bars. The manifest of
+    the file is used if there is one, else the tail of the file is read'''
+    last = readmanifest(filename).get('last')
+    if last is not None and os.path.exists(filename):
+        return datetime.datetime.strptime(last, '%Y-%m-%d')
+
+    return taildate(filename)
+
+
+def taildate(filename):
+    '''Returns the date (``datetime``) of the last bar in the tail of a
+    downloaded file or ``None`` if the file does not exist or has no bars'''
+    try:
+        f = io.open(filename, 'rb')
+    except IOError:
+        return None
+
+    with f:
+        f.seek(0, io.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = f.read().decode('utf-8').splitlines()
+
+    for line in reversed(lines):
+        try:
+            return datetime.datetime.strptime(line.split(',', 1)[0],
+                                              '%Y-%m-%d')
+        except ValueError:
+            continue  # blank line or header
+
+    return None
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -182,6 +309,10 @@ def parse_args():
     parser.add_argument('--outfile', required=True,
                         help='Output file name')
 
+    parser.add_argument('--incremental', action='store_true', default=False,
+                        help=('Only download the bars after the last one in '
+                              'the output file and append them to it'))
+
     return parser.parse_args()
 
 
@@ -209,6 +340,16 @@ if __name__ == '__main__':
     logging.info('Do Not Reverse flag status')
     reverse = args.reverse
 
+    last = None
+    if args.incremental:
+        last = lastdate(args.outfile)
+        if last is not None:
+            logging.info('Last bar in output file: %s' % last.date())
+            fromdate = max(fromdate, last + datetime.timedelta(days=1))
+            if fromdate > todate:
+                logging.info('Output file is up to date')
+                sys.exit(0)
+
     logging.info('Downloading from yahoo')
     try:
         yahoodown = YahooDownload(
@@ -223,6 +364,18 @@ if __name__ == '__main__':
         logging.error(str(e))
         sys.exit(1)
 
+    if args.incremental:
+        logging.info('Appending downloaded data to output file')
+        try:
+            count = yahoodown.appendtofile(args.outfile, after=last)
+        except Exception as e:
+            logging.error('Appending to output file failed')
+            logging.error(str(e))
+            sys.exit(1)
+
+        logging.info('Appended %d bars' % count)
+        sys.exit(0)
+
     logging.info('Opening output file')
     try:
         ofile = io.open(args.outfile, 'w')
@@ -234,6 +387,7 @@ if __name__ == '__main__':
     logging.info('Writing downloaded data to output file')
     try:
         yahoodown.writetofile(ofile)
+        yahoodown.writemanifest(args.outfile)
     except Exception as e:
         logging.error('Writing to output file failed')
         logging.error(str(e))